@@ -0,0 +1,123 @@
+"""
+Benchmark the server CPU cost of a cache hit per endpoint, rebuilding models vs serving cached bytes
+
+Run from the backend directory:
+    python -m benchmarks.bench_cache_hits --candles 1000 --markets 2000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from models.schemas import HistoricalDataResponse, TickerResponse
+from services.cache_service import CacheService
+from services.response_cache import JSON_MEDIA_TYPE, EncodedResponse
+
+
+def make_ticker() -> Dict[str, Any]:
+    """Build a ticker as returned by the crypto service"""
+    return {
+        "exchange": "binance",
+        "symbol": "BTC/USDT",
+        "last": 42000.0,
+        "bid": 41999.5,
+        "ask": 42000.5,
+        "high": 43000.0,
+        "low": 41000.0,
+        "volume": 1234.5,
+        "timestamp": datetime(2024, 1, 2, 3, 4, 5),
+        "datetime": "2024-01-02T03:04:05.000Z"
+    }
+
+
+def make_historical(count: int) -> Dict[str, Any]:
+    """Build a historical response dict with count 1m candles"""
+    start = 1672531200000
+    return {
+        "exchange": "binance",
+        "symbol": "BTC/USDT",
+        "timeframe": "1m",
+        "data": [
+            {
+                "timestamp": datetime.fromtimestamp((start + i * 60000) / 1000),
+                "open": 16500.0 + i,
+                "high": 16510.5 + i,
+                "low": 16490.25 + i,
+                "close": 16505.75 + i,
+                "volume": 12.345678 + i
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def model_hit(cache: CacheService, key: str, model: Optional[Type[BaseModel]]) -> Callable[[], bytes]:
+    """Old path: cached dict, model rebuilt by the handler, re-validated by response_model, JSON encoded"""
+    def serve() -> bytes:
+        cached = cache.get(key)
+        if model is None:
+            return JSONResponse(content=jsonable_encoder(cached)).body
+        response = model(**cached)
+        validated = model.model_validate(response.model_dump())
+        return JSONResponse(content=jsonable_encoder(validated)).body
+    return serve
+
+
+def encoded_hit(cache: CacheService, key: str) -> Callable[[], bytes]:
+    """New path: cached bytes returned in a raw Response"""
+    def serve() -> bytes:
+        cached = cache.get(key)
+        return Response(content=cached.body, media_type=JSON_MEDIA_TYPE, headers={"ETag": cached.etag}).body
+    return serve
+
+
+def measure(serve: Callable[[], bytes], repeat: int) -> float:
+    """Return mean CPU seconds per hit"""
+    for _ in range(3):
+        serve()
+    start = time.process_time()
+    for _ in range(repeat):
+        serve()
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candles", type=int, default=1000)
+    parser.add_argument("--markets", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    
+    endpoints: List[Any] = [
+        ("ticker", make_ticker(), TickerResponse),
+        (f"historical ({args.candles} candles)", make_historical(args.candles), HistoricalDataResponse),
+        (
+            f"markets ({args.markets} symbols)",
+            {"exchange": "binance", "markets": [f"C{i}/USDT" for i in range(args.markets)]},
+            None
+        ),
+    ]
+    
+    old_cache = CacheService(ttl=3600)
+    new_cache = CacheService(ttl=3600)
+    for name, value, model in endpoints:
+        old_cache.set(name, value)
+        new_cache.set(name, EncodedResponse(value, model))
+        assert json.loads(model_hit(old_cache, name, model)()) == json.loads(encoded_hit(new_cache, name)())
+        
+        before = measure(model_hit(old_cache, name, model), args.repeat)
+        after = measure(encoded_hit(new_cache, name), args.repeat)
+        print(
+            f"{name:>28}: {before * 1e6:>10.1f} us/hit before  "
+            f"{after * 1e6:>8.1f} us/hit after  ({before / after:6.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
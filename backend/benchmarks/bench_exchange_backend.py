@@ -0,0 +1,108 @@
+"""
+Benchmark the thread-based and asyncio exchange backends against a local fake exchange
+
+Run from the backend directory:
+    python -m benchmarks.bench_exchange_backend --requests 2000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+from services.crypto_service import CryptocurrencyService
+
+
+def _ticker(symbol: str) -> Dict[str, Any]:
+    """Build a ccxt-shaped ticker"""
+    now = int(time.time() * 1000)
+    return {
+        "symbol": symbol,
+        "last": 42000.0,
+        "bid": 41999.5,
+        "ask": 42000.5,
+        "high": 43000.0,
+        "low": 41000.0,
+        "volume": 1234.5,
+        "timestamp": now,
+        "datetime": "",
+    }
+
+
+class BlockingFakeExchange:
+    """Fake sync ccxt exchange whose calls block like a network round trip"""
+    
+    name = "Fake"
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.markets = {"BTC/USDT": {}}
+    
+    def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        return _ticker(symbol)
+
+
+class AsyncFakeExchange:
+    """Fake ccxt.async_support exchange whose calls await a network round trip"""
+    
+    name = "Fake"
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.markets = {"BTC/USDT": {}}
+    
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return _ticker(symbol)
+
+
+async def run_backend(backend: str, requests: int, concurrency: int, latency: float) -> Dict[str, Any]:
+    """Drive get_ticker through one backend and collect latency statistics"""
+    service = CryptocurrencyService(backend=backend)
+    fake_class = AsyncFakeExchange if backend == "async" else BlockingFakeExchange
+    service.exchanges["fake"] = fake_class(latency)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await service.get_ticker("fake", "BTC/USDT")
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "backend": backend,
+        "requests": requests,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake upstream latency in seconds")
+    args = parser.parse_args()
+    
+    for backend in ("thread", "async"):
+        result = asyncio.run(run_backend(backend, args.requests, args.concurrency, args.latency))
+        print(
+            f"{result['backend']:>6}: {result['throughput_rps']:>9} req/s  "
+            f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  "
+            f"({result['requests']} requests in {result['elapsed_s']}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark payload size and server CPU per request for the /api/historical response formats
+
+Run from the backend directory:
+    python -m benchmarks.bench_ohlcv_formats --candles 1000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+
+from models.schemas import HistoricalDataResponse
+from services.ohlcv_encoding import encode_binary, encode_columnar_json
+
+
+def make_candles(count: int) -> List[List[Any]]:
+    """Build ccxt-shaped 1m candles"""
+    start = 1672531200000
+    return [
+        [start + i * 60000, 16500.0 + i, 16510.5 + i, 16490.25 + i, 16505.75 + i, 12.345678 + i]
+        for i in range(count)
+    ]
+
+
+def row_json(candles: List[List[Any]]) -> bytes:
+    """Current path: dict per candle, pydantic models, response_model re-validation, JSON encode"""
+    data = [
+        {
+            "timestamp": datetime.fromtimestamp(c[0] / 1000),
+            "open": c[1],
+            "high": c[2],
+            "low": c[3],
+            "close": c[4],
+            "volume": c[5]
+        }
+        for c in candles
+    ]
+    response = HistoricalDataResponse(exchange="binance", symbol="BTC/USDT", timeframe="1m", data=data)
+    validated = HistoricalDataResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def columnar_json(candles: List[List[Any]]) -> bytes:
+    """Columnar JSON path"""
+    return encode_columnar_json(candles, {"exchange": "binance", "symbol": "BTC/USDT", "timeframe": "1m"})
+
+
+def measure(encode: Callable[[List[List[Any]]], bytes], candles: List[List[Any]], repeat: int):
+    """Return payload size and mean CPU time per request"""
+    payload = encode(candles)
+    for _ in range(3):
+        encode(candles)
+    
+    start = time.process_time()
+    for _ in range(repeat):
+        encode(candles)
+    return len(payload), (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--candles", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    candles = make_candles(args.candles)
+    results = {
+        name: measure(encode, candles, args.repeat)
+        for name, encode in (("row json", row_json), ("columnar json", columnar_json), ("binary", encode_binary))
+    }
+    baseline_size, baseline_cpu = results["row json"]
+    
+    for name, (size, cpu) in results.items():
+        print(
+            f"{name:>14}: {size:>8} bytes ({size / baseline_size:5.1%})  "
+            f"{cpu * 1e6:>9.1f} us/request ({cpu / baseline_cpu:5.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark order book updates per second, sorted arrays vs a dict sorted on every read
+
+Run from the backend directory:
+    python -m benchmarks.bench_order_book --levels 1000 --updates 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from services.order_book import OrderBook
+
+Delta = Tuple[List[List[float]], List[List[float]]]
+
+
+def make_deltas(levels: int, count: int, changes: int, seed: int = 0) -> Tuple[Delta, List[Delta]]:
+    """Build a snapshot and deltas changing random levels near the top of a 100.0-mid book"""
+    rng = random.Random(seed)
+    snapshot = (
+        [[round(100 - 0.01 * (i + 1), 2), 1.0] for i in range(levels)],
+        [[round(100 + 0.01 * (i + 1), 2), 1.0] for i in range(levels)],
+    )
+    deltas = []
+    for _ in range(count):
+        delta: Delta = ([], [])
+        for _ in range(changes):
+            # Most activity is close to the spread
+            i = min(int(rng.expovariate(1 / 20)), levels - 1)
+            size = 0.0 if rng.random() < 0.2 else round(rng.uniform(0.1, 5.0), 3)
+            if rng.random() < 0.5:
+                delta[0].append([round(100 - 0.01 * (i + 1), 2), size])
+            else:
+                delta[1].append([round(100 + 0.01 * (i + 1), 2), size])
+        deltas.append(delta)
+    return snapshot, deltas
+
+
+class DictBook:
+    """Baseline: levels in dicts, sorted whenever the top of the book is read"""
+    
+    def __init__(self, bids: List[List[float]], asks: List[List[float]]):
+        self.bids: Dict[float, float] = {price: size for price, size in bids}
+        self.asks: Dict[float, float] = {price: size for price, size in asks}
+    
+    def apply(self, bids: List[List[float]], asks: List[List[float]]) -> None:
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for price, size in levels:
+                if size:
+                    side[price] = size
+                else:
+                    side.pop(price, None)
+    
+    def top(self, n: int) -> Any:
+        return (
+            sorted(self.bids.items(), reverse=True)[:n],
+            sorted(self.asks.items())[:n],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--levels", type=int, default=1000, help="Levels per side")
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--changes", type=int, default=5, help="Levels changed per delta")
+    parser.add_argument("--read-every", type=int, default=10, help="Read the top 20 levels every n updates")
+    args = parser.parse_args()
+    
+    snapshot, deltas = make_deltas(args.levels, args.updates, args.changes)
+    
+    baseline = DictBook(*snapshot)
+    start = time.perf_counter()
+    for i, (bids, asks) in enumerate(deltas):
+        baseline.apply(bids, asks)
+        if i % args.read_every == 0:
+            baseline.top(20)
+    before = time.perf_counter() - start
+    
+    book = OrderBook("bench", "BTC/USDT")
+    book.apply_snapshot(*snapshot, seq=0)
+    start = time.perf_counter()
+    for i, (bids, asks) in enumerate(deltas):
+        book.apply_delta(bids, asks, seq=i + 1)
+        if i % args.read_every == 0:
+            book.snapshot(20)
+    after = time.perf_counter() - start
+    
+    assert [list(level) for level in baseline.top(20)[0]] == book.bids.levels(20)
+    
+    # Full streaming path: apply, then serialize the delta once for subscribers
+    book.apply_snapshot(*snapshot, seq=0)
+    start = time.perf_counter()
+    for i, (bids, asks) in enumerate(deltas):
+        changes = book.apply_delta(bids, asks, seq=i + 1)
+        json.dumps({"type": "book_delta", "seq": i + 1, "prev_seq": i, **changes})
+    streamed = time.perf_counter() - start
+    
+    print(f"{args.levels} levels per side, {args.changes} changes per delta, top 20 read every {args.read_every}")
+    print(f"{'dict + sort on read':>24}: {args.updates / before:>12,.0f} updates/s")
+    print(f"{'sorted arrays':>24}: {args.updates / after:>12,.0f} updates/s  ({before / after:.1f}x)")
+    print(f"{'arrays + delta JSON':>24}: {args.updates / streamed:>12,.0f} updates/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Load-test the REST endpoints and the /ws fan-out against an in-process fake exchange
+
+Run from the backend directory:
+    python -m benchmarks.load_test --duration 5 --concurrency 50 --save load_baseline.json
+    python -m benchmarks.load_test --duration 5 --concurrency 50 --compare load_baseline.json
+
+The app runs under uvicorn on a local port with every exchange replaced by a
+FakeExchange, and the load generator shares its process and event loop, so
+absolute numbers are conservative. Compare runs made on the same machine with
+the same options: --compare exits with status 1 when a scenario regresses
+beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import uvicorn
+
+from services.fake_exchange import FakeExchange
+
+EXCHANGE_ID = "fake"
+# Markets requested by the hot-path scenarios and watched by WebSocket clients
+HOT_MARKETS = 20
+REST_SCENARIOS = ("ticker", "tickers", "historical", "markets")
+SCENARIOS = REST_SCENARIOS + ("ws",)
+# metric: (better direction, smallest absolute change treated as a regression)
+CHECKS = {
+    "throughput_rps": ("higher", 0.0),
+    "p99_ms": ("lower", 2.0),
+    "upstream_calls_per_request": ("lower", 0.001),
+    "rss_mb": ("lower", 5.0),
+}
+
+Request = Tuple[str, Dict[str, str], Dict[str, str]]
+
+
+def rss_mb() -> float:
+    """Get the resident set size of this process (peak size where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Get a percentile of unsorted values in milliseconds"""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+
+
+def request_makers(markets: List[Dict[str, Any]]) -> Dict[str, Callable[[random.Random], Request]]:
+    """Build a (path, params, headers) generator per REST scenario"""
+    hot = markets[:HOT_MARKETS]
+    # Dashboards poll a few fixed watchlists rather than arbitrary symbol sets
+    watchlists = [",".join(market["symbol"] for market in hot[i:i + 10]) for i in range(0, HOT_MARKETS - 9, 5)]
+    prefixes = sorted({market["base"][:2] for market in markets})
+    
+    def ticker(rng: random.Random) -> Request:
+        return f"/api/ticker/{EXCHANGE_ID}/{rng.choice(hot)['id']}", {}, {}
+    
+    def tickers(rng: random.Random) -> Request:
+        return f"/api/tickers/{EXCHANGE_ID}", {"symbols": rng.choice(watchlists)}, {}
+    
+    def historical(rng: random.Random) -> Request:
+        params = {
+            "exchange": EXCHANGE_ID,
+            "symbol": rng.choice(hot[:5])["symbol"],
+            "timeframe": rng.choice(("1m", "1h", "4h")),
+            "limit": "500",
+        }
+        return "/api/historical", params, {"Accept-Encoding": "gzip"}
+    
+    def markets_search(rng: random.Random) -> Request:
+        return f"/api/markets/{EXCHANGE_ID}", {"q": rng.choice(prefixes), "limit": "50"}, {}
+    
+    return {"ticker": ticker, "tickers": tickers, "historical": historical, "markets": markets_search}
+
+
+def summarize(
+    latencies: List[float],
+    errors: int,
+    elapsed: float,
+    upstream_calls: int
+) -> Dict[str, Any]:
+    """Reduce one scenario's samples to the reported metrics"""
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_request": round(upstream_calls / count, 4) if count else None,
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+async def run_rest(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    make_request: Callable[[random.Random], Request],
+    fake: FakeExchange,
+    concurrency: int,
+    duration: float,
+    seed: int
+) -> Dict[str, Any]:
+    """Send requests from concurrency workers for duration seconds"""
+    latencies: List[float] = []
+    errors = 0
+    calls_before = fake.stats()["total_calls"]
+    deadline = time.perf_counter() + duration
+    
+    async def worker(rng: random.Random):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path, params, headers = make_request(rng)
+            start = time.perf_counter()
+            try:
+                async with session.get(base_url + path, params=params, headers=headers) as response:
+                    await response.read()
+                    failed = response.status >= 400
+            except aiohttp.ClientError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(random.Random(seed + i)) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed, fake.stats()["total_calls"] - calls_before)
+
+
+async def run_websocket(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    markets: List[Dict[str, Any]],
+    fake: FakeExchange,
+    clients: int,
+    symbols_per_client: int,
+    duration: float
+) -> Dict[str, Any]:
+    """
+    Hold clients WebSocket subscriptions open for duration seconds
+    
+    Latency is the age of each ticker when it reaches a client (upstream fetch
+    to receipt, including time spent in the ticker cache); throughput counts
+    ticker messages delivered across all clients.
+    """
+    hot = [market["id"] for market in markets[:HOT_MARKETS]]
+    latencies: List[float] = []
+    errors = 0
+    calls_before = fake.stats()["total_calls"]
+    deadline = time.perf_counter() + duration
+    
+    async def client(i: int):
+        nonlocal errors
+        symbols = [hot[(i + k) % len(hot)] for k in range(symbols_per_client)]
+        try:
+            async with session.ws_connect(base_url + "/ws") as ws:
+                await ws.send_json({"action": "subscribe", "exchange": EXCHANGE_ID, "symbols": symbols})
+                while (remaining := deadline - time.perf_counter()) > 0:
+                    try:
+                        message = await ws.receive(timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        errors += 1
+                        break
+                    data = json.loads(message.data)
+                    if data.get("type") == "ticker":
+                        fetched = datetime.fromisoformat(data["data"]["timestamp"]).timestamp()
+                        latencies.append(time.time() - fetched)
+        except aiohttp.ClientError:
+            errors += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(clients)])
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed, fake.stats()["total_calls"] - calls_before)
+
+
+async def start_server(app) -> Tuple[uvicorn.Server, asyncio.Task, str]:
+    """Serve app on a free local port in this event loop"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("Server exited during startup")
+        await asyncio.sleep(0.01)
+    return server, task, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the app against a fake exchange and run the selected scenarios"""
+    # Settings are read when main is imported: no snapshot or candle files, one fake exchange
+    # (pydantic-settings parses list settings from the environment as JSON)
+    os.environ.update({
+        "ENABLED_EXCHANGES": json.dumps([EXCHANGE_ID]),
+        "MARKETS_SNAPSHOT_PATH": "",
+        "CANDLE_STORE_PATH": "",
+        "CACHE_BACKEND": "memory",
+        "WS_POLL_INTERVAL": str(args.ws_poll_interval),
+        # Failed requests are counted, not logged
+        "LOG_LEVEL": "CRITICAL",
+    })
+    import main
+    
+    fakes: Dict[str, FakeExchange] = {}
+    
+    def build_exchange(exchange_id: str, config: Dict[str, Any]) -> FakeExchange:
+        fakes[exchange_id] = FakeExchange(
+            exchange_id,
+            config,
+            markets=args.markets,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            max_calls_per_second=args.max_calls_per_second,
+            rate_limit=args.rate_limit_ms,
+            seed=args.seed
+        )
+        return fakes[exchange_id]
+    
+    main.crypto_service.exchange_factory = build_exchange
+    server, task, base_url = await start_server(main.app)
+    results: Dict[str, Any] = {}
+    try:
+        connector = aiohttp.TCPConnector(limit=max(args.concurrency, args.ws_clients))
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async with session.get(f"{base_url}/api/markets/{EXCHANGE_ID}", params={"limit": "1000"}) as response:
+                response.raise_for_status()
+            fake = fakes[EXCHANGE_ID]
+            markets = list(fake.markets.values())
+            makers = request_makers(markets)
+            
+            for name in args.scenarios:
+                if name == "ws":
+                    result = await run_websocket(
+                        session, base_url, markets, fake, args.ws_clients, args.ws_symbols, args.duration
+                    )
+                else:
+                    result = await run_rest(
+                        session, base_url, makers[name], fake, args.concurrency, args.duration, args.seed
+                    )
+                results[name] = result
+                print(
+                    f"{name:>10}: {result['throughput_rps']:>9} {'msg' if name == 'ws' else 'req'}/s  "
+                    f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  errors={result['errors']}  "
+                    f"upstream={result['upstream_calls']}  rss={result['rss_mb']}MB"
+                )
+    finally:
+        server.should_exit = True
+        await task
+    
+    return {
+        "options": {key: value for key, value in vars(args).items() if key not in ("save", "compare", "tolerance")},
+        "scenarios": results,
+        "upstream": {exchange_id: fake.stats() for exchange_id, fake in fakes.items()},
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """List metrics that moved the wrong way by more than tolerance (a fraction) from the baseline"""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        expected = baseline.get("scenarios", {}).get(name)
+        if not expected:
+            continue
+        for metric, (better, min_delta) in CHECKS.items():
+            old, new = expected.get(metric), result.get(metric)
+            if not old or new is None or abs(new - old) <= min_delta:
+                continue
+            change = (new - old) / old
+            if change < -tolerance if better == "higher" else change > tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent REST clients")
+    parser.add_argument("--ws-clients", type=int, default=100)
+    parser.add_argument("--ws-symbols", type=int, default=5, help="Subscriptions per WebSocket client")
+    parser.add_argument("--ws-poll-interval", type=float, default=0.5)
+    parser.add_argument("--markets", type=int, default=500, help="Markets listed by the fake exchange")
+    parser.add_argument("--latency", default="lognormal:0.03:0.5", help="Fake upstream latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-calls-per-second", type=int, default=0, help="Fake 429 threshold (0 = none)")
+    parser.add_argument("--rate-limit-ms", type=int, default=50, help="rateLimit advertised to the scheduler")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS),
+        help=f"Comma-separated subset of {','.join(SCENARIOS)}"
+    )
+    parser.add_argument("--save", help="Write results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="Baseline JSON file to check results against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change per metric")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    
+    results = asyncio.run(run(args))
+    
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.save}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("options") != results["options"]:
+            print("Warning: baseline was recorded with different options")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
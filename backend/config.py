@@ -31,10 +31,105 @@ class Settings(BaseSettings):
     # Cache Configuration
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "60"))
     CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))
+    # Per-namespace policies; stale entries are served for *_STALE_TTL seconds while refreshing
+    CACHE_TICKER_TTL: float = float(os.getenv("CACHE_TICKER_TTL", "5"))
+    CACHE_TICKER_STALE_TTL: float = float(os.getenv("CACHE_TICKER_STALE_TTL", "10"))
+    CACHE_TICKER_MAX_SIZE: int = int(os.getenv("CACHE_TICKER_MAX_SIZE", "5000"))
+    CACHE_HISTORICAL_TTL: float = float(os.getenv("CACHE_HISTORICAL_TTL", "60"))
+    CACHE_HISTORICAL_STALE_TTL: float = float(os.getenv("CACHE_HISTORICAL_STALE_TTL", "300"))
+    CACHE_HISTORICAL_MAX_SIZE: int = int(os.getenv("CACHE_HISTORICAL_MAX_SIZE", "500"))
+    CACHE_MARKETS_TTL: float = float(os.getenv("CACHE_MARKETS_TTL", "3600"))
+    CACHE_MARKETS_STALE_TTL: float = float(os.getenv("CACHE_MARKETS_STALE_TTL", "86400"))
+    CACHE_MARKETS_MAX_SIZE: int = int(os.getenv("CACHE_MARKETS_MAX_SIZE", "50"))
+    # Fraction of the TTL before expiry in which a hit refreshes the entry in the background
+    CACHE_REFRESH_AHEAD: float = float(os.getenv("CACHE_REFRESH_AHEAD", "0.2"))
+    # Cached JSON bodies of at least COMPRESSION_MIN_SIZE bytes are compressed (br/zstd need brotli/zstandard)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_ENCODINGS: List[str] = os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",")
+    COMPRESSION_CACHE_MB: int = int(os.getenv("COMPRESSION_CACHE_MB", "64"))
+    # "memory" (per process) or "sqlite" (shared by every worker opening CACHE_SHARED_PATH)
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_SHARED_PATH: str = os.getenv("CACHE_SHARED_PATH", "cache.db")
+    
+    # Exchange Backend Configuration
+    # "thread" runs sync ccxt in worker threads, "async" uses ccxt.async_support
+    EXCHANGE_BACKEND: str = os.getenv("EXCHANGE_BACKEND", "thread")
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_KEEPALIVE_TIMEOUT: int = int(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+    EXCHANGE_TIMEOUT_MS: int = int(os.getenv("EXCHANGE_TIMEOUT_MS", "30000"))
+    # "live", "record" (journal every upstream response) or "replay" (serve the journal offline)
+    UPSTREAM_MODE: str = os.getenv("UPSTREAM_MODE", "live")
+    UPSTREAM_JOURNAL_PATH: str = os.getenv("UPSTREAM_JOURNAL_PATH", "upstream_journal.db")
+    # Replay clock rate: 1 keeps recorded timing, higher values compress it
+    REPLAY_SPEED: float = float(os.getenv("REPLAY_SPEED", "1"))
+    
+    # Circuit Breaker Configuration (per exchange, over a rolling window of calls)
+    CIRCUIT_BREAKER_ENABLED: bool = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+    CIRCUIT_ERROR_RATE: float = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+    CIRCUIT_SLOW_P95: float = float(os.getenv("CIRCUIT_SLOW_P95", "10"))
+    CIRCUIT_MIN_CALLS: int = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+    CIRCUIT_WINDOW: float = float(os.getenv("CIRCUIT_WINDOW", "60"))
+    CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+    # Resend reads slower than the exchange's p95 latency (never sooner than HEDGE_MIN_DELAY seconds)
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+    
+    # Exchange Startup Configuration
+    ENABLED_EXCHANGES: List[str] = os.getenv(
+        "ENABLED_EXCHANGES",
+        "binance,coinbase,kraken,bitfinex,huobi"
+    ).split(",")
+    MARKETS_SNAPSHOT_PATH: str = os.getenv("MARKETS_SNAPSHOT_PATH", "markets_snapshot.json")
+    MARKETS_REFRESH_INTERVAL: int = int(os.getenv("MARKETS_REFRESH_INTERVAL", "3600"))
+    
+    # Candle Store Configuration (empty path disables the store)
+    CANDLE_STORE_PATH: str = os.getenv("CANDLE_STORE_PATH", "candles.db")
+    # Newest candles kept per exchange, symbol and timeframe (0 = unbounded)
+    CANDLE_STORE_MAX_ROWS: int = int(os.getenv("CANDLE_STORE_MAX_ROWS", "100000"))
+    # Timeframes fetched upstream; coarser timeframes are resampled from them
+    OHLCV_BASE_TIMEFRAMES: List[str] = os.getenv("OHLCV_BASE_TIMEFRAMES", "1m,1h,1d").split(",")
+    
+    # Upstream Scheduler Configuration (replaces ccxt's per-call rate limiting)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    # Burst allowance, in seconds of each exchange's request rate
+    SCHEDULER_BURST_SECONDS: float = float(os.getenv("SCHEDULER_BURST_SECONDS", "1"))
+    # Longest wait for rate-limit tokens before a call is rejected (0 = wait indefinitely)
+    SCHEDULER_INTERACTIVE_DEADLINE: float = float(os.getenv("SCHEDULER_INTERACTIVE_DEADLINE", "5"))
+    SCHEDULER_STREAMING_DEADLINE: float = float(os.getenv("SCHEDULER_STREAMING_DEADLINE", "2"))
+    SCHEDULER_BACKFILL_DEADLINE: float = float(os.getenv("SCHEDULER_BACKFILL_DEADLINE", "0"))
+    
+    # Ticker Streaming Configuration (push feeds written to an in-memory board read by /api/ticker)
+    # Comma-separated exchange:symbol pairs, e.g. "binance:BTC/USDT,kraken:BTC/USD" (empty disables)
+    TICKER_STREAMS: str = os.getenv("TICKER_STREAMS", "")
+    # "ccxtpro" (exchange WebSockets) or "json" (a feed at TICKER_STREAM_URL, {exchange} substituted)
+    TICKER_STREAM_ADAPTER: str = os.getenv("TICKER_STREAM_ADAPTER", "ccxtpro")
+    TICKER_STREAM_URL: str = os.getenv("TICKER_STREAM_URL", "")
+    # Seconds without an update after which a streamed ticker is read from REST again
+    TICKER_STREAM_MAX_AGE: float = float(os.getenv("TICKER_STREAM_MAX_AGE", "10"))
+    TICKER_STREAM_RECONNECT_MAX: float = float(os.getenv("TICKER_STREAM_RECONNECT_MAX", "30"))
+    # Memory-mapped board shared by all uvicorn workers, written by one of them (empty keeps it per process)
+    TICKER_BOARD_PATH: str = os.getenv("TICKER_BOARD_PATH", "")
+    TICKER_BOARD_SLOTS: int = int(os.getenv("TICKER_BOARD_SLOTS", "4096"))
+    
+    # Order Book Configuration
+    # "poll" (REST snapshots diffed into deltas), "ccxtpro" (exchange WebSockets) or "json" (ORDER_BOOK_STREAM_URL)
+    ORDER_BOOK_SOURCE: str = os.getenv("ORDER_BOOK_SOURCE", "poll")
+    ORDER_BOOK_STREAM_URL: str = os.getenv("ORDER_BOOK_STREAM_URL", "")
+    # Books kept streaming without subscribers, as exchange:symbol pairs like TICKER_STREAMS
+    ORDER_BOOK_STREAMS: str = os.getenv("ORDER_BOOK_STREAMS", "")
+    # Levels per side fetched, streamed and sent in snapshots
+    ORDER_BOOK_DEPTH: int = int(os.getenv("ORDER_BOOK_DEPTH", "100"))
+    ORDER_BOOK_POLL_INTERVAL: float = float(os.getenv("ORDER_BOOK_POLL_INTERVAL", "1"))
     
     # WebSocket Configuration
     WS_ENABLED: bool = os.getenv("WS_ENABLED", "true").lower() == "true"
     WS_PORT: int = int(os.getenv("WS_PORT", "8001"))
+    WS_POLL_INTERVAL: float = float(os.getenv("WS_POLL_INTERVAL", "2"))
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    # drop_oldest, latest_per_symbol or disconnect
+    WS_OVERFLOW_POLICY: str = os.getenv("WS_OVERFLOW_POLICY", "latest_per_symbol")
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
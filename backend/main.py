@@ -3,22 +3,72 @@ FastAPI MCP Server for Cryptocurrency Market Data
 Provides real-time and historical cryptocurrency data from major exchanges
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
+import asyncio
+import math
 import uvicorn
 import os
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
 from config import settings
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerPolicy, CircuitOpenError
 from services.crypto_service import CryptocurrencyService
-from services.cache_service import CacheService
+from services.cache_service import CachePolicy, CacheService
+from services.cache_backends import MemoryCacheBackend, SQLiteCacheBackend
 from services.websocket_manager import WebSocketManager
+from services.ticker_board import TickerBoard
+from services.shared_ticker_board import SharedTickerBoard
+from services.ticker_ingestion import CcxtProAdapter, FeedAdapter, JsonFeedAdapter, TickerIngestor, parse_streams
+from services.order_book import OrderBook
+from services.order_book_service import (
+    BookAdapter,
+    CcxtProBookAdapter,
+    JsonBookAdapter,
+    OrderBookService,
+    PollingBookAdapter
+)
+from services.request_coalescer import RequestCoalescer
+from services.response_cache import (
+    JSON_MEDIA_TYPE,
+    EncodedResponse,
+    ResponseCompressor,
+    compose_json,
+    etag_matches
+)
+from services.upstream_scheduler import (
+    BACKFILL,
+    INTERACTIVE,
+    STREAMING,
+    UpstreamBusyError,
+    UpstreamScheduler
+)
+from services.indicator_service import IndicatorService
+from services.indicators import parse_indicators
+from services.metrics import CONTENT_TYPE, Counter, Gauge, Histogram, MetricsMiddleware, MetricsRegistry
+from services.ohlcv_encoding import (
+    BINARY_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    CSV_HEADER,
+    encode_binary,
+    encode_columnar_json,
+    encode_csv,
+    encode_ndjson
+)
 from models.schemas import (
     TickerResponse,
+    TickersResponse,
+    CrossExchangeTickerResponse,
+    OrderBookResponse,
+    OrderBookAggregateResponse,
+    OrderBookDepthResponse,
+    IndicatorsResponse,
+    MarketsResponse,
+    SymbolExchangesResponse,
     HistoricalDataRequest,
     HistoricalDataResponse,
     ExchangeInfoResponse,
@@ -33,9 +83,385 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize services
-crypto_service = CryptocurrencyService()
-cache_service = CacheService(ttl=settings.CACHE_TTL, max_size=settings.CACHE_MAX_SIZE)
-ws_manager = WebSocketManager()
+upstream_scheduler = UpstreamScheduler(
+    burst_seconds=settings.SCHEDULER_BURST_SECONDS,
+    deadlines={
+        INTERACTIVE: settings.SCHEDULER_INTERACTIVE_DEADLINE or None,
+        STREAMING: settings.SCHEDULER_STREAMING_DEADLINE or None,
+        BACKFILL: settings.SCHEDULER_BACKFILL_DEADLINE or None
+    }
+) if settings.SCHEDULER_ENABLED else None
+crypto_service = CryptocurrencyService(
+    backend=settings.EXCHANGE_BACKEND,
+    pool_limit=settings.HTTP_POOL_LIMIT,
+    pool_limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+    dns_cache_ttl=settings.HTTP_DNS_CACHE_TTL,
+    keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+    exchange_ids=settings.ENABLED_EXCHANGES,
+    snapshot_path=settings.MARKETS_SNAPSHOT_PATH,
+    markets_refresh_interval=settings.MARKETS_REFRESH_INTERVAL,
+    candle_store_path=settings.CANDLE_STORE_PATH,
+    candle_store_max_rows=settings.CANDLE_STORE_MAX_ROWS,
+    base_timeframes=settings.OHLCV_BASE_TIMEFRAMES,
+    scheduler=upstream_scheduler,
+    request_timeout=settings.EXCHANGE_TIMEOUT_MS,
+    breaker_policy=BreakerPolicy(
+        error_rate=settings.CIRCUIT_ERROR_RATE,
+        slow_p95=settings.CIRCUIT_SLOW_P95,
+        min_calls=settings.CIRCUIT_MIN_CALLS,
+        window=settings.CIRCUIT_WINDOW,
+        open_seconds=settings.CIRCUIT_OPEN_SECONDS
+    ) if settings.CIRCUIT_BREAKER_ENABLED else None,
+    hedge_min_delay=settings.HEDGE_MIN_DELAY if settings.HEDGE_ENABLED else None,
+    upstream_mode=settings.UPSTREAM_MODE,
+    journal_path=settings.UPSTREAM_JOURNAL_PATH,
+    replay_speed=settings.REPLAY_SPEED
+)
+ticker_cache_policy = CachePolicy(
+    ttl=settings.CACHE_TICKER_TTL,
+    max_size=settings.CACHE_TICKER_MAX_SIZE,
+    stale_ttl=settings.CACHE_TICKER_STALE_TTL,
+    refresh_ahead=settings.CACHE_REFRESH_AHEAD
+)
+historical_cache_policy = CachePolicy(
+    ttl=settings.CACHE_HISTORICAL_TTL,
+    max_size=settings.CACHE_HISTORICAL_MAX_SIZE,
+    stale_ttl=settings.CACHE_HISTORICAL_STALE_TTL,
+    refresh_ahead=settings.CACHE_REFRESH_AHEAD
+)
+if settings.CACHE_BACKEND == "sqlite":
+    cache_backend = SQLiteCacheBackend(settings.CACHE_SHARED_PATH)
+elif settings.CACHE_BACKEND == "memory":
+    cache_backend = MemoryCacheBackend()
+else:
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+cache_service = CacheService(
+    ttl=settings.CACHE_TTL,
+    max_size=settings.CACHE_MAX_SIZE,
+    backend=cache_backend,
+    policies={
+        "ticker": ticker_cache_policy,
+        "tickers": ticker_cache_policy,
+        "historical": historical_cache_policy,
+        "orderbook": ticker_cache_policy,
+        "ohlcv": historical_cache_policy,
+        "markets": CachePolicy(
+            ttl=settings.CACHE_MARKETS_TTL,
+            max_size=settings.CACHE_MARKETS_MAX_SIZE,
+            stale_ttl=settings.CACHE_MARKETS_STALE_TTL,
+            refresh_ahead=settings.CACHE_REFRESH_AHEAD
+        )
+    }
+)
+request_coalescer = RequestCoalescer()
+response_compressor = ResponseCompressor(
+    min_size=settings.COMPRESSION_MIN_SIZE,
+    max_bytes=settings.COMPRESSION_CACHE_MB * 1024 * 1024,
+    encodings=settings.COMPRESSION_ENCODINGS
+)
+not_modified_responses = 0
+indicator_service = IndicatorService(crypto_service)
+if settings.TICKER_BOARD_PATH:
+    ticker_board = SharedTickerBoard(
+        settings.TICKER_BOARD_PATH,
+        slots=settings.TICKER_BOARD_SLOTS,
+        model=TickerResponse,
+        max_age=settings.TICKER_STREAM_MAX_AGE
+    )
+else:
+    ticker_board = TickerBoard(TickerResponse, max_age=settings.TICKER_STREAM_MAX_AGE)
+
+
+def ticker_feed_adapter(exchange_id: str) -> FeedAdapter:
+    """Build the configured push-feed adapter for an exchange"""
+    if settings.TICKER_STREAM_ADAPTER == "json":
+        return JsonFeedAdapter(settings.TICKER_STREAM_URL.format(exchange=exchange_id), exchange_id)
+    return CcxtProAdapter(exchange_id, {'enableRateLimit': True, 'timeout': settings.EXCHANGE_TIMEOUT_MS})
+
+
+ticker_streams = parse_streams(settings.TICKER_STREAMS)
+if settings.TICKER_STREAM_ADAPTER not in ("ccxtpro", "json"):
+    raise ValueError(f"Unknown ticker stream adapter: {settings.TICKER_STREAM_ADAPTER}")
+ticker_ingestor = TickerIngestor(
+    crypto_service,
+    ticker_board,
+    ticker_streams,
+    ticker_feed_adapter,
+    reconnect_max=settings.TICKER_STREAM_RECONNECT_MAX
+) if ticker_streams else None
+
+
+def order_book_adapter(exchange_id: str) -> BookAdapter:
+    """Build the configured order book feed adapter for an exchange"""
+    if settings.ORDER_BOOK_SOURCE == "json":
+        return JsonBookAdapter(
+            settings.ORDER_BOOK_STREAM_URL.format(exchange=exchange_id), exchange_id, settings.ORDER_BOOK_DEPTH
+        )
+    if settings.ORDER_BOOK_SOURCE == "ccxtpro":
+        return CcxtProBookAdapter(
+            exchange_id, settings.ORDER_BOOK_DEPTH, {'enableRateLimit': True, 'timeout': settings.EXCHANGE_TIMEOUT_MS}
+        )
+    return PollingBookAdapter(crypto_service, exchange_id, settings.ORDER_BOOK_DEPTH, settings.ORDER_BOOK_POLL_INTERVAL)
+
+
+if settings.ORDER_BOOK_SOURCE not in ("poll", "ccxtpro", "json"):
+    raise ValueError(f"Unknown order book source: {settings.ORDER_BOOK_SOURCE}")
+order_book_streams = parse_streams(settings.ORDER_BOOK_STREAMS)
+order_book_service = OrderBookService(
+    crypto_service,
+    order_book_adapter,
+    depth=settings.ORDER_BOOK_DEPTH,
+    reconnect_max=settings.TICKER_STREAM_RECONNECT_MAX
+)
+
+
+def encoded_json(encoded: EncodedResponse, request: Request) -> Response:
+    """
+    Serve a cached response body as is, skipping response model validation
+    
+    GET requests whose If-None-Match holds the body's ETag get an empty 304.
+    Bodies above the size threshold are sent in the client's preferred
+    coding, compressed once per ETag; their ETag carries the coding as a suffix.
+    """
+    global not_modified_responses
+    headers = {"ETag": encoded.etag, "Vary": "Accept-Encoding"}
+    if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), encoded.etag):
+        not_modified_responses += 1
+        return Response(status_code=304, headers=headers)
+    
+    body = encoded.body
+    if len(body) >= response_compressor.min_size:
+        encoding = response_compressor.negotiate(request.headers.get("accept-encoding"))
+        if encoding:
+            body = response_compressor.compress(encoded, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = f'{encoded.etag[:-1]}-{encoding}"'
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def tickers_json(exchange: str, tickers: List[EncodedResponse], request: Request) -> Response:
+    """
+    Assemble a batch ticker response from per-symbol cached bodies without re-encoding them
+    
+    The composed body is served like any cached one, with an ETag and compression.
+    """
+    body = compose_json({"exchange": exchange}, "tickers", tickers)
+    return encoded_json(EncodedResponse.from_body(None, body), request)
+
+
+async def load_ticker(exchange: str, symbol: str, priority: int = INTERACTIVE) -> Optional[EncodedResponse]:
+    """Fetch a ticker upstream and encode it for the cache"""
+    ticker = await crypto_service.get_ticker(exchange, symbol, priority)
+    return EncodedResponse(ticker, TickerResponse) if ticker else None
+
+
+async def refresh_ticker(exchange: str, symbol: str) -> Optional[Dict[str, Any]]:
+    """Fetch a streamed ticker upstream, sharing in-flight calls, and store it in the cache"""
+    pushed = ticker_board.get(exchange, symbol)
+    if pushed is not None:
+        return pushed
+    cached = await cache_service.load(
+        f"ticker:{exchange}:{symbol}",
+        lambda: load_ticker(exchange, symbol, STREAMING)
+    )
+    return cached.value if cached else None
+
+
+async def get_cached_ticker_response(exchange: str, symbol: str) -> Optional[EncodedResponse]:
+    """Get an encoded ticker from the streamed board, else the cache, serving stale entries while they refresh"""
+    streamed = ticker_board.get_encoded(exchange, symbol)
+    if streamed is not None:
+        return streamed
+    return await cache_service.get_or_load(
+        f"ticker:{exchange}:{symbol}",
+        lambda: load_ticker(exchange, symbol)
+    )
+
+
+async def get_cached_ticker(exchange: str, symbol: str) -> Optional[Dict[str, Any]]:
+    """Get a ticker from the cache, serving stale entries while they refresh"""
+    cached = await get_cached_ticker_response(exchange, symbol)
+    return cached.value if cached else None
+
+
+ws_manager = WebSocketManager(
+    fetch_ticker=refresh_ticker,
+    poll_interval=settings.WS_POLL_INTERVAL,
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    overflow_policy=settings.WS_OVERFLOW_POLICY,
+    order_books=order_book_service
+)
+
+
+
+def http_error(e: Exception) -> HTTPException:
+    """Map a service error to an HTTP error, asking clients to retry when an exchange is saturated or down"""
+    if isinstance(e, (UpstreamBusyError, CircuitOpenError)):
+        return HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        )
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def scheduler_queue_depth() -> Dict[tuple, float]:
+    """Read queued calls per exchange and priority from the scheduler at scrape time"""
+    if upstream_scheduler is None:
+        return {}
+    return {
+        (exchange_id, priority): depth
+        for exchange_id, stats in upstream_scheduler.stats().items()
+        for priority, depth in stats["queued"].items()
+    }
+
+
+def default_executor_stats() -> Dict[str, int]:
+    """Get worker and queued-call counts of the loop's default thread pool (used by to_thread)"""
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    if executor is None:
+        return {"workers": 0, "queued": 0}
+    return {"workers": len(executor._threads), "queued": executor._work_queue.qsize()}
+
+
+def cache_counter(field: str):
+    """Read one per-namespace counter from the cache statistics at scrape time"""
+    return lambda: {(namespace,): stats[field] for namespace, stats in cache_service.stats().items()}
+
+
+def coalescer_stats() -> Dict[str, Dict[str, Any]]:
+    """Get fetches and callers served by the endpoint and cache loader coalescers"""
+    return {"requests": request_coalescer.stats(), "cache_loader": cache_service.loader_stats()}
+
+
+metrics_registry = MetricsRegistry()
+request_latency = metrics_registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+encode_latency = metrics_registry.register(Histogram(
+    "response_encode_duration_seconds", "Time spent encoding compact OHLCV responses", ("format",)
+))
+metrics_registry.register(crypto_service.upstream_latency)
+metrics_registry.register(crypto_service.upstream_errors)
+metrics_registry.register(crypto_service.hedged_requests)
+metrics_registry.register(Gauge(
+    "crypto_circuit_state", "Exchange circuit breaker state (0 closed, 1 half-open, 2 open)", ("exchange",),
+    function=lambda: {
+        (exchange_id,): {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[breaker.state]
+        for exchange_id, breaker in crypto_service.breakers.items()
+    }
+))
+metrics_registry.register(Gauge(
+    "crypto_upstream_thread_calls_in_flight", "Blocking exchange calls running or queued in worker threads",
+    function=lambda: {(): crypto_service.thread_calls_in_flight}
+))
+if upstream_scheduler is not None:
+    metrics_registry.register(upstream_scheduler.wait_time)
+    metrics_registry.register(upstream_scheduler.rejections)
+metrics_registry.register(Gauge(
+    "upstream_scheduler_queue_depth", "Exchange calls waiting for rate-limit tokens",
+    ("exchange", "priority"), function=scheduler_queue_depth
+))
+metrics_registry.register(Gauge(
+    "thread_pool_workers", "Threads in the default executor",
+    function=lambda: {(): default_executor_stats()["workers"]}
+))
+metrics_registry.register(Gauge(
+    "thread_pool_queue_depth", "Calls waiting for a thread in the default executor",
+    function=lambda: {(): default_executor_stats()["queued"]}
+))
+for field, documentation in (
+    ("hits", "Fresh cache hits"),
+    ("stale_hits", "Expired entries served while refreshing"),
+    ("misses", "Cache misses"),
+    ("evictions", "Entries evicted to stay within the size limit"),
+    ("refreshes", "Background refreshes started"),
+    ("refresh_errors", "Background refreshes that failed")
+):
+    metrics_registry.register(Counter(
+        f"cache_{field}_total", documentation, ("namespace",), function=cache_counter(field)
+    ))
+for field, documentation in (
+    ("fetches", "Upstream fetches started by a request coalescer"),
+    ("callers_served", "Callers answered by coalesced upstream fetches")
+):
+    metrics_registry.register(Counter(
+        f"request_coalescer_{field}_total", documentation, ("coalescer",),
+        function=lambda field=field: {
+            (name,): stats[field] for name, stats in coalescer_stats().items()
+        }
+    ))
+metrics_registry.register(Gauge(
+    "cache_entries", "Entries held per namespace", ("namespace",), function=cache_counter("size")
+))
+for field, documentation in (
+    ("compressions", "Response bodies compressed"),
+    ("variant_hits", "Responses served from a cached compressed variant"),
+    ("bytes_in", "Uncompressed bytes of compressed response bodies"),
+    ("bytes_out", "Compressed bytes of compressed response bodies")
+):
+    metrics_registry.register(Counter(
+        f"response_compression_{field}_total", documentation,
+        function=lambda field=field: {(): response_compressor.stats_counters[field]}
+    ))
+metrics_registry.register(Counter(
+    "response_not_modified_total", "Conditional requests answered with 304 Not Modified",
+    function=lambda: {(): not_modified_responses}
+))
+for field, documentation in (
+    ("updates", "Ticker updates written to the board from push feeds"),
+    ("gaps", "Push-feed sequence gaps (skipped updates)"),
+    ("connects", "Push-feed connections established")
+):
+    metrics_registry.register(Counter(
+        f"ticker_stream_{field}_total", documentation, ("exchange",),
+        function=lambda field=field: {
+            (exchange_id,): feed[field]
+            for exchange_id, feed in (ticker_ingestor.stats() if ticker_ingestor else {}).items()
+        }
+    ))
+for field, documentation in (
+    ("updates", "Order book snapshots and deltas applied"),
+    ("resyncs", "Order books resynced after a sequence gap or checksum mismatch"),
+    ("errors", "Order book feed failures")
+):
+    metrics_registry.register(Counter(
+        f"order_book_{field}_total", documentation, ("exchange",),
+        function=lambda field=field: {
+            (exchange_id,): counters[field] for exchange_id, counters in order_book_service.counters.items()
+        }
+    ))
+metrics_registry.register(Gauge(
+    "order_books", "Order books being streamed", function=lambda: {(): len(order_book_service.books)}
+))
+metrics_registry.register(Gauge(
+    "ticker_board_entries", "Streamed tickers held on the board",
+    function=lambda: {(): ticker_board.stats()["entries"]}
+))
+metrics_registry.register(Gauge(
+    "websocket_connections", "Connected WebSocket clients",
+    function=lambda: {(): len(ws_manager.active_connections)}
+))
+metrics_registry.register(Gauge(
+    "websocket_subscriptions", "Ticker subscriptions across all clients",
+    function=lambda: {(): sum(len(c.subscriptions) for c in ws_manager.active_connections.values())}
+))
+metrics_registry.register(Gauge(
+    "websocket_pollers", "Upstream ticker pollers shared by subscribers",
+    function=lambda: {(): len(ws_manager.fanout.pollers) if ws_manager.fanout else 0}
+))
+metrics_registry.register(Gauge(
+    "websocket_queued_messages", "Messages waiting in client send queues",
+    function=lambda: {(): sum(len(c.queue) for c in ws_manager.active_connections.values())}
+))
+metrics_registry.register(Gauge(
+    "websocket_send_lag_seconds", "Age of the oldest queued message across clients",
+    function=lambda: {(): max((c.lag() for c in ws_manager.active_connections.values()), default=0.0)}
+))
+metrics_registry.register(Counter(
+    "websocket_dropped_clients_total", "Clients disconnected for falling too far behind",
+    function=lambda: {(): ws_manager.dropped_clients}
+))
 
 
 @asynccontextmanager
@@ -43,10 +469,25 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown"""
     logger.info("Starting Crypto MCP Server...")
     await crypto_service.initialize()
+    if ticker_ingestor is not None:
+        ticker_ingestor.start()
+    for exchange_id, symbols in order_book_streams.items():
+        for symbol in symbols:
+            await order_book_service.pin(exchange_id, symbol)
     logger.info("Server started successfully")
     yield
     logger.info("Shutting down Crypto MCP Server...")
+    if ticker_ingestor is not None:
+        await ticker_ingestor.stop()
+    await order_book_service.stop()
+    await ws_manager.shutdown()
+    if isinstance(ticker_board, SharedTickerBoard):
+        # After its writer and the WebSocket pollers reading it have stopped
+        ticker_board.close()
+    await cache_service.shutdown()
     await crypto_service.cleanup()
+    if upstream_scheduler is not None:
+        await upstream_scheduler.stop()
     logger.info("Server shut down")
 
 
@@ -66,6 +507,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, histogram=request_latency)
 
 
 @app.get("/health", tags=["Health"])
@@ -86,10 +528,24 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "exchanges": "/api/exchanges",
             "ticker": "/api/ticker/{exchange}/{symbol}",
+            "tickers": "/api/tickers/{exchange}?symbols=BTC/USDT,ETH/USDT",
+            "orderbook": "/api/orderbook/{exchange}/{symbol}?depth=20",
+            "orderbook_aggregated": "/api/orderbook/{exchange}/{symbol}/aggregated?step=10",
+            "orderbook_depth": "/api/orderbook/{exchange}/{symbol}/depth?levels=50",
+            "snapshot": "/api/snapshot?symbol=BTC/USDT&deadline=2",
             "historical": "/api/historical",
-            "websocket": "/ws"
+            "historical_export": "/api/historical/export",
+            "indicators": "/api/indicators/{exchange}?symbol=BTC/USDT&indicators=sma:20,rsi:14",
+            "markets": "/api/markets/{exchange}?q=eth&type=spot&limit=100",
+            "symbols": "/api/symbols?symbol=ETH/USDC",
+            "cache_stats": "/api/cache/stats",
+            "scheduler_stats": "/api/scheduler/stats",
+            "stream_stats": "/api/streams/stats",
+            "websocket": "/ws",
+            "websocket_stats": "/api/ws/stats"
         }
     }
 
@@ -106,92 +562,447 @@ async def get_exchanges():
 
 
 @app.get("/api/ticker/{exchange}/{symbol}", response_model=TickerResponse, tags=["Market Data"])
-async def get_ticker(exchange: str, symbol: str):
+async def get_ticker(exchange: str, symbol: str, request: Request):
     """Get real-time ticker data for a symbol on a specific exchange"""
-    cache_key = f"ticker:{exchange}:{symbol}"
-    
-    # Check cache
-    cached_data = cache_service.get(cache_key)
-    if cached_data:
-        return TickerResponse(**cached_data)
-    
     try:
-        ticker = await crypto_service.get_ticker(exchange, symbol)
+        ticker = await get_cached_ticker_response(exchange, symbol)
         if not ticker:
             raise HTTPException(status_code=404, detail=f"Ticker not found for {symbol} on {exchange}")
         
-        response = TickerResponse(**ticker)
+        return encoded_json(ticker, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching ticker: {str(e)}")
+        raise http_error(e)
+
+
+@app.get("/api/tickers/{exchange}", response_model=TickersResponse, tags=["Market Data"])
+async def get_tickers(
+    request: Request,
+    exchange: str,
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (all symbols if omitted)")
+):
+    """Get ticker data for many symbols on an exchange in one request"""
+    requested = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else []
+    
+    if requested:
+        # Serve what the per-symbol cache already has and fetch only the rest
+        tickers = {
+            symbol: ticker_board.get_encoded(exchange, symbol) or cache_service.get(f"ticker:{exchange}:{symbol}")
+            for symbol in requested
+        }
+        missing = [symbol for symbol, ticker in tickers.items() if not ticker]
+        if not missing:
+            return tickers_json(exchange, list(tickers.values()), request)
+        batch_key = f"tickers:{exchange}:{','.join(sorted(missing))}"
+    else:
+        cached_data = cache_service.get(f"tickers:{exchange}")
+        if cached_data:
+            return encoded_json(cached_data, request)
+        tickers, missing = {}, None
+        batch_key = f"tickers:{exchange}"
+    
+    try:
+        fetched = await request_coalescer.run(
+            batch_key,
+            lambda: crypto_service.get_tickers(exchange, missing)
+        )
         
-        # Cache the response
-        cache_service.set(cache_key, ticker)
+        # Fill the per-symbol entries so later single-ticker requests hit the cache
+        for ticker in fetched:
+            encoded = EncodedResponse(ticker, TickerResponse)
+            cache_service.set(f"ticker:{exchange}:{ticker['symbol']}", encoded)
+            tickers[ticker['symbol']] = encoded
+        if not requested:
+            encoded = EncodedResponse({"exchange": exchange, "tickers": fetched}, TickersResponse)
+            cache_service.set(batch_key, encoded)
+            return encoded_json(encoded, request)
         
-        return response
+        return tickers_json(exchange, [ticker for ticker in tickers.values() if ticker], request)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching ticker: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Error fetching tickers: {str(e)}")
+        raise http_error(e)
 
 
-@app.post("/api/historical", response_model=HistoricalDataResponse, tags=["Market Data"])
-async def get_historical_data(request: HistoricalDataRequest):
-    """Get historical OHLCV data for a symbol"""
-    cache_key = f"historical:{request.exchange}:{request.symbol}:{request.timeframe}:{request.limit}"
+async def get_order_book(exchange: str, symbol: str) -> Tuple[OrderBook, bool]:
+    """
+    Get a pair's book: the live one if it is streamed, else one built from a
+    REST snapshot cached like tickers
+    
+    Returns:
+        (book, whether it is streamed)
+    """
+    book = order_book_service.get(exchange, symbol)
+    if book is not None:
+        return book, True
+    
+    snapshot = await cache_service.get_or_load(
+        f"orderbook:{exchange}:{symbol}",
+        lambda: crypto_service.get_order_book(exchange, symbol, settings.ORDER_BOOK_DEPTH)
+    )
+    if not snapshot:
+        raise HTTPException(status_code=404, detail=f"Order book not found for {symbol} on {exchange}")
+    return OrderBook.from_snapshot(exchange, symbol, snapshot), False
+
+
+@app.get("/api/orderbook/{exchange}/{symbol}", response_model=OrderBookResponse, tags=["Market Data"])
+async def get_order_book_levels(
+    exchange: str,
+    symbol: str,
+    depth: int = Query(20, ge=1, le=1000, description="Levels per side")
+):
+    """Get the best levels of a symbol's L2 order book"""
+    try:
+        book, streamed = await get_order_book(exchange, symbol)
+        return dict(book.snapshot(depth), symbol=symbol, streamed=streamed)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching order book: {str(e)}")
+        raise http_error(e)
+
+
+@app.get(
+    "/api/orderbook/{exchange}/{symbol}/aggregated",
+    response_model=OrderBookAggregateResponse,
+    tags=["Market Data"]
+)
+async def get_order_book_aggregated(
+    exchange: str,
+    symbol: str,
+    step: float = Query(..., gt=0, description="Price bucket width"),
+    levels: int = Query(20, ge=1, le=500, description="Buckets per side")
+):
+    """Get order book sizes summed into price buckets (bids rounded down, asks up)"""
+    try:
+        book, streamed = await get_order_book(exchange, symbol)
+        return dict(
+            book.snapshot(0),
+            symbol=symbol,
+            streamed=streamed,
+            step=step,
+            bids=book.bids.buckets(step, levels),
+            asks=book.asks.buckets(step, levels)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error aggregating order book: {str(e)}")
+        raise http_error(e)
+
+
+@app.get("/api/orderbook/{exchange}/{symbol}/depth", response_model=OrderBookDepthResponse, tags=["Market Data"])
+async def get_order_book_depth(
+    exchange: str,
+    symbol: str,
+    levels: int = Query(50, ge=1, le=1000, description="Levels per side")
+):
+    """Get cumulative order book depth: [price, size, cumulative size, cumulative notional] per level"""
+    try:
+        book, streamed = await get_order_book(exchange, symbol)
+        return dict(
+            book.snapshot(0),
+            symbol=symbol,
+            streamed=streamed,
+            bids=book.bids.cumulative(levels),
+            asks=book.asks.cumulative(levels)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching order book depth: {str(e)}")
+        raise http_error(e)
+
+
+@app.get("/api/snapshot", response_model=CrossExchangeTickerResponse, tags=["Market Data"])
+async def get_cross_exchange_snapshot(
+    symbol: str = Query(..., description="Trading pair (e.g., 'BTC/USDT')"),
+    deadline: float = Query(2.0, gt=0, le=30, description="Seconds to wait before returning partial results"),
+    exchanges: Optional[str] = Query(None, description="Comma-separated exchanges (all if omitted)")
+):
+    """Compare one symbol across exchanges with best bid/ask and spread"""
+    exchange_ids = [e.strip() for e in exchanges.split(",") if e.strip()] if exchanges else None
     
-    # Check cache
-    cached_data = cache_service.get(cache_key)
-    if cached_data:
-        return HistoricalDataResponse(**cached_data)
+    try:
+        snapshot = await crypto_service.get_cross_exchange_ticker(
+            symbol,
+            deadline=deadline,
+            exchange_ids=exchange_ids,
+            fetch_ticker=get_cached_ticker
+        )
+        return CrossExchangeTickerResponse(**snapshot)
+    except Exception as e:
+        logger.error(f"Error building cross-exchange snapshot: {str(e)}")
+        raise http_error(e)
+
+
+async def get_historical_columnar(request: HistoricalDataRequest, media_type: str) -> Response:
+    """Serve historical data as columnar JSON or packed binary, skipping per-row models"""
+    cache_key = (
+        f"ohlcv:{request.exchange}:{request.symbol}:{request.timeframe}:{request.limit}:{request.since}"
+    )
     
     try:
+        candles = await cache_service.get_or_load(
+            cache_key,
+            lambda: crypto_service.get_ohlcv(
+                request.exchange,
+                request.symbol,
+                request.timeframe,
+                request.limit,
+                request.since
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error fetching historical data: {str(e)}")
+        raise http_error(e)
+    
+    if not candles:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Historical data not found for {request.symbol} on {request.exchange}"
+        )
+    
+    meta = {"exchange": request.exchange, "symbol": request.symbol, "timeframe": request.timeframe}
+    if media_type == BINARY_MEDIA_TYPE:
+        headers = {f"X-OHLCV-{key.capitalize()}": value for key, value in meta.items()}
+        with encode_latency.time("binary"):
+            content = encode_binary(candles)
+        return Response(content=content, media_type=media_type, headers=headers)
+    with encode_latency.time("columnar_json"):
+        content = encode_columnar_json(candles, meta)
+    return Response(content=content, media_type=media_type)
+
+
+async def serve_historical_data(
+    request: HistoricalDataRequest,
+    accept: Optional[str],
+    http_request: Request
+) -> Response:
+    """Serve historical data in the negotiated format from the cache"""
+    if accept:
+        for media_type in (BINARY_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE):
+            if media_type in accept:
+                return await get_historical_columnar(request, media_type)
+    
+    cache_key = (
+        f"historical:{request.exchange}:{request.symbol}:{request.timeframe}:{request.limit}:{request.since}"
+    )
+    
+    async def load():
         data = await crypto_service.get_historical_data(
-            exchange=request.exchange,
+            exchange_id=request.exchange,
             symbol=request.symbol,
             timeframe=request.timeframe,
             limit=request.limit,
             since=request.since
         )
-        
         if not data:
+            return None
+        return EncodedResponse(
+            {"exchange": request.exchange, "symbol": request.symbol, "timeframe": request.timeframe, "data": data},
+            HistoricalDataResponse
+        )
+    
+    try:
+        cached_data = await cache_service.get_or_load(cache_key, load)
+        if not cached_data:
             raise HTTPException(
                 status_code=404,
                 detail=f"Historical data not found for {request.symbol} on {request.exchange}"
             )
         
-        response = HistoricalDataResponse(
-            exchange=request.exchange,
-            symbol=request.symbol,
-            timeframe=request.timeframe,
-            data=data
-        )
-        
-        # Cache the response
-        cache_service.set(cache_key, response.dict())
-        
-        return response
+        return encoded_json(cached_data, http_request)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching historical data: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+
+@app.post("/api/historical", response_model=HistoricalDataResponse, tags=["Market Data"])
+async def get_historical_data(
+    request: HistoricalDataRequest,
+    http_request: Request,
+    accept: Optional[str] = Header(None)
+):
+    """
+    Get historical OHLCV data for a symbol
+    
+    Send Accept: application/vnd.ohlcv.columnar+json for parallel arrays, or
+    Accept: application/vnd.ohlcv.binary for packed little-endian int64/float64 columns.
+    """
+    return await serve_historical_data(request, accept, http_request)
+
+
+@app.get("/api/historical", response_model=HistoricalDataResponse, tags=["Market Data"])
+async def get_historical_data_conditional(
+    http_request: Request,
+    exchange: str = Query(..., description="Exchange name (e.g., 'binance')"),
+    symbol: str = Query(..., description="Trading pair (e.g., 'BTC/USDT')"),
+    timeframe: str = Query("1h", description="Timeframe (1m, 5m, 1h, 1d, etc.)"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of candles"),
+    since: Optional[datetime] = Query(None, description="Start timestamp"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Get historical OHLCV data for a symbol with query parameters
+    
+    Same as the POST form, and as a GET it honors If-None-Match with 304 Not Modified.
+    """
+    request = HistoricalDataRequest(exchange=exchange, symbol=symbol, timeframe=timeframe, limit=limit, since=since)
+    return await serve_historical_data(request, accept, http_request)
 
 
-@app.get("/api/markets/{exchange}", tags=["Market Data"])
-async def get_markets(exchange: str):
-    """Get all available markets for an exchange"""
-    cache_key = f"markets:{exchange}"
+@app.get("/api/historical/export", tags=["Market Data"])
+async def export_historical_data(
+    exchange: str = Query(..., description="Exchange name (e.g., 'binance')"),
+    symbol: str = Query(..., description="Trading pair (e.g., 'BTC/USDT')"),
+    start: datetime = Query(..., description="Start timestamp"),
+    end: Optional[datetime] = Query(None, description="End timestamp (defaults to now)"),
+    timeframe: str = Query("1m", description="Timeframe (1m, 5m, 1h, 1d, etc.)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    cursor: Optional[int] = Query(None, description="Timestamp (ms) of the last candle received; resumes after it")
+):
+    """Stream OHLCV candles for an arbitrarily long range, paging through the exchange"""
+    start_ms = int(start.timestamp() * 1000)
+    if cursor is not None:
+        start_ms = max(start_ms, cursor + 1)
+    end_ms = int(end.timestamp() * 1000) if end else None
     
-    cached_data = cache_service.get(cache_key)
-    if cached_data:
-        return cached_data
+    pages = crypto_service.iter_ohlcv(exchange, symbol, timeframe, start_ms, end_ms)
     
+    # Fetch the first page up front so bad parameters still produce an error status
     try:
-        markets = await crypto_service.get_markets(exchange)
-        cache_service.set(cache_key, markets)
-        return {"exchange": exchange, "markets": markets}
+        first_page = await pages.__anext__()
+    except StopAsyncIteration:
+        first_page = []
+    except Exception as e:
+        logger.error(f"Error exporting historical data: {str(e)}")
+        raise http_error(e)
+    
+    encode = encode_csv if format == "csv" else encode_ndjson
+    
+    async def body():
+        if format == "csv" and cursor is None:
+            yield CSV_HEADER.encode()
+        if first_page:
+            with encode_latency.time(format):
+                content = encode(first_page)
+            yield content
+        try:
+            async for page in pages:
+                with encode_latency.time(format):
+                    content = encode(page)
+                yield content
+        except Exception as e:
+            # Headers are already sent; the client resumes with the last timestamp as cursor
+            logger.error(f"Historical export for {symbol} on {exchange} interrupted: {str(e)}")
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type)
+
+
+@app.get("/api/indicators/{exchange}", response_model=IndicatorsResponse, tags=["Market Data"])
+async def get_indicators(
+    exchange: str,
+    symbol: str = Query(..., description="Trading pair (e.g., 'BTC/USDT')"),
+    timeframe: str = Query("1h", description="Timeframe (1m, 5m, 1h, 1d, etc.)"),
+    indicators: str = Query(
+        "sma:20,ema:20,rsi:14,bbands:20:2,vwap",
+        description="Comma-separated indicators: sma:N, ema:N, rsi:N, bbands:N:K, vwap"
+    ),
+    limit: int = Query(200, ge=1, le=1000, description="Number of points")
+):
+    """Get technical indicators computed server-side and updated as candles close"""
+    try:
+        requested = parse_indicators(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    names = ",".join(indicator.name for indicator in requested)
+    try:
+        result = await request_coalescer.run(
+            f"indicators:{exchange}:{symbol}:{timeframe}:{names}:{limit}",
+            lambda: indicator_service.get_indicators(exchange, symbol, timeframe, requested, limit)
+        )
+        return IndicatorsResponse(**result)
+    except Exception as e:
+        logger.error(f"Error computing indicators: {str(e)}")
+        raise http_error(e)
+
+
+@app.get("/api/markets/{exchange}", response_model=MarketsResponse, tags=["Market Data"])
+async def get_markets(
+    request: Request,
+    exchange: str,
+    q: Optional[str] = Query(None, description="Text matched against symbol, base and quote"),
+    match: str = Query("substring", pattern="^(prefix|substring)$", description="prefix or substring"),
+    type: Optional[str] = Query(None, description="Market type (spot, swap, future, option)"),
+    base: Optional[str] = Query(None, description="Base currency (e.g., 'ETH')"),
+    quote: Optional[str] = Query(None, description="Quote currency (e.g., 'USDC')"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Markets per page")
+):
+    """Search an exchange's markets, one page at a time"""
+    async def load():
+        return EncodedResponse(
+            await crypto_service.search_markets(exchange, q, match, type, base, quote, cursor, limit),
+            MarketsResponse
+        )
+    
+    try:
+        return encoded_json(await cache_service.get_or_load(
+            f"markets:{exchange}:{q}:{match}:{type}:{base}:{quote}:{cursor}:{limit}", load
+        ), request)
     except Exception as e:
         logger.error(f"Error fetching markets: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise http_error(e)
+
+
+@app.get("/api/symbols", response_model=SymbolExchangesResponse, tags=["Market Data"])
+async def get_symbol_exchanges(symbol: str = Query(..., description="Trading pair (e.g., 'ETH/USDC')")):
+    """Get the exchanges listing a symbol, from their loaded markets"""
+    return SymbolExchangesResponse(symbol=symbol, exchanges=crypto_service.exchanges_for_symbol(symbol))
+
+
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/cache/stats", tags=["Cache"])
+async def get_cache_stats():
+    """Get cache counters per namespace and callers served per upstream fetch by each coalescer"""
+    return dict(cache_service.stats(), coalescing=coalescer_stats())
+
+
+@app.get("/api/scheduler/stats", tags=["Health"])
+async def get_scheduler_stats():
+    """Get rate-limit bucket level, queue depth per priority and rejections per exchange"""
+    if upstream_scheduler is None:
+        return {}
+    return upstream_scheduler.stats()
+
+
+@app.get("/api/streams/stats", tags=["Health"])
+async def get_stream_stats():
+    """Get push-feed state and counters per exchange and ticker board hit rates"""
+    return {
+        "feeds": ticker_ingestor.stats() if ticker_ingestor is not None else {},
+        "board": ticker_board.stats(),
+        "order_books": order_book_service.stats()
+    }
+
+
+@app.get("/api/ws/stats", tags=["WebSocket"])
+async def get_websocket_stats(top: int = 20):
+    """Get WebSocket send queue, lag and drop statistics"""
+    return ws_manager.stats(top=top)
 
 
 @app.websocket("/ws")
@@ -19,6 +19,73 @@ class TickerResponse(BaseModel):
     volume: Optional[float] = None
     timestamp: datetime
     datetime: str
+    stale: bool = Field(False, description="Last known value, served while the exchange's circuit is open")
+
+
+class TickersResponse(BaseModel):
+    """Batch ticker data response"""
+    exchange: str
+    tickers: List[TickerResponse]
+
+
+class BestQuote(BaseModel):
+    """Best price and the exchange quoting it"""
+    exchange: str
+    price: float
+
+
+class ExchangeTickerResult(BaseModel):
+    """Per-exchange outcome within a cross-exchange snapshot"""
+    exchange: str
+    status: str = Field(..., description="ok, timeout, error or unsupported")
+    latency_ms: Optional[float] = None
+    ticker: Optional[TickerResponse] = None
+    error: Optional[str] = None
+
+
+class CrossExchangeTickerResponse(BaseModel):
+    """One symbol across exchanges, collected under a deadline"""
+    symbol: str
+    deadline_ms: float
+    elapsed_ms: float
+    best_bid: Optional[BestQuote] = None
+    best_ask: Optional[BestQuote] = None
+    spread: Optional[float] = None
+    spread_pct: Optional[float] = None
+    results: List[ExchangeTickerResult]
+
+
+class OrderBookResponse(BaseModel):
+    """Best levels of an L2 order book"""
+    exchange: str
+    symbol: str
+    bids: List[List[float]] = Field(..., description="[price, size], best (highest) first")
+    asks: List[List[float]] = Field(..., description="[price, size], best (lowest) first")
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    spread: Optional[float] = None
+    mid: Optional[float] = None
+    seq: Optional[int] = Field(None, description="Sequence number (nonce) of the last applied update")
+    timestamp: Optional[int] = None
+    streamed: bool = Field(False, description="Served from a live streamed book rather than a REST snapshot")
+
+
+class OrderBookAggregateResponse(OrderBookResponse):
+    """Order book levels summed into price buckets"""
+    step: float
+
+
+class OrderBookDepthResponse(OrderBookResponse):
+    """Order book levels with running totals, [price, size, cumulative size, cumulative notional]"""
+
+
+class IndicatorsResponse(BaseModel):
+    """Indicator columns aligned with candle timestamps (None during warm-up)"""
+    exchange: str
+    symbol: str
+    timeframe: str
+    timestamp: List[int]
+    indicators: Dict[str, List[Optional[float]]]
 
 
 class HistoricalDataRequest(BaseModel):
@@ -48,6 +115,29 @@ class HistoricalDataResponse(BaseModel):
     data: List[OHLCVData]
 
 
+class MarketInfo(BaseModel):
+    """Market summary from an exchange's market index"""
+    symbol: str
+    base: str
+    quote: str
+    type: Optional[str] = None
+    active: Optional[bool] = None
+
+
+class MarketsResponse(BaseModel):
+    """One page of market search results"""
+    exchange: str
+    markets: List[MarketInfo]
+    total: int = Field(..., description="Markets matching the search across all pages")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page")
+
+
+class SymbolExchangesResponse(BaseModel):
+    """Exchanges listing a symbol"""
+    symbol: str
+    exchanges: List[str]
+
+
 class ExchangeInfo(BaseModel):
     """Exchange information"""
     id: str
@@ -55,6 +145,10 @@ class ExchangeInfo(BaseModel):
     enabled: bool
     countries: List[str]
     urls: Dict[str, Any]
+    markets_loaded: bool = False
+    markets_source: Optional[str] = None
+    startup_ms: Optional[float] = None
+    circuit: Optional[Dict[str, Any]] = None
 
 
 class ExchangeInfoResponse(BaseModel):
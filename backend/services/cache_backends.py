@@ -0,0 +1,293 @@
+"""
+Storage backends for CacheService
+"""
+
+from cachetools import TTLCache
+from typing import Any, Dict, Optional, Set, Tuple
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# A stored value and the wall-clock time until which it is fresh
+Entry = Tuple[Any, float]
+
+
+class CacheBackend:
+    """
+    Storage for cache entries, grouped by namespace
+    
+    Entries are kept until expires_at (the end of their stale window) or until the
+    namespace exceeds its size limit. Locks make get-or-compute atomic across every
+    process sharing the backend.
+    """
+    
+    def configure(self, namespace: str, max_size: int, lifetime: float) -> None:
+        """Set a namespace's size limit and the seconds entries are kept"""
+        raise NotImplementedError
+    
+    def get(self, namespace: str, key: str) -> Optional[Entry]:
+        """Get (value, fresh_until) for an unexpired entry"""
+        raise NotImplementedError
+    
+    def set(self, namespace: str, key: str, value: Any, fresh_until: float) -> None:
+        """Store an entry"""
+        raise NotImplementedError
+    
+    def try_lock(self, key: str, timeout: float) -> bool:
+        """Take the compute lock for key unless another holder's lock is still live"""
+        raise NotImplementedError
+    
+    def unlock(self, key: str) -> None:
+        """Release a compute lock taken by this backend"""
+        raise NotImplementedError
+    
+    def size(self, namespace: str) -> int:
+        """Get number of entries in a namespace"""
+        raise NotImplementedError
+    
+    def evictions(self, namespace: str) -> int:
+        """Get number of entries evicted from a namespace by this process"""
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """Remove every entry"""
+        raise NotImplementedError
+
+
+class NamespaceCache(TTLCache):
+    """TTLCache that counts entries evicted to make room"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.evictions = 0
+    
+    def popitem(self):
+        """Evict the least recently used entry"""
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process TTLCache per namespace; locks are left to the caller's coalescing"""
+    
+    def __init__(self):
+        self.caches: Dict[str, NamespaceCache] = {}
+    
+    def configure(self, namespace: str, max_size: int, lifetime: float) -> None:
+        self.caches[namespace] = NamespaceCache(maxsize=max_size, ttl=lifetime)
+    
+    def get(self, namespace: str, key: str) -> Optional[Entry]:
+        return self.caches[namespace].get(key)
+    
+    def set(self, namespace: str, key: str, value: Any, fresh_until: float) -> None:
+        self.caches[namespace][key] = (value, fresh_until)
+    
+    def try_lock(self, key: str, timeout: float) -> bool:
+        return True
+    
+    def unlock(self, key: str) -> None:
+        pass
+    
+    def size(self, namespace: str) -> int:
+        return len(self.caches[namespace])
+    
+    def evictions(self, namespace: str) -> int:
+        return self.caches[namespace].evictions
+    
+    def clear(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache shared by every process opening the same SQLite file (e.g. uvicorn workers)
+    
+    Values are pickled, so the file must only be writable by the service itself.
+    Operations are single indexed statements on a local WAL database and run on
+    the calling thread, which is the event loop. So that another worker's write
+    never stalls the loop, a busy database is waited on for busy_timeout only:
+    a get then misses, a set, cleanup or clear is skipped, a lock is not taken,
+    an unlock is retried on the next operation and size reports its last count.
+    """
+    
+    def __init__(self, path: str, cleanup_every: int = 256, busy_timeout: float = 0.005):
+        """
+        Initialize shared cache backend
+        
+        Args:
+            path: SQLite database file shared by the workers
+            cleanup_every: Writes between sweeps of expired and over-limit entries
+            busy_timeout: Seconds to wait for another process's write before giving up
+        """
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self.busy_timeout = busy_timeout
+        self.busy = 0
+        self.owner = ""
+        self.limits: Dict[str, Tuple[int, float]] = {}
+        self.evicted: Dict[str, int] = {}
+        # Last counted size per namespace, reported while the database is busy
+        self.sizes: Dict[str, int] = {}
+        self._writes = 0
+        # Locks whose release found the database busy
+        self._unreleased: Set[str] = set()
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+        logger.info(f"Shared cache opened at {path}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this process's connection, reopening it after a fork"""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        
+        self._pid = os.getpid()
+        self.owner = f"{self._pid}:{uuid.uuid4().hex}"
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Cache contents can be rebuilt, so skip fsyncs
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                fresh_until REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_expiry ON entries (namespace, expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        # Setup above may wait for other workers; requests from here on only wait briefly
+        self._conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        return self._conn
+    
+    def _skip_busy(self, error: sqlite3.OperationalError, action: str) -> None:
+        """Count an operation given up because another process holds the write lock"""
+        if "locked" not in str(error) and "busy" not in str(error):
+            raise error
+        self.busy += 1
+        logger.debug(f"Shared cache busy, skipped {action}")
+    
+    def _release_unreleased(self, conn: sqlite3.Connection) -> None:
+        """Retry unlocks that found the database busy (lock held)"""
+        for key in list(self._unreleased):
+            conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, self.owner))
+            self._unreleased.discard(key)
+    
+    def configure(self, namespace: str, max_size: int, lifetime: float) -> None:
+        self.limits[namespace] = (max_size, lifetime)
+        self.evicted.setdefault(namespace, 0)
+    
+    def get(self, namespace: str, key: str) -> Optional[Entry]:
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value, fresh_until FROM entries WHERE key = ? AND expires_at > ?",
+                    (key, time.time())
+                ).fetchone()
+        except sqlite3.OperationalError as e:
+            self._skip_busy(e, f"get of {key}")
+            return None
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+    
+    def set(self, namespace: str, key: str, value: Any, fresh_until: float) -> None:
+        _, lifetime = self.limits[namespace]
+        now = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            with self._lock:
+                conn = self._connect()
+                self._release_unreleased(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, payload, fresh_until, now + lifetime)
+                )
+                self._writes += 1
+                if self._writes % self.cleanup_every == 0:
+                    self._cleanup(now)
+        except sqlite3.OperationalError as e:
+            self._skip_busy(e, f"set of {key}")
+    
+    def _cleanup(self, now: float) -> None:
+        """Drop expired entries and the soonest-expiring ones beyond each namespace's limit"""
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+        for namespace, (max_size, _) in self.limits.items():
+            deleted = conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries WHERE namespace = ?
+                    ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (namespace, max_size)
+            ).rowcount
+            self.evicted[namespace] += deleted
+    
+    def try_lock(self, key: str, timeout: float) -> bool:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                self._release_unreleased(conn)
+                # Atomic across processes: take the lock if free or its holder's lease ran out
+                changed = conn.execute(
+                    """
+                    INSERT INTO locks VALUES (?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                    WHERE locks.expires_at <= ?
+                    """,
+                    (key, self.owner, now + timeout, now)
+                ).rowcount
+        except sqlite3.OperationalError as e:
+            self._skip_busy(e, f"lock of {key}")
+            return False
+        return changed == 1
+    
+    def unlock(self, key: str) -> None:
+        with self._lock:
+            self._unreleased.add(key)
+            try:
+                self._release_unreleased(self._connect())
+            except sqlite3.OperationalError as e:
+                self._skip_busy(e, f"unlock of {key}")
+    
+    def size(self, namespace: str) -> int:
+        try:
+            with self._lock:
+                self.sizes[namespace] = self._connect().execute(
+                    "SELECT COUNT(*) FROM entries WHERE namespace = ? AND expires_at > ?",
+                    (namespace, time.time())
+                ).fetchone()[0]
+        except sqlite3.OperationalError as e:
+            self._skip_busy(e, f"size of {namespace or 'default'}")
+        return self.sizes.get(namespace, 0)
+    
+    def evictions(self, namespace: str) -> int:
+        return self.evicted.get(namespace, 0)
+    
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM entries")
+        except sqlite3.OperationalError as e:
+            self._skip_busy(e, "clear")
+            logger.warning("Shared cache busy, entries were not cleared")
@@ -2,48 +2,227 @@
 Caching service for API responses
 """
 
-from cachetools import TTLCache
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
 import logging
+import time
+
+from services.cache_backends import CacheBackend, MemoryCacheBackend
+from services.request_coalescer import RequestCoalescer
 
 logger = logging.getLogger(__name__)
 
 
+class CachePolicy:
+    """Expiry rules for one key namespace"""
+    
+    def __init__(self, ttl: float, max_size: int = 1000, stale_ttl: float = 0, refresh_ahead: float = 0):
+        """
+        Initialize cache policy
+        
+        Args:
+            ttl: Seconds an entry is fresh
+            max_size: Maximum number of entries in the namespace
+            stale_ttl: Seconds after expiry an entry may still be served while it is refreshed
+            refresh_ahead: Fraction of ttl before expiry in which a hit refreshes the entry
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+
+
 class CacheService:
-    """TTL-based cache service"""
+    """TTL-based cache service with per-namespace policies and stale-while-revalidate"""
     
-    def __init__(self, ttl: int = 60, max_size: int = 1000):
+    def __init__(
+        self,
+        ttl: int = 60,
+        max_size: int = 1000,
+        policies: Optional[Dict[str, CachePolicy]] = None,
+        backend: Optional[CacheBackend] = None,
+        lock_timeout: float = 10.0,
+        lock_poll_interval: float = 0.02
+    ):
         """
         Initialize cache service
         
         Args:
-            ttl: Time to live in seconds
-            max_size: Maximum number of items in cache
+            ttl: Time to live in seconds for keys without a namespace policy
+            max_size: Maximum number of such keys
+            policies: Policies by namespace, the key prefix before the first ":"
+            backend: Entry storage (in-process memory if omitted)
+            lock_timeout: Seconds a process may hold a key's compute lock in a shared backend
+            lock_poll_interval: Seconds between checks while another process computes a key
         """
-        self.cache = TTLCache(maxsize=max_size, ttl=ttl)
-        logger.info(f"Cache initialized with TTL={ttl}s, max_size={max_size}")
+        self.default_policy = CachePolicy(ttl=ttl, max_size=max_size)
+        self.policies = policies or {}
+        self.backend = backend or MemoryCacheBackend()
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self.stats_by_namespace: Dict[str, Dict[str, int]] = {}
+        self._loader = RequestCoalescer()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        logger.info(
+            f"Cache initialized with TTL={ttl}s, max_size={max_size}, "
+            f"namespaces={sorted(self.policies)}, backend={type(self.backend).__name__}"
+        )
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
+    def _namespace(self, key: str) -> Tuple[str, CachePolicy]:
+        """Get the policy namespace ("" for the default policy) and policy of a key"""
+        namespace = key.split(":", 1)[0]
+        if namespace not in self.policies:
+            namespace = ""
+        policy = self.policies.get(namespace, self.default_policy)
+        if namespace not in self.stats_by_namespace:
+            # Entries outlive their ttl by the stale window; freshness is tracked per entry
+            self.backend.configure(namespace, policy.max_size, policy.ttl + policy.stale_ttl)
+            self.stats_by_namespace[namespace] = {
+                "hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0
+            }
+        return namespace, policy
+    
+    def _entry(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, fresh_until) from the backend, treating backend errors as misses"""
         try:
-            return self.cache.get(key)
+            return self.backend.get(namespace, key)
         except Exception as e:
             logger.warning(f"Cache get error for key {key}: {str(e)}")
             return None
     
+    def get(self, key: str) -> Optional[Any]:
+        """Get a fresh value from cache"""
+        namespace, _ = self._namespace(key)
+        entry = self._entry(namespace, key)
+        if entry is not None and time.time() < entry[1]:
+            self.stats_by_namespace[namespace]["hits"] += 1
+            return entry[0]
+        self.stats_by_namespace[namespace]["misses"] += 1
+        return None
+    
     def set(self, key: str, value: Any) -> None:
         """Set value in cache"""
         try:
-            self.cache[key] = value
+            namespace, policy = self._namespace(key)
+            self.backend.set(namespace, key, value, time.time() + policy.ttl)
         except Exception as e:
             logger.warning(f"Cache set error for key {key}: {str(e)}")
     
+    async def _compute(
+        self,
+        namespace: str,
+        policy: CachePolicy,
+        key: str,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run loader for key at most once across every process sharing the backend
+        
+        Processes that lose the race for the key's lock wait for the winner's
+        value instead of calling upstream themselves.
+        """
+        requested_at = time.time()
+        deadline = requested_at + self.lock_timeout
+        while not self.backend.try_lock(key, self.lock_timeout):
+            entry = self._entry(namespace, key)
+            if entry is not None and time.time() < entry[1]:
+                return entry[0]
+            if time.time() >= deadline:
+                logger.warning(f"Timed out waiting for another process to compute {key}")
+                break
+            await asyncio.sleep(self.lock_poll_interval)
+        
+        try:
+            # Another process may have stored a value since we were asked to load one
+            entry = self._entry(namespace, key)
+            if entry is not None and entry[1] - policy.ttl >= requested_at:
+                return entry[0]
+            
+            value = await loader()
+            if value:
+                self.set(key, value)
+            return value
+        finally:
+            self.backend.unlock(key)
+    
+    async def load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Call loader (sharing any call already in flight for key) and cache a non-empty result"""
+        namespace, policy = self._namespace(key)
+        # Cached inside the shared fetch so it lands even if every caller gave up
+        return await self._loader.run(key, lambda: self._compute(namespace, policy, key, loader))
+    
+    def _refresh(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        """Start one background refresh of key unless one is already running"""
+        if key in self._refreshing:
+            return
+        
+        stats = self.stats_by_namespace[namespace]
+        stats["refreshes"] += 1
+        task = asyncio.ensure_future(self.load(key, loader))
+        self._refreshing[key] = task
+        
+        def done(task: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                stats["refresh_errors"] += 1
+                logger.warning(f"Background refresh failed for key {key}: {task.exception()}")
+        
+        task.add_done_callback(done)
+    
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a value, calling loader on a miss
+        
+        Within the namespace's stale window an expired value is returned immediately
+        while one background task refreshes it; a hit in the refresh-ahead window
+        refreshes it before it expires, so keys that stay hot never miss.
+        """
+        namespace, policy = self._namespace(key)
+        stats = self.stats_by_namespace[namespace]
+        entry = self._entry(namespace, key)
+        if entry is not None:
+            value, fresh_until = entry
+            now = time.time()
+            if now < fresh_until:
+                stats["hits"] += 1
+                if policy.refresh_ahead and now >= fresh_until - policy.ttl * policy.refresh_ahead:
+                    self._refresh(namespace, key, loader)
+                return value
+            
+            stats["stale_hits"] += 1
+            self._refresh(namespace, key, loader)
+            return value
+        
+        stats["misses"] += 1
+        return await self.load(key, loader)
+    
     def clear(self) -> None:
         """Clear all cache"""
-        self.cache.clear()
+        self.backend.clear()
         logger.info("Cache cleared")
     
     def size(self) -> int:
         """Get current cache size"""
-        return len(self.cache)
-
+        return sum(self.backend.size(namespace) for namespace in self.stats_by_namespace)
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get hit, stale hit, miss, eviction and refresh counters per namespace"""
+        return {
+            namespace or "default": dict(
+                stats,
+                evictions=self.backend.evictions(namespace),
+                size=self.backend.size(namespace)
+            )
+            for namespace, stats in self.stats_by_namespace.items()
+        }
+    
+    def loader_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics of cache misses and refreshes sharing one loader call"""
+        return self._loader.stats()
+    
+    async def shutdown(self) -> None:
+        """Cancel background refreshes"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
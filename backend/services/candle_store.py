@@ -0,0 +1,142 @@
+"""
+Persistent local OHLCV candle store backed by SQLite
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+# A stored row: timestamp (ms), open, high, low, close, volume.
+# Rows whose open is None mark timestamps the exchange has no candle for.
+Candle = Tuple[int, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float]]
+
+
+class CandleStore:
+    """
+    Closed candles per (exchange, symbol, timeframe), shared by every query window
+    
+    With max_rows set, each series keeps only its newest rows: a series is
+    pruned the first time it is written and then every prune_every rows, so
+    1m candles and long exports do not grow the file without bound.
+    """
+    
+    def __init__(self, path: str, max_rows: int = 0, prune_every: int = 5000):
+        """
+        Initialize candle store
+        
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            max_rows: Newest rows kept per (exchange, symbol, timeframe) (0 keeps everything)
+            prune_every: Rows written to a series between prunes of it
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        # Rows written per series since it was last pruned
+        self._written: Dict[Tuple[str, str, str], int] = {}
+        self.pruned = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        # Accessed from worker threads; sqlite3 connections are not thread-safe by themselves
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS candles (
+                exchange TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                PRIMARY KEY (exchange, symbol, timeframe, ts)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+        logger.info(f"Candle store opened at {path}")
+    
+    def get_range(self, exchange: str, symbol: str, timeframe: str, start: int, end: int) -> List[Candle]:
+        """Get stored rows (including empty markers) with start <= ts <= end, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT ts, open, high, low, close, volume FROM candles
+                WHERE exchange = ? AND symbol = ? AND timeframe = ? AND ts BETWEEN ? AND ?
+                ORDER BY ts
+                """,
+                (exchange, symbol, timeframe, start, end)
+            ).fetchall()
+    
+    def put(self, exchange: str, symbol: str, timeframe: str, candles: Iterable[Sequence]) -> int:
+        """Insert or replace closed candles; returns the number of rows written"""
+        rows = [
+            (exchange, symbol, timeframe, int(c[0]), c[1], c[2], c[3], c[4], c[5])
+            for c in candles
+        ]
+        if not rows:
+            return 0
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if self.max_rows:
+                series = (exchange, symbol, timeframe)
+                written = self._written.get(series, self.prune_every) + len(rows)
+                if written >= self.prune_every:
+                    self._prune(series)
+                    written = 0
+                self._written[series] = written
+            self._conn.commit()
+        return len(rows)
+    
+    def _prune(self, series: Tuple[str, str, str]) -> None:
+        """Delete a series' rows older than its newest max_rows (lock held)"""
+        cutoff = self._conn.execute(
+            """
+            SELECT ts FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ?
+            ORDER BY ts DESC LIMIT 1 OFFSET ?
+            """,
+            (*series, self.max_rows)
+        ).fetchone()
+        if cutoff is None:
+            return
+        deleted = self._conn.execute(
+            "DELETE FROM candles WHERE exchange = ? AND symbol = ? AND timeframe = ? AND ts <= ?",
+            (*series, cutoff[0])
+        ).rowcount
+        self.pruned += deleted
+        logger.debug(f"Pruned {deleted} candles of {series[1]} {series[2]} on {series[0]}")
+    
+    def mark_empty(self, exchange: str, symbol: str, timeframe: str, timestamps: Iterable[int]) -> int:
+        """Record timestamps the exchange has no candle for, so they are not refetched"""
+        return self.put(
+            exchange, symbol, timeframe,
+            [(ts, None, None, None, None, None) for ts in timestamps]
+        )
+    
+    def count(self, exchange: Optional[str] = None) -> int:
+        """Get number of stored rows, optionally for one exchange"""
+        with self._lock:
+            if exchange is None:
+                return self._conn.execute("SELECT COUNT(*) FROM candles").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM candles WHERE exchange = ?", (exchange,)
+            ).fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,189 @@
+"""
+Per-exchange circuit breakers driven by rolling error rate and latency
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an exchange whose breaker is open"""
+    
+    def __init__(self, exchange_id: str, retry_after: float):
+        super().__init__(f"{exchange_id} is unavailable (circuit open); retry in {retry_after:.1f}s")
+        self.exchange_id = exchange_id
+        self.retry_after = retry_after
+
+
+class BreakerPolicy:
+    """Thresholds shared by every exchange's breaker"""
+    
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        slow_p95: float = 10.0,
+        min_calls: int = 10,
+        window: float = 60.0,
+        open_seconds: float = 30.0,
+        max_calls: int = 1000
+    ):
+        """
+        Initialize breaker policy
+        
+        Args:
+            error_rate: Failed fraction of windowed calls that opens the breaker
+            slow_p95: p95 latency in seconds that opens the breaker
+            min_calls: Calls in the window before either threshold applies
+            window: Seconds of calls the rolling statistics cover
+            open_seconds: Seconds an open breaker fails fast before letting a probe through
+            max_calls: Most recent calls the window keeps, however busy the exchange
+        """
+        self.error_rate = error_rate
+        self.slow_p95 = slow_p95
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.max_calls = max_calls
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one exchange
+    
+    While closed, calls are recorded in a rolling window and the breaker opens
+    once the window's error rate or p95 latency crosses the policy. While open,
+    calls fail fast. After open_seconds one probe call is let through: success
+    closes the breaker with a fresh window, failure opens it again.
+    
+    The window keeps a failure count and its latencies in sorted order, both
+    updated as calls enter and leave it, so recording a call costs a binary
+    search rather than a sort and a scan of the window.
+    """
+    
+    def __init__(self, exchange_id: str, policy: BreakerPolicy):
+        self.exchange_id = exchange_id
+        self.policy = policy
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        # (finished at, latency seconds, failed)
+        self.calls: Deque[Tuple[float, float, bool]] = deque()
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def _trim(self, now: float) -> None:
+        """Drop calls that have left the window"""
+        calls = self.calls
+        while calls and (calls[0][0] < now - self.policy.window or len(calls) > self.policy.max_calls):
+            _, latency, failed = calls.popleft()
+            del self.latencies[bisect_left(self.latencies, latency)]
+            self.failures -= failed
+    
+    def _clear(self) -> None:
+        self.calls.clear()
+        self.latencies.clear()
+        self.failures = 0
+    
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Get a latency percentile over the window (None until min_calls are recorded)"""
+        self._trim(time.monotonic())
+        if len(self.calls) < self.policy.min_calls:
+            return None
+        latencies = self.latencies
+        return latencies[min(len(latencies) - 1, math.ceil(q * len(latencies)) - 1)]
+    
+    def error_rate(self) -> float:
+        """Get the failed fraction of windowed calls"""
+        self._trim(time.monotonic())
+        if not self.calls:
+            return 0.0
+        return self.failures / len(self.calls)
+    
+    def before_call(self) -> None:
+        """
+        Check a call may go ahead
+        
+        Raises:
+            CircuitOpenError: The breaker is open, or half-open with its probe in flight
+        """
+        if self.state == CLOSED:
+            return
+        
+        remaining = self.opened_at + self.policy.open_seconds - time.monotonic()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return
+        
+        self.rejected += 1
+        raise CircuitOpenError(self.exchange_id, max(remaining, 1.0))
+    
+    def record(self, latency: float, failed: bool) -> None:
+        """Record a finished call and move between states"""
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self.probing = False
+            if failed:
+                self._open(now, "probe failed")
+            else:
+                self.state = CLOSED
+                self._clear()
+                logger.info(f"Circuit for {self.exchange_id} closed")
+            return
+        
+        if self.state == OPEN:
+            # A call started before the breaker opened
+            return
+        
+        self.calls.append((now, latency, failed))
+        insort(self.latencies, latency)
+        self.failures += failed
+        self._trim(now)
+        if len(self.calls) < self.policy.min_calls:
+            return
+        
+        error_rate = self.error_rate()
+        p95 = self.latency_percentile(0.95)
+        if error_rate >= self.policy.error_rate:
+            self._open(now, f"error rate {error_rate:.0%}")
+        elif p95 is not None and p95 >= self.policy.slow_p95:
+            self._open(now, f"p95 latency {p95:.1f}s")
+    
+    def release(self) -> None:
+        """Give up a probe that ended without a verdict (e.g. cancelled)"""
+        if self.state == HALF_OPEN:
+            self.probing = False
+    
+    def _open(self, now: float, reason: str) -> None:
+        """Start failing fast"""
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit for {self.exchange_id} opened: {reason}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get state, window statistics and counters"""
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        return {
+            "state": self.state,
+            "calls": len(self.calls),
+            "error_rate": round(self.error_rate(), 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
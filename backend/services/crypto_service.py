@@ -2,49 +2,483 @@
 Cryptocurrency data service using CCXT
 """
 
+from cachetools import LRUCache
 import ccxt
+import ccxt.async_support as ccxt_async
+import aiohttp
 import logging
-from typing import List, Dict, Optional, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
 from datetime import datetime, timedelta
 import asyncio
+import time
+
+from services.candle_store import CandleStore
+from services.circuit_breaker import CLOSED, BreakerPolicy, CircuitBreaker, CircuitOpenError
+from services.market_index import MarketIndex, SymbolIndex
+from services.markets_snapshot import MarketsSnapshot
+from services.metrics import Counter, Histogram
+from services.ohlcv_resampler import bucket_start, resample_ohlcv
+from services.request_coalescer import RequestCoalescer
+from services.upstream_journal import ReplayExchange, UpstreamJournal
+from services.upstream_scheduler import BACKFILL, INTERACTIVE, UpstreamScheduler
 
 logger = logging.getLogger(__name__)
 
+# Maximum candles requested per fetch_ohlcv page
+OHLCV_PAGE_LIMIT = 1000
+# Candles are stored once they have been closed this long
+CANDLE_CLOSE_GRACE_MS = 10_000
+# Weekly and monthly candles are not epoch-aligned, so they bypass the store
+STORE_MAX_TIMEFRAME_MS = 86_400_000
+# Read-only methods that may be sent twice when the first attempt is slow
+HEDGED_METHODS = {'fetch_ticker', 'fetch_tickers', 'fetch_ohlcv', 'fetch_order_book'}
+# Errors that count against an exchange's circuit breaker (bad symbols and the like do not)
+BREAKER_ERRORS = (ccxt.NetworkError, asyncio.TimeoutError)
+# Last good tickers kept to answer while a circuit is open
+LAST_TICKERS_MAX_SIZE = 10_000
+# Seconds between writes of recorded upstream calls to the journal
+JOURNAL_FLUSH_INTERVAL = 1.0
+UPSTREAM_MODES = ("live", "record", "replay")
+
 
 class CryptocurrencyService:
     """Service for fetching cryptocurrency market data"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        backend: str = "thread",
+        pool_limit: int = 100,
+        pool_limit_per_host: int = 20,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: int = 30,
+        exchange_ids: Optional[List[str]] = None,
+        snapshot_path: Optional[str] = None,
+        markets_refresh_interval: int = 3600,
+        candle_store_path: Optional[str] = None,
+        candle_store_max_rows: int = 0,
+        base_timeframes: Optional[List[str]] = None,
+        scheduler: Optional[UpstreamScheduler] = None,
+        request_timeout: int = 30000,
+        breaker_policy: Optional[BreakerPolicy] = None,
+        hedge_min_delay: Optional[float] = None,
+        exchange_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        upstream_mode: str = "live",
+        journal_path: Optional[str] = None,
+        replay_speed: float = 1.0
+    ):
+        """
+        Initialize cryptocurrency service
+        
+        Args:
+            backend: "thread" runs sync ccxt in worker threads, "async" uses ccxt.async_support
+            pool_limit: Total connections in the shared HTTP pool (async backend)
+            pool_limit_per_host: Connections per exchange host (async backend)
+            dns_cache_ttl: Seconds to cache DNS lookups (async backend)
+            keepalive_timeout: Seconds to keep idle connections open (async backend)
+            exchange_ids: Exchanges to enable (defaults to all supported exchanges)
+            snapshot_path: Markets snapshot file used for warm starts (disabled if empty)
+            markets_refresh_interval: Seconds between background market reloads (0 = once)
+            candle_store_path: SQLite file for closed OHLCV candles (disabled if empty)
+            candle_store_max_rows: Newest candles kept per (exchange, symbol, timeframe) (0 = unbounded)
+            base_timeframes: Timeframes fetched upstream; coarser ones are resampled from them
+            scheduler: Rate limiter shared by all calls (ccxt's per-call throttle is used if omitted)
+            request_timeout: Milliseconds before ccxt abandons an exchange request
+            breaker_policy: Thresholds for per-exchange circuit breakers (disabled if omitted)
+            hedge_min_delay: Least seconds before a slow read is duplicated (hedging disabled if None)
+            exchange_factory: Builds exchanges from (exchange_id, ccxt config) in place of ccxt,
+                e.g. a FakeExchange for offline benchmarks
+            upstream_mode: "live", "record" (journal every upstream response) or
+                "replay" (serve the journal without touching the network)
+            journal_path: SQLite journal file written by record mode and read by replay mode
+            replay_speed: Replay clock rate (1 = original timing, 10 = ten times faster)
+        """
+        if backend not in ("thread", "async"):
+            raise ValueError(f"Unknown exchange backend: {backend}")
+        if upstream_mode not in UPSTREAM_MODES:
+            raise ValueError(f"Unknown upstream mode: {upstream_mode}")
+        if upstream_mode != "live" and not journal_path:
+            raise ValueError(f"Upstream mode {upstream_mode} needs a journal path")
+        
         self.exchanges: Dict[str, ccxt.Exchange] = {}
-        self.supported_exchanges = ['binance', 'coinbase', 'kraken', 'bitfinex', 'huobi']
+        self.supported_exchanges = exchange_ids or ['binance', 'coinbase', 'kraken', 'bitfinex', 'huobi']
+        self.backend = backend
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.snapshot = MarketsSnapshot(snapshot_path) if snapshot_path else None
+        self.markets_refresh_interval = markets_refresh_interval
+        self.markets_source: Dict[str, str] = {}
+        self.startup_times: Dict[str, float] = {}
+        self.markets_load_times: Dict[str, float] = {}
+        self.market_indexes: Dict[str, MarketIndex] = {}
+        self.symbol_index = SymbolIndex()
+        self._markets_loader = RequestCoalescer()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.candle_store = CandleStore(
+            candle_store_path, max_rows=candle_store_max_rows
+        ) if candle_store_path else None
+        self.base_timeframes = base_timeframes if base_timeframes is not None else ['1m', '1h', '1d']
+        self.scheduler = scheduler
+        self.request_timeout = request_timeout
+        self.breaker_policy = breaker_policy
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.hedge_min_delay = hedge_min_delay
+        self.exchange_factory = exchange_factory
+        self.upstream_mode = upstream_mode
+        self.journal = UpstreamJournal(journal_path) if upstream_mode != "live" else None
+        if upstream_mode == "replay":
+            self.exchange_factory = lambda exchange_id, config: ReplayExchange(
+                exchange_id, self.journal, replay_speed
+            )
+        self._journal_task: Optional[asyncio.Task] = None
+        self.last_tickers: LRUCache = LRUCache(maxsize=LAST_TICKERS_MAX_SIZE)
+        self.thread_calls_in_flight = 0
+        self.upstream_latency = Histogram(
+            "crypto_upstream_request_duration_seconds",
+            "Latency of exchange API calls",
+            ("exchange", "method")
+        )
+        self.upstream_errors = Counter(
+            "crypto_upstream_errors_total",
+            "Failed exchange API calls",
+            ("exchange", "method", "error")
+        )
+        self.hedged_requests = Counter(
+            "crypto_upstream_hedged_requests_total",
+            "Duplicate reads sent after the first attempt exceeded the p95 latency, by winning attempt",
+            ("exchange", "method", "winner")
+        )
+    
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create the HTTP session shared by all async exchanges"""
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(connector=connector, trust_env=True)
+    
+    def _create_exchange(self, exchange_id: str):
+        """Create an exchange instance for the configured backend"""
+        config = {
+            # The scheduler paces calls before they reach ccxt, so ccxt must not sleep as well
+            'enableRateLimit': self.scheduler is None,
+            'timeout': self.request_timeout,
+        }
+        
+        if self.exchange_factory is not None:
+            return self.exchange_factory(exchange_id, config)
+        
+        if self.backend == "async":
+            if self.session is None:
+                self.session = self._create_session()
+            # Exchanges given a session reuse it and leave closing it to us
+            config['session'] = self.session
+            return getattr(ccxt_async, exchange_id)(config)
+        
+        return getattr(ccxt, exchange_id)(config)
+    
+    def _breaker(self, exchange_id: str) -> Optional[CircuitBreaker]:
+        """Get the circuit breaker of an exchange (None when breakers are disabled)"""
+        if self.breaker_policy is None:
+            return None
+        breaker = self.breakers.get(exchange_id)
+        if breaker is None:
+            breaker = self.breakers[exchange_id] = CircuitBreaker(exchange_id, self.breaker_policy)
+        return breaker
+    
+    async def _call(self, exchange, method: str, *args, priority: int = INTERACTIVE) -> Any:
+        """
+        Invoke an exchange method, off the event loop only when it is blocking
+        
+        With a scheduler, the call first waits for the exchange's rate-limit
+        tokens behind any more urgent calls (priority is a scheduler class).
+        Calls to an exchange whose circuit is open fail fast with CircuitOpenError,
+        and with hedging enabled a read slower than the exchange's p95 latency
+        is sent again, the first response winning.
+        """
+        exchange_id = getattr(exchange, 'id', None) or type(exchange).__name__
+        breaker = self._breaker(exchange_id) if method != 'close' else None
+        if breaker is None:
+            return await self._attempt(exchange, exchange_id, method, args, priority, None)
+        
+        breaker.before_call()
+        if self.hedge_min_delay is not None and method in HEDGED_METHODS and breaker.state == CLOSED:
+            p95 = breaker.latency_percentile(0.95)
+            if p95 is not None:
+                return await self._hedged_call(
+                    exchange, exchange_id, method, args, priority, breaker, max(p95, self.hedge_min_delay)
+                )
+        return await self._attempt(exchange, exchange_id, method, args, priority, breaker)
+    
+    async def _attempt(
+        self,
+        exchange,
+        exchange_id: str,
+        method: str,
+        args: tuple,
+        priority: int,
+        breaker: Optional[CircuitBreaker]
+    ) -> Any:
+        """Send one request, recording its latency and outcome"""
+        func = getattr(exchange, method)
+        rate_limit = getattr(exchange, 'rateLimit', None)
+        try:
+            if self.scheduler is not None and rate_limit and method != 'close':
+                await self.scheduler.acquire(exchange_id, method, rate_limit, priority)
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        
+        start = time.perf_counter()
+        started_at = time.time()
+        failed = None
+        recording = self.upstream_mode == "record" and method != 'close'
+        try:
+            if asyncio.iscoroutinefunction(func):
+                result = await func(*args)
+            else:
+                self.thread_calls_in_flight += 1
+                try:
+                    result = await asyncio.to_thread(func, *args)
+                finally:
+                    self.thread_calls_in_flight -= 1
+            failed = False
+            if recording:
+                self.journal.record(exchange_id, method, args, started_at, time.perf_counter() - start, result)
+            return result
+        except Exception as e:
+            failed = isinstance(e, BREAKER_ERRORS)
+            self.upstream_errors.inc(exchange_id, method, type(e).__name__)
+            if recording:
+                self.journal.record(exchange_id, method, args, started_at, time.perf_counter() - start, error=e)
+            raise
+        finally:
+            latency = time.perf_counter() - start
+            self.upstream_latency.observe(latency, exchange_id, method)
+            if breaker is not None:
+                if failed is None:
+                    # Cancelled (e.g. a hedge that lost): no verdict on the exchange
+                    breaker.release()
+                else:
+                    breaker.record(latency, failed)
+    
+    async def _hedged_call(
+        self,
+        exchange,
+        exchange_id: str,
+        method: str,
+        args: tuple,
+        priority: int,
+        breaker: CircuitBreaker,
+        delay: float
+    ) -> Any:
+        """Send a read, and a duplicate if it has not answered within delay seconds"""
+        primary = asyncio.ensure_future(self._attempt(exchange, exchange_id, method, args, priority, breaker))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            
+            hedge = asyncio.ensure_future(self._attempt(exchange, exchange_id, method, args, priority, breaker))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "primary" if task is primary else "hedge"
+                        self.hedged_requests.inc(exchange_id, method, winner)
+                        return task.result()
+                    error = task.exception()
+            self.hedged_requests.inc(exchange_id, method, "none")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
     
     async def initialize(self):
-        """Initialize exchange connections"""
-        logger.info("Initializing cryptocurrency exchanges...")
+        """Create exchanges concurrently, warm-starting markets from the snapshot"""
+        logger.info(f"Initializing cryptocurrency exchanges ({self.backend} backend)...")
+        
+        if self.backend == "async" and self.session is None:
+            # Created on the event loop before exchanges are built in worker threads
+            self.session = self._create_session()
+        
+        snapshot = await asyncio.to_thread(self.snapshot.load) if self.snapshot else {}
+        await asyncio.gather(*[
+            self._initialize_exchange(exchange_id, snapshot.get(exchange_id))
+            for exchange_id in self.supported_exchanges
+        ])
+        
+        logger.info(
+            f"Initialized {len(self.exchanges)} exchanges "
+            f"({sum(1 for s in self.markets_source.values() if s == 'snapshot')} from snapshot)"
+        )
         
-        for exchange_id in self.supported_exchanges:
+        # Markets not restored from the snapshot load lazily or in this refresh
+        self._refresh_task = asyncio.create_task(self._refresh_markets_loop())
+        if self.upstream_mode == "record":
+            self._journal_task = asyncio.create_task(self._flush_journal_loop())
+    
+    def _build_exchange(self, exchange_id: str, cached: Optional[Dict[str, Any]]):
+        """Create an exchange and restore snapshot markets (CPU-bound, runs in a thread)"""
+        exchange = self._create_exchange(exchange_id)
+        if cached and cached.get("markets"):
+            exchange.set_markets(cached["markets"], cached.get("currencies"))
+        return exchange
+    
+    async def _initialize_exchange(self, exchange_id: str, cached: Optional[Dict[str, Any]]):
+        """Initialize a single exchange without touching the network"""
+        start = time.perf_counter()
+        try:
+            exchange = await asyncio.to_thread(self._build_exchange, exchange_id, cached)
+        except Exception as e:
+            logger.warning(f"Failed to initialize {exchange_id}: {str(e)}")
+            return
+        
+        self.exchanges[exchange_id] = exchange
+        if self.upstream_mode == "record":
+            await asyncio.to_thread(self.journal.record_exchange, exchange_id, exchange)
+            if exchange.markets:
+                # Keeps the journal replayable without the snapshot
+                self.journal.record(exchange_id, 'load_markets', (), time.time(), 0.0, exchange.markets)
+        if exchange.markets:
+            self.markets_source[exchange_id] = "snapshot"
+            await self._index_markets(exchange_id)
+        self.startup_times[exchange_id] = time.perf_counter() - start
+        logger.info(
+            f"Initialized {exchange_id} exchange in {self.startup_times[exchange_id] * 1000:.1f}ms "
+            f"(markets: {self.markets_source.get(exchange_id, 'lazy')})"
+        )
+    
+    async def _fetch_markets(self, exchange_id: str, reload: bool) -> None:
+        """Load markets for an exchange from upstream"""
+        exchange = self.exchanges[exchange_id]
+        start = time.perf_counter()
+        # Periodic reloads must not delay requests waiting on the same rate limit
+        await self._call(exchange, 'load_markets', reload, priority=BACKFILL if reload else INTERACTIVE)
+        self.markets_source[exchange_id] = "live"
+        self.markets_load_times[exchange_id] = time.perf_counter() - start
+        await self._index_markets(exchange_id)
+        logger.info(
+            f"Loaded {len(exchange.markets)} {exchange_id} markets "
+            f"in {self.markets_load_times[exchange_id] * 1000:.1f}ms"
+        )
+    
+    async def _index_markets(self, exchange_id: str) -> MarketIndex:
+        """Rebuild the search index of an exchange's markets and its entries in the symbol index"""
+        index = await asyncio.to_thread(MarketIndex, self.exchanges[exchange_id].markets or {})
+        self.market_indexes[exchange_id] = index
+        self.symbol_index.update(exchange_id, index.symbols)
+        return index
+    
+    async def _load_markets(self, exchange_id: str, reload: bool = False) -> None:
+        """Load markets for an exchange, sharing one upstream call between callers"""
+        await self._markets_loader.run(
+            exchange_id,
+            lambda: self._fetch_markets(exchange_id, reload)
+        )
+    
+    async def _get_exchange(self, exchange_id: str):
+        """Get an initialized exchange, loading its markets on first use"""
+        if exchange_id not in self.exchanges:
+            raise ValueError(f"Exchange {exchange_id} not supported")
+        
+        exchange = self.exchanges[exchange_id]
+        if not exchange.markets:
+            await self._load_markets(exchange_id)
+        return exchange
+    
+    async def refresh_markets(self) -> None:
+        """Reload markets of all exchanges concurrently and rewrite the snapshot"""
+        exchange_ids = list(self.exchanges)
+        results = await asyncio.gather(
+            *[self._load_markets(exchange_id, reload=True) for exchange_id in exchange_ids],
+            return_exceptions=True
+        )
+        for exchange_id, result in zip(exchange_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to refresh {exchange_id} markets: {str(result)}")
+        
+        if self.snapshot:
+            data = {
+                exchange_id: {
+                    "markets": exchange.markets,
+                    "currencies": exchange.currencies,
+                }
+                for exchange_id, exchange in self.exchanges.items()
+                if exchange.markets
+            }
+            if data:
+                await asyncio.to_thread(self.snapshot.save, data)
+                logger.info(f"Saved markets snapshot for {len(data)} exchanges")
+    
+    async def _refresh_markets_loop(self):
+        """Refresh markets in the background for the lifetime of the service"""
+        while True:
             try:
-                exchange_class = getattr(ccxt, exchange_id)
-                exchange = exchange_class({
-                    'enableRateLimit': True,
-                    'timeout': 30000,
-                })
-                
-                # Load markets
-                await asyncio.to_thread(exchange.load_markets)
-                self.exchanges[exchange_id] = exchange
-                logger.info(f"Initialized {exchange_id} exchange")
+                await self.refresh_markets()
             except Exception as e:
-                logger.warning(f"Failed to initialize {exchange_id}: {str(e)}")
-        
-        logger.info(f"Initialized {len(self.exchanges)} exchanges")
+                logger.warning(f"Markets refresh failed: {str(e)}")
+            
+            if self.markets_refresh_interval <= 0:
+                return
+            await asyncio.sleep(self.markets_refresh_interval)
+    
+    async def _flush_journal_loop(self):
+        """Write recorded upstream calls to the journal in batches"""
+        while True:
+            await asyncio.sleep(JOURNAL_FLUSH_INTERVAL)
+            try:
+                await self._flush_journal()
+            except Exception as e:
+                logger.warning(f"Upstream journal flush failed: {str(e)}")
+    
+    async def _flush_journal(self) -> int:
+        """Write buffered journal calls from a worker thread, keeping them buffered if the write fails"""
+        # Taken on the event loop, where record() appends, so no call lands in a list being written
+        rows = self.journal.take_pending()
+        try:
+            return await asyncio.to_thread(self.journal.flush, rows)
+        except Exception:
+            self.journal.restore(rows)
+            raise
+    
+    async def _close_exchange(self, exchange) -> None:
+        """Close an exchange, ignoring errors from already-closed connections"""
+        try:
+            await self._call(exchange, 'close')
+        except Exception as e:
+            logger.warning(f"Error closing exchange: {str(e)}")
     
     async def cleanup(self):
         """Cleanup exchange connections"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._journal_task is not None:
+            self._journal_task.cancel()
+            self._journal_task = None
+        
         for exchange in self.exchanges.values():
             if hasattr(exchange, 'close'):
-                await asyncio.to_thread(exchange.close)
+                await self._close_exchange(exchange)
         self.exchanges.clear()
+        
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        
+        if self.upstream_mode == "record":
+            written = await self._flush_journal()
+            logger.info(f"Upstream journal: {self.journal.recorded} calls recorded ({written} in final flush)")
     
     async def get_supported_exchanges(self) -> List[Dict[str, Any]]:
         """Get list of supported exchanges"""
@@ -55,35 +489,421 @@ class CryptocurrencyService:
                 "name": exchange.name,
                 "enabled": True,
                 "countries": getattr(exchange, 'countries', []),
-                "urls": getattr(exchange, 'urls', {})
+                "urls": getattr(exchange, 'urls', {}),
+                "markets_loaded": bool(exchange.markets),
+                "markets_source": self.markets_source.get(exchange_id),
+                "startup_ms": round(self.startup_times.get(exchange_id, 0) * 1000, 1),
+                "circuit": self.breakers[exchange_id].stats() if exchange_id in self.breakers else None
             })
         return exchanges
     
-    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict[str, Any]]:
+    def _format_ticker(self, exchange_id: str, symbol: str, ticker: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a ccxt ticker into the API ticker shape"""
+        return {
+            "exchange": exchange_id,
+            "symbol": symbol,
+            "last": ticker.get('last'),
+            "bid": ticker.get('bid'),
+            "ask": ticker.get('ask'),
+            "high": ticker.get('high'),
+            "low": ticker.get('low'),
+            "volume": ticker.get('volume'),
+            "timestamp": datetime.fromtimestamp((ticker.get('timestamp') or 0) / 1000),
+            "datetime": ticker.get('datetime') or ''
+        }
+    
+    def _last_known_tickers(self, exchange_id: str, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Get the last good tickers for symbols, flagged as stale"""
+        tickers = [self.last_tickers.get((exchange_id, symbol)) for symbol in symbols]
+        return [dict(ticker, stale=True) for ticker in tickers if ticker is not None]
+    
+    async def get_ticker(
+        self,
+        exchange_id: str,
+        symbol: str,
+        priority: int = INTERACTIVE
+    ) -> Optional[Dict[str, Any]]:
         """Get ticker data for a symbol"""
-        if exchange_id not in self.exchanges:
-            raise ValueError(f"Exchange {exchange_id} not supported")
-        
-        exchange = self.exchanges[exchange_id]
+        exchange = await self._get_exchange(exchange_id)
         
         try:
-            ticker = await asyncio.to_thread(exchange.fetch_ticker, symbol)
-            
-            return {
-                "exchange": exchange_id,
-                "symbol": symbol,
-                "last": ticker.get('last'),
-                "bid": ticker.get('bid'),
-                "ask": ticker.get('ask'),
-                "high": ticker.get('high'),
-                "low": ticker.get('low'),
-                "volume": ticker.get('volume'),
-                "timestamp": datetime.fromtimestamp(ticker.get('timestamp', 0) / 1000),
-                "datetime": ticker.get('datetime', '')
-            }
+            ticker = self._format_ticker(
+                exchange_id, symbol, await self._call(exchange, 'fetch_ticker', symbol, priority=priority)
+            )
+        except CircuitOpenError:
+            # Serve the last known value while the exchange is failing
+            stale = self._last_known_tickers(exchange_id, [symbol])
+            if not stale:
+                raise
+            return stale[0]
         except Exception as e:
             logger.error(f"Error fetching ticker for {symbol} on {exchange_id}: {str(e)}")
             raise
+        
+        self.last_tickers[(exchange_id, symbol)] = ticker
+        return ticker
+    
+    async def get_tickers(
+        self,
+        exchange_id: str,
+        symbols: Optional[List[str]] = None,
+        concurrency: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Get ticker data for many symbols in as few upstream calls as possible
+        
+        Args:
+            exchange_id: Exchange to query
+            symbols: Symbols to fetch (all symbols if None)
+            concurrency: Maximum parallel fetch_ticker calls when fetch_tickers is unavailable
+        """
+        exchange = await self._get_exchange(exchange_id)
+        
+        if getattr(exchange, 'has', {}).get('fetchTickers'):
+            try:
+                tickers = await self._call(exchange, 'fetch_tickers', symbols)
+            except CircuitOpenError:
+                stale = self._last_known_tickers(exchange_id, symbols or list(exchange.markets))
+                if not stale:
+                    raise
+                return stale
+            except Exception as e:
+                logger.error(f"Error fetching tickers on {exchange_id}: {str(e)}")
+                raise
+            
+            wanted = set(symbols) if symbols else None
+            formatted = [
+                self._format_ticker(exchange_id, symbol, ticker)
+                for symbol, ticker in tickers.items()
+                if ticker.get('last') is not None and (wanted is None or symbol in wanted)
+            ]
+            for ticker in formatted:
+                self.last_tickers[(exchange_id, ticker['symbol'])] = ticker
+            return formatted
+        
+        if not symbols:
+            raise ValueError(f"Exchange {exchange_id} does not support fetching all tickers")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_one(symbol: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    ticker = self._format_ticker(
+                        exchange_id, symbol, await self._call(exchange, 'fetch_ticker', symbol)
+                    )
+                except CircuitOpenError:
+                    stale = self._last_known_tickers(exchange_id, [symbol])
+                    return stale[0] if stale else None
+                except Exception as e:
+                    logger.warning(f"Error fetching ticker for {symbol} on {exchange_id}: {str(e)}")
+                    return None
+                self.last_tickers[(exchange_id, symbol)] = ticker
+                return ticker
+        
+        results = await asyncio.gather(*[fetch_one(symbol) for symbol in symbols])
+        return [ticker for ticker in results if ticker and ticker['last'] is not None]
+    
+    async def get_order_book(
+        self,
+        exchange_id: str,
+        symbol: str,
+        limit: Optional[int] = None,
+        priority: int = INTERACTIVE
+    ) -> Dict[str, Any]:
+        """Get an L2 order book snapshot (ccxt shape: bids and asks as [price, size], best first)"""
+        exchange = await self._get_exchange(exchange_id)
+        
+        try:
+            return await self._call(exchange, 'fetch_order_book', symbol, limit, priority=priority)
+        except Exception as e:
+            logger.error(f"Error fetching order book for {symbol} on {exchange_id}: {str(e)}")
+            raise
+    
+    async def get_cross_exchange_ticker(
+        self,
+        symbol: str,
+        deadline: float,
+        exchange_ids: Optional[List[str]] = None,
+        fetch_ticker: Optional[Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch one symbol from many exchanges concurrently, returning whatever arrives by the deadline
+        
+        Args:
+            symbol: Trading pair to compare
+            deadline: Seconds to wait before returning partial results
+            exchange_ids: Exchanges to query (all initialized exchanges if None)
+            fetch_ticker: Ticker source (defaults to get_ticker; callers may pass a cached one)
+        """
+        fetch_ticker = fetch_ticker or self.get_ticker
+        exchange_ids = exchange_ids or list(self.exchanges)
+        start = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[asyncio.Task, str] = {}
+        
+        async def timed_fetch(exchange_id: str):
+            ticker = await fetch_ticker(exchange_id, symbol)
+            return ticker, time.perf_counter() - start
+        
+        for exchange_id in exchange_ids:
+            exchange = self.exchanges.get(exchange_id)
+            if exchange is None:
+                results[exchange_id] = {"exchange": exchange_id, "status": "unsupported", "error": "Exchange not initialized"}
+            elif exchange.markets and symbol not in exchange.markets:
+                results[exchange_id] = {"exchange": exchange_id, "status": "unsupported", "error": "Symbol not listed"}
+            else:
+                tasks[asyncio.create_task(timed_fetch(exchange_id))] = exchange_id
+        
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+                exchange_id = tasks[task]
+                results[exchange_id] = {"exchange": exchange_id, "status": "timeout"}
+            for task in done:
+                exchange_id = tasks[task]
+                if task.exception() is not None:
+                    results[exchange_id] = {"exchange": exchange_id, "status": "error", "error": str(task.exception())}
+                    continue
+                ticker, latency = task.result()
+                if not ticker or ticker.get('last') is None:
+                    results[exchange_id] = {"exchange": exchange_id, "status": "error", "error": "Empty ticker"}
+                    continue
+                results[exchange_id] = {
+                    "exchange": exchange_id,
+                    "status": "ok",
+                    "latency_ms": round(latency * 1000, 1),
+                    "ticker": ticker
+                }
+        
+        tickers = [r["ticker"] for r in results.values() if r["status"] == "ok"]
+        bids = [t for t in tickers if t.get('bid') is not None]
+        asks = [t for t in tickers if t.get('ask') is not None]
+        best_bid = max(bids, key=lambda t: t['bid']) if bids else None
+        best_ask = min(asks, key=lambda t: t['ask']) if asks else None
+        
+        spread = spread_pct = None
+        if best_bid and best_ask:
+            spread = best_ask['ask'] - best_bid['bid']
+            mid = (best_ask['ask'] + best_bid['bid']) / 2
+            spread_pct = spread / mid * 100 if mid else None
+        
+        return {
+            "symbol": symbol,
+            "deadline_ms": round(deadline * 1000, 1),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "best_bid": {"exchange": best_bid['exchange'], "price": best_bid['bid']} if best_bid else None,
+            "best_ask": {"exchange": best_ask['exchange'], "price": best_ask['ask']} if best_ask else None,
+            "spread": spread,
+            "spread_pct": spread_pct,
+            "results": [results[exchange_id] for exchange_id in exchange_ids]
+        }
+    
+    def _timeframe_ms(self, timeframe: str) -> int:
+        """Get the duration of a timeframe in milliseconds"""
+        return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+    
+    def _source_timeframe(self, exchange_id: str, exchange, timeframe: str, limit: int) -> str:
+        """
+        Pick the timeframe to fetch upstream for a requested timeframe
+        
+        The coarsest base timeframe the exchange offers that evenly divides the
+        request wins, so every coarser timeframe shares one upstream series.
+        When the exchange offers the timeframe itself and building limit candles
+        would take more than one page of base candles (30m x 1000 is 30 pages of
+        1m), the timeframe is fetched natively instead. Monthly and yearly
+        candles vary in length and are always fetched natively.
+        """
+        native = getattr(exchange, 'timeframes', None)
+        if native is None or timeframe[-1] in 'My':
+            return timeframe
+        
+        tf_ms = self._timeframe_ms(timeframe)
+        candidates = [
+            base for base in self.base_timeframes
+            if base in native and tf_ms % self._timeframe_ms(base) == 0
+        ]
+        if candidates:
+            base = max(candidates, key=self._timeframe_ms)
+            if timeframe in native and limit * (tf_ms // self._timeframe_ms(base)) > OHLCV_PAGE_LIMIT:
+                return timeframe
+            return base
+        if timeframe in native:
+            return timeframe
+        raise ValueError(f"Timeframe {timeframe} not available on {exchange_id}")
+    
+    async def _get_resampled_ohlcv(
+        self,
+        exchange_id: str,
+        exchange,
+        symbol: str,
+        timeframe: str,
+        source: str,
+        limit: int,
+        since_ms: Optional[int],
+        priority: int = INTERACTIVE
+    ) -> List[List[Any]]:
+        """Build candles of timeframe from the source timeframe, fetching only the source upstream"""
+        tf_ms = self._timeframe_ms(timeframe)
+        source_ms = self._timeframe_ms(source)
+        
+        now = int(time.time() * 1000)
+        if since_ms is not None:
+            start = bucket_start(since_ms + tf_ms - 1, tf_ms)
+            end = min(start + (limit - 1) * tf_ms, bucket_start(now, tf_ms))
+        else:
+            end = bucket_start(now, tf_ms)
+            start = end - (limit - 1) * tf_ms
+        
+        # Source candles covering the last bucket in full
+        source_end = end + tf_ms - source_ms
+        if self.candle_store is not None and source_ms <= STORE_MAX_TIMEFRAME_MS:
+            count = (source_end - start) // source_ms + 1
+            rows = await self.get_ohlcv(exchange_id, symbol, source, count, start, priority)
+            rows = [c for c in rows if c[0] <= source_end]
+        else:
+            rows = await self._fetch_ohlcv_range(
+                exchange, symbol, source, start, source_end, source_ms, priority
+            )
+        
+        return resample_ohlcv(rows, tf_ms)[-limit:]
+    
+    async def _fetch_ohlcv_range(
+        self,
+        exchange,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        tf_ms: int,
+        priority: int = INTERACTIVE
+    ) -> List[List[Any]]:
+        """Page through fetch_ohlcv for candles with start <= timestamp <= end"""
+        candles = []
+        cursor = start
+        while cursor <= end:
+            limit = min((end - cursor) // tf_ms + 1, OHLCV_PAGE_LIMIT)
+            page = await self._call(exchange, 'fetch_ohlcv', symbol, timeframe, cursor, limit, priority=priority)
+            page = [c for c in page if cursor <= c[0] <= end]
+            if not page:
+                break
+            candles.extend(page)
+            cursor = page[-1][0] + tf_ms
+        return candles
+    
+    async def get_ohlcv(
+        self,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str = "1h",
+        limit: int = 100,
+        since: Optional[Union[datetime, int]] = None,
+        priority: int = INTERACTIVE
+    ) -> List[List[Any]]:
+        """
+        Get raw ccxt OHLCV rows, answering closed candles from the candle store
+        
+        Only missing ranges and the still-open candle are fetched upstream.
+        Timeframes coarser than a base timeframe (or not offered by the exchange)
+        are resampled from it. since may be a datetime or a millisecond timestamp.
+        """
+        exchange = await self._get_exchange(exchange_id)
+        if isinstance(since, datetime):
+            since_ms = int(since.timestamp() * 1000)
+        else:
+            since_ms = since
+        
+        source = self._source_timeframe(exchange_id, exchange, timeframe, limit)
+        if source != timeframe:
+            return await self._get_resampled_ohlcv(
+                exchange_id, exchange, symbol, timeframe, source, limit, since_ms, priority
+            )
+        
+        tf_ms = self._timeframe_ms(timeframe)
+        if self.candle_store is None or tf_ms > STORE_MAX_TIMEFRAME_MS:
+            return await self._call(exchange, 'fetch_ohlcv', symbol, timeframe, since_ms, limit, priority=priority)
+        
+        now = int(time.time() * 1000)
+        if since_ms is not None:
+            start = -(-since_ms // tf_ms) * tf_ms
+            end = min(start + (limit - 1) * tf_ms, now // tf_ms * tf_ms)
+        else:
+            end = now // tf_ms * tf_ms
+            start = end - (limit - 1) * tf_ms
+        
+        stored = {
+            row[0]: row for row in await asyncio.to_thread(
+                self.candle_store.get_range, exchange_id, symbol, timeframe, start, end
+            )
+        }
+        
+        # Contiguous runs of timestamps that are missing or still open
+        runs: List[List[int]] = []
+        for ts in range(start, end + 1, tf_ms):
+            if ts in stored and ts + tf_ms + CANDLE_CLOSE_GRACE_MS <= now:
+                continue
+            if runs and runs[-1][1] + tf_ms == ts:
+                runs[-1][1] = ts
+            else:
+                runs.append([ts, ts])
+        
+        candles = {ts: list(row) for ts, row in stored.items() if row[1] is not None}
+        for run_start, run_end in runs:
+            fetched = await self._fetch_ohlcv_range(
+                exchange, symbol, timeframe, run_start, run_end, tf_ms, priority
+            )
+            for candle in fetched:
+                candles[candle[0]] = candle
+            
+            closed = [c for c in fetched if c[0] + tf_ms + CANDLE_CLOSE_GRACE_MS <= now]
+            # Timestamps skipped before the last returned candle have no trades
+            returned = {c[0] for c in fetched}
+            last = fetched[-1][0] if fetched else run_start - tf_ms
+            empty = [
+                ts for ts in range(run_start, last, tf_ms)
+                if ts not in returned and ts + tf_ms + CANDLE_CLOSE_GRACE_MS <= now
+            ]
+            if closed or empty:
+                await asyncio.to_thread(self.candle_store.put, exchange_id, symbol, timeframe, closed)
+                await asyncio.to_thread(self.candle_store.mark_empty, exchange_id, symbol, timeframe, empty)
+        
+        if runs:
+            logger.debug(
+                f"Filled {len(runs)} OHLCV gap(s) for {symbol} {timeframe} on {exchange_id}; "
+                f"{len(stored)} candle(s) served from store"
+            )
+        
+        return [candles[ts] for ts in sorted(candles)][-limit:]
+    
+    async def iter_ohlcv(
+        self,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: Optional[int] = None,
+        page_limit: int = OHLCV_PAGE_LIMIT
+    ) -> AsyncIterator[List[List[Any]]]:
+        """
+        Yield pages of OHLCV rows with start_ms <= timestamp <= end_ms, oldest first
+        
+        Pages are fetched one at a time at backfill priority (rate limiting spaces
+        the upstream calls), so memory use does not grow with the length of the range.
+        """
+        tf_ms = self._timeframe_ms(timeframe)
+        end_ms = end_ms if end_ms is not None else int(time.time() * 1000)
+        cursor = start_ms
+        
+        while cursor <= end_ms:
+            page = await self.get_ohlcv(exchange_id, symbol, timeframe, page_limit, cursor, BACKFILL)
+            page = [c for c in page if cursor <= c[0] <= end_ms]
+            if page:
+                yield page
+                cursor = page[-1][0] + tf_ms
+            else:
+                # Nothing traded in this page (e.g. before listing); skip past it
+                cursor = -(-cursor // tf_ms) * tf_ms + page_limit * tf_ms
     
     async def get_historical_data(
         self,
@@ -94,24 +914,8 @@ class CryptocurrencyService:
         since: Optional[datetime] = None
     ) -> List[Dict[str, Any]]:
         """Get historical OHLCV data"""
-        if exchange_id not in self.exchanges:
-            raise ValueError(f"Exchange {exchange_id} not supported")
-        
-        exchange = self.exchanges[exchange_id]
-        
         try:
-            # Convert since to milliseconds if provided
-            since_ms = None
-            if since:
-                since_ms = int(since.timestamp() * 1000)
-            
-            ohlcv = await asyncio.to_thread(
-                exchange.fetch_ohlcv,
-                symbol,
-                timeframe,
-                since_ms,
-                limit
-            )
+            ohlcv = await self.get_ohlcv(exchange_id, symbol, timeframe, limit, since)
             
             data = []
             for candle in ohlcv:
@@ -125,15 +929,39 @@ class CryptocurrencyService:
                 })
             
             return data
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching historical data for {symbol} on {exchange_id}: {str(e)}")
             raise
     
     async def get_markets(self, exchange_id: str) -> List[str]:
         """Get all available markets for an exchange"""
-        if exchange_id not in self.exchanges:
-            raise ValueError(f"Exchange {exchange_id} not supported")
-        
-        exchange = self.exchanges[exchange_id]
+        exchange = await self._get_exchange(exchange_id)
         return list(exchange.markets.keys())
+    
+    async def search_markets(
+        self,
+        exchange_id: str,
+        query: Optional[str] = None,
+        mode: str = "substring",
+        market_type: Optional[str] = None,
+        base: Optional[str] = None,
+        quote: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """Search an exchange's markets through its index (see MarketIndex.search)"""
+        await self._get_exchange(exchange_id)
+        index = self.market_indexes.get(exchange_id)
+        if index is None:
+            index = await self._index_markets(exchange_id)
+        return dict(
+            index.search(query, mode, market_type, base, quote, cursor, limit),
+            exchange=exchange_id
+        )
+    
+    def exchanges_for_symbol(self, symbol: str) -> List[str]:
+        """Get the exchanges whose loaded markets list a symbol"""
+        return self.symbol_index.lookup(symbol)
 
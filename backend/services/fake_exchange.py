@@ -0,0 +1,257 @@
+"""
+In-process fake of an async ccxt exchange for offline benchmarks and tests
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import asyncio
+import math
+import random
+import time
+import zlib
+
+import ccxt
+
+FAKE_TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h", "1d", "1w")
+FAKE_BASES = ("BTC", "ETH", "SOL", "XRP", "ADA", "DOGE", "DOT", "LTC", "LINK", "AVAX", "ATOM", "TRX")
+FAKE_QUOTES = ("USDT", "USD", "BTC")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Build a latency sampler from a distribution spec, in seconds
+    
+    Specs are "0.05" (constant), "uniform:LOW:HIGH", "exponential:MEAN" and
+    "lognormal:MEDIAN:SIGMA" (heavy-tailed, like real exchange round trips).
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        if not params:
+            value = float(kind)
+            return lambda rng: value
+        args = [float(p) for p in params.split(":")]
+        if kind == "uniform":
+            low, high = args
+            return lambda rng: rng.uniform(low, high)
+        if kind == "exponential":
+            (mean,) = args
+            return lambda rng: rng.expovariate(1 / mean)
+        if kind == "lognormal":
+            median, sigma = args
+            return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def make_markets(count: int) -> Dict[str, Dict[str, Any]]:
+    """Build count ccxt-shaped spot markets"""
+    markets = {}
+    for i in range(count):
+        if i < len(FAKE_BASES):
+            base, quote = FAKE_BASES[i], "USDT"
+        else:
+            base, quote = f"C{i}", FAKE_QUOTES[i % len(FAKE_QUOTES)]
+        symbol = f"{base}/{quote}"
+        markets[symbol] = {
+            "id": base + quote,
+            "symbol": symbol,
+            "base": base,
+            "quote": quote,
+            "type": "spot",
+            "spot": True,
+            "active": True,
+        }
+    return markets
+
+
+class FakeExchange:
+    """
+    Stand-in for a ccxt.async_support exchange, answering from deterministic prices
+    
+    Every call sleeps for a latency drawn from a configurable distribution and
+    may fail with ccxt's own exceptions: ExchangeNotAvailable at error_rate,
+    RequestTimeout when the drawn latency exceeds the configured timeout, and
+    RateLimitExceeded (an HTTP 429) once more than max_calls_per_second arrive
+    within a second. Prices are a function of symbol and time, so runs with
+    the same seed are reproducible. Calls are counted per method.
+    """
+    
+    has = {"fetchTicker": True, "fetchTickers": True, "fetchOHLCV": True, "fetchOrderBook": True}
+    timeframes = {timeframe: timeframe for timeframe in FAKE_TIMEFRAMES}
+    
+    def __init__(
+        self,
+        exchange_id: str = "fake",
+        config: Optional[Dict[str, Any]] = None,
+        markets: int = 200,
+        latency: str = "0.02",
+        error_rate: float = 0.0,
+        max_calls_per_second: int = 0,
+        rate_limit: int = 50,
+        seed: int = 0
+    ):
+        """
+        Initialize fake exchange
+        
+        Args:
+            exchange_id: Exchange id reported to the service
+            config: ccxt config; "timeout" (ms) bounds simulated latency
+            markets: Number of markets listed
+            latency: Latency distribution spec (see parse_latency)
+            error_rate: Fraction of calls failing with ExchangeNotAvailable
+            max_calls_per_second: Calls per second beyond which calls get a 429 (0 = unlimited)
+            rate_limit: ccxt rateLimit, milliseconds between calls the exchange asks for
+            seed: Seed of latency and error draws
+        """
+        config = config or {}
+        self.id = exchange_id
+        self.name = f"Fake ({exchange_id})"
+        self.rateLimit = rate_limit
+        self.timeout = config.get("timeout", 10000)
+        self.markets: Dict[str, Dict[str, Any]] = {}
+        self.markets_by_id: Dict[str, Dict[str, Any]] = {}
+        self.currencies: Dict[str, Any] = {}
+        self.market_count = markets
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.max_calls_per_second = max_calls_per_second
+        self.random = random.Random(seed)
+        self.recent_calls: Deque[float] = deque()
+        self.calls: Dict[str, int] = {}
+        self.errors = 0
+        self.rate_limited = 0
+    
+    async def _request(self, method: str) -> None:
+        """Count a call and simulate its round trip, failing like an exchange would"""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        latency = self.latency(self.random)
+        
+        if self.max_calls_per_second:
+            now = time.monotonic()
+            while self.recent_calls and self.recent_calls[0] <= now - 1.0:
+                self.recent_calls.popleft()
+            if len(self.recent_calls) >= self.max_calls_per_second:
+                self.rate_limited += 1
+                await asyncio.sleep(latency)
+                raise ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests")
+            self.recent_calls.append(now)
+        
+        if latency * 1000 > self.timeout:
+            await asyncio.sleep(self.timeout / 1000)
+            self.errors += 1
+            raise ccxt.RequestTimeout(f"{self.id} {method} timed out ({self.timeout} ms)")
+        await asyncio.sleep(latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            raise ccxt.ExchangeNotAvailable(f"{self.id} {method} failed (simulated)")
+    
+    def set_markets(self, markets: Dict[str, Dict[str, Any]], currencies: Optional[Dict[str, Any]] = None):
+        """Install markets without a call, as ccxt does for snapshots"""
+        self.markets = markets
+        self.markets_by_id = {market.get("id") or symbol: market for symbol, market in markets.items()}
+        self.currencies = currencies or {}
+        return markets
+    
+    async def load_markets(self, reload: bool = False) -> Dict[str, Dict[str, Any]]:
+        if self.markets and not reload:
+            return self.markets
+        await self._request("load_markets")
+        return self.set_markets(make_markets(self.market_count))
+    
+    def _market(self, symbol: str) -> Dict[str, Any]:
+        """Resolve a unified symbol or exchange market id"""
+        market = self.markets.get(symbol) or self.markets_by_id.get(symbol)
+        if market is None:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+        return market
+    
+    @staticmethod
+    def _price(symbol: str, timestamp: int) -> float:
+        """Deterministic price of a symbol at a millisecond timestamp"""
+        seed = zlib.crc32(symbol.encode())
+        base = 10 ** (seed % 5) * (1 + seed % 97 / 100)
+        phase = seed % 628 / 100
+        hours = timestamp / 3_600_000
+        return round(base * (1 + 0.05 * math.sin(hours / 24 + phase) + 0.005 * math.sin(hours * 60 + phase)), 8)
+    
+    @classmethod
+    def ticker_at(cls, symbol: str, timestamp: int) -> Dict[str, Any]:
+        """Build the ccxt ticker of a symbol at a millisecond timestamp"""
+        last = cls._price(symbol, timestamp)
+        return {
+            "symbol": symbol,
+            "timestamp": timestamp,
+            "datetime": ccxt.Exchange.iso8601(timestamp),
+            "last": last,
+            "bid": round(last * 0.9999, 8),
+            "ask": round(last * 1.0001, 8),
+            "high": round(last * 1.02, 8),
+            "low": round(last * 0.98, 8),
+            "volume": round(1000 + zlib.crc32(symbol.encode()) % 10000 + timestamp % 1000, 4),
+        }
+    
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        market = self._market(symbol)
+        await self._request("fetch_ticker")
+        return self.ticker_at(market["symbol"], int(time.time() * 1000))
+    
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        markets = [self._market(symbol) for symbol in symbols] if symbols else list(self.markets.values())
+        await self._request("fetch_tickers")
+        now = int(time.time() * 1000)
+        return {market["symbol"]: self.ticker_at(market["symbol"], now) for market in markets}
+    
+    async def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1m",
+        since: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[List[Any]]:
+        market = self._market(symbol)
+        if timeframe not in self.timeframes:
+            raise ccxt.BadRequest(f"{self.id} does not support timeframe {timeframe}")
+        await self._request("fetch_ohlcv")
+        
+        step = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        limit = min(limit or 500, 1000)
+        now = int(time.time() * 1000)
+        if since is None:
+            since = (now // step - limit + 1) * step
+        start = -(-since // step) * step
+        candles = []
+        for timestamp in range(start, min(start + limit * step, now + 1), step):
+            prices = [self._price(market["symbol"], timestamp + step * i // 4) for i in range(5)]
+            candles.append([
+                timestamp, prices[0], max(prices), min(prices), prices[-1],
+                round(100 + timestamp // step % 50, 4)
+            ])
+        return candles
+    
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        market = self._market(symbol)
+        await self._request("fetch_order_book")
+        now = int(time.time() * 1000)
+        mid = self._price(market["symbol"], now)
+        depth = limit or 100
+        return {
+            "symbol": market["symbol"],
+            "bids": [[round(mid * (1 - 0.0001 * (i + 1)), 8), round(1 + i * 0.1, 4)] for i in range(depth)],
+            "asks": [[round(mid * (1 + 0.0001 * (i + 1)), 8), round(1 + i * 0.1, 4)] for i in range(depth)],
+            "timestamp": now,
+            "datetime": ccxt.Exchange.iso8601(now),
+            "nonce": now,
+        }
+    
+    async def close(self) -> None:
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get call counts per method and simulated failures"""
+        return {
+            "calls": dict(self.calls),
+            "total_calls": sum(self.calls.values()),
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+        }
@@ -0,0 +1,156 @@
+"""
+Local stand-in for an exchange ticker push feed, for tests and offline runs
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import random
+import socket
+import time
+
+from aiohttp import WSMsgType, web
+
+from services.fake_exchange import FakeExchange
+from services.order_book import OrderBook
+
+
+class FakeTickerFeed:
+    """
+    WebSocket server speaking the JsonFeedAdapter protocol with FakeExchange prices
+    
+    Every interval each subscribed symbol gets a ticker with the next sequence
+    number of that symbol. Sequence numbers are kept across connections, and
+    with drop_every = n every nth update is skipped, so clients can be tested
+    against gaps; disconnect() drops every client to exercise reconnects.
+    
+    Book subscriptions get a snapshot of a price grid around the symbol's
+    price, then every interval a delta changing book_changes random levels,
+    with seq, prev_seq and the book checksum (drop_every applies to deltas).
+    """
+    
+    def __init__(self, interval: float = 0.05, drop_every: int = 0, book_changes: int = 5):
+        """
+        Initialize fake ticker feed
+        
+        Args:
+            interval: Seconds between updates of each symbol
+            drop_every: Skip every nth update of a symbol (0 = never)
+            book_changes: Levels changed per book delta
+        """
+        self.interval = interval
+        self.drop_every = drop_every
+        self.book_changes = book_changes
+        self.sequences: Dict[Tuple[str, str], int] = {}
+        self.sockets: Set[web.WebSocketResponse] = set()
+        self.sent = 0
+        self.runner: Optional[web.AppRunner] = None
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the feed URL"""
+        app = web.Application()
+        app.router.add_get("/feed", self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind((host, port))
+        await web.SockSite(self.runner, sock).start()
+        return f"ws://{host}:{sock.getsockname()[1]}/feed"
+    
+    async def stop(self) -> None:
+        """Drop clients and stop serving"""
+        await self.disconnect()
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+    
+    async def disconnect(self) -> None:
+        """Close every client connection"""
+        for ws in list(self.sockets):
+            await ws.close()
+    
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+        senders: List[asyncio.Task] = []
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    break
+                data = json.loads(message.data)
+                if data.get("action") == "subscribe":
+                    senders.append(asyncio.create_task(self._send(ws, data.get("exchange", "fake"), data["symbols"])))
+                elif data.get("action") == "subscribe_book":
+                    senders.append(asyncio.create_task(
+                        self._send_book(ws, data.get("exchange", "fake"), data["symbol"], data.get("depth", 100))
+                    ))
+        finally:
+            self.sockets.discard(ws)
+            for sender in senders:
+                sender.cancel()
+        return ws
+    
+    async def _send(self, ws: web.WebSocketResponse, exchange: str, symbols: List[str]) -> None:
+        """Push tickers of symbols to one client until it goes away"""
+        try:
+            while not ws.closed:
+                now = int(time.time() * 1000)
+                for symbol in symbols:
+                    seq = self.sequences[(exchange, symbol)] = self.sequences.get((exchange, symbol), 0) + 1
+                    if self.drop_every and seq % self.drop_every == 0:
+                        continue
+                    await ws.send_str(json.dumps({
+                        "type": "ticker",
+                        "symbol": symbol,
+                        "seq": seq,
+                        "data": FakeExchange.ticker_at(symbol, now),
+                    }))
+                    self.sent += 1
+                await asyncio.sleep(self.interval)
+        except ConnectionResetError:
+            pass
+    
+    async def _send_book(self, ws: web.WebSocketResponse, exchange: str, symbol: str, depth: int) -> None:
+        """Push a book snapshot and then deltas of one symbol to one client"""
+        now = int(time.time() * 1000)
+        mid = FakeExchange.ticker_at(symbol, now)["last"]
+        grid = {
+            "bids": [round(mid * (1 - 0.0001 * (i + 1)), 8) for i in range(depth)],
+            "asks": [round(mid * (1 + 0.0001 * (i + 1)), 8) for i in range(depth)],
+        }
+        book = OrderBook(exchange, symbol)
+        seq = self.sequences[(exchange, f"book:{symbol}")] = self.sequences.get((exchange, f"book:{symbol}"), 0) + 1
+        book.apply_snapshot(
+            [[price, round(1 + i * 0.1, 4)] for i, price in enumerate(grid["bids"])],
+            [[price, round(1 + i * 0.1, 4)] for i, price in enumerate(grid["asks"])],
+            seq, now
+        )
+        rng = random.Random(seq)
+        try:
+            await ws.send_str(json.dumps(dict(book.snapshot(), type="book_snapshot")))
+            while not ws.closed:
+                await asyncio.sleep(self.interval)
+                changes = {"bids": [], "asks": []}
+                for _ in range(self.book_changes):
+                    side = rng.choice(("bids", "asks"))
+                    size = rng.choice((0.0, round(rng.uniform(0.1, 5.0), 4)))
+                    changes[side].append([rng.choice(grid[side]), size])
+                prev_seq = seq
+                seq = self.sequences[(exchange, f"book:{symbol}")] = seq + 1
+                book.apply_delta(changes["bids"], changes["asks"], seq)
+                if self.drop_every and seq % self.drop_every == 0:
+                    continue
+                await ws.send_str(json.dumps({
+                    "type": "book_delta",
+                    "symbol": symbol,
+                    "seq": seq,
+                    "prev_seq": prev_seq,
+                    "checksum": book.checksum(),
+                    "timestamp": int(time.time() * 1000),
+                    "bids": changes["bids"],
+                    "asks": changes["asks"],
+                }))
+                self.sent += 1
+        except ConnectionResetError:
+            pass
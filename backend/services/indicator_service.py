@@ -0,0 +1,189 @@
+"""
+Technical indicators over exchange candles, updated incrementally as candles close
+"""
+
+from cachetools import LRUCache
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import ccxt
+import logging
+import math
+import time
+
+import numpy as np
+
+from services.crypto_service import CryptocurrencyService
+from services.indicators import Indicator
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorSeries:
+    """Closed-candle indicator values and rolling state for one series"""
+    
+    def __init__(self, indicators: List[Indicator]):
+        self.indicators = indicators
+        self.timestamps: List[int] = []
+        self.columns: Dict[str, List[float]] = {
+            column: [] for indicator in indicators for column in indicator.columns
+        }
+        self.states: List[Any] = []
+        self.last_closed: Optional[int] = None
+        self.lock = asyncio.Lock()
+    
+    def reset(self, candles: List[List[Any]], max_points: int) -> None:
+        """Recompute every indicator over closed candles in one vectorized pass"""
+        data = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        self.states = []
+        for indicator in self.indicators:
+            columns, state = indicator.compute(data)
+            for column, values in columns.items():
+                self.columns[column] = values[-max_points:].tolist()
+            self.states.append(state)
+        self.timestamps = [int(c[0]) for c in candles[-max_points:]]
+        self.last_closed = int(candles[-1][0]) if candles else None
+    
+    def preview(self, candle: List[Any]) -> Tuple[Dict[str, float], List[Any]]:
+        """Values for one more candle and the states after it, leaving the series untouched"""
+        values: Dict[str, float] = {}
+        states = []
+        for indicator, state in zip(self.indicators, self.states):
+            indicator_values, state = indicator.step(state, candle)
+            values.update(indicator_values)
+            states.append(state)
+        return values, states
+    
+    def append(self, candle: List[Any], max_points: int) -> None:
+        """Fold a newly closed candle into the series"""
+        values, self.states = self.preview(candle)
+        self.timestamps.append(int(candle[0]))
+        for column, value in values.items():
+            self.columns[column].append(value)
+        if len(self.timestamps) > max_points:
+            del self.timestamps[0]
+            for column in self.columns.values():
+                del column[0]
+        self.last_closed = int(candle[0])
+
+
+class IndicatorService:
+    """Indicator series cached per (exchange, symbol, timeframe, indicator params)"""
+    
+    def __init__(
+        self,
+        crypto_service: CryptocurrencyService,
+        max_points: int = 1000,
+        max_series: int = 256
+    ):
+        """
+        Initialize indicator service
+        
+        Args:
+            crypto_service: Source of OHLCV candles
+            max_points: Closed values kept per series (largest servable limit)
+            max_series: Series kept before the least recently used is dropped
+        """
+        self.crypto_service = crypto_service
+        self.max_points = max_points
+        self.series: LRUCache = LRUCache(maxsize=max_series)
+        self.full_computes = 0
+        self.incremental_updates = 0
+    
+    async def _recompute(
+        self,
+        series: IndicatorSeries,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str,
+        tf_ms: int,
+        now: int
+    ) -> List[List[Any]]:
+        """Fetch the whole window (plus warm-up) and recompute; returns any open candle"""
+        warmup = max(indicator.warmup for indicator in series.indicators)
+        candles = await self.crypto_service.get_ohlcv(
+            exchange_id, symbol, timeframe, self.max_points + warmup
+        )
+        closed = [c for c in candles if c[0] + tf_ms <= now]
+        series.reset(closed, self.max_points)
+        self.full_computes += 1
+        return candles[len(closed):]
+    
+    async def _update(
+        self,
+        series: IndicatorSeries,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str,
+        tf_ms: int,
+        now: int
+    ) -> List[List[Any]]:
+        """Fold candles closed since the last update into the series; returns any open candle"""
+        pending = (now - series.last_closed) // tf_ms
+        if pending > self.max_points:
+            return await self._recompute(series, exchange_id, symbol, timeframe, tf_ms, now)
+        
+        candles = await self.crypto_service.get_ohlcv(
+            exchange_id, symbol, timeframe, pending, series.last_closed + tf_ms
+        )
+        candles = [c for c in candles if c[0] > series.last_closed]
+        closed = [c for c in candles if c[0] + tf_ms <= now]
+        for candle in closed:
+            series.append(candle, self.max_points)
+        if closed:
+            self.incremental_updates += 1
+        return candles[len(closed):]
+    
+    async def get_indicators(
+        self,
+        exchange_id: str,
+        symbol: str,
+        timeframe: str,
+        indicators: List[Indicator],
+        limit: int = 200
+    ) -> Dict[str, Any]:
+        """
+        Get the last limit indicator values, the still-open candle included
+        
+        The first request for a series computes it in one vectorized pass; later
+        requests only fetch and fold in candles that closed since.
+        """
+        key = (exchange_id, symbol, timeframe, tuple(indicator.name for indicator in indicators))
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = IndicatorSeries(indicators)
+        
+        tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        async with series.lock:
+            now = int(time.time() * 1000)
+            if series.last_closed is None:
+                open_candles = await self._recompute(series, exchange_id, symbol, timeframe, tf_ms, now)
+            else:
+                open_candles = await self._update(series, exchange_id, symbol, timeframe, tf_ms, now)
+            
+            timestamps = series.timestamps[-limit:]
+            columns = {column: values[-limit:] for column, values in series.columns.items()}
+            for candle in open_candles[-1:]:
+                values, _ = series.preview(candle)
+                timestamps = (timestamps + [int(candle[0])])[-limit:]
+                columns = {
+                    column: (columns[column] + [values[column]])[-limit:] for column in columns
+                }
+        
+        return {
+            "exchange": exchange_id,
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "timestamp": timestamps,
+            "indicators": {
+                column: [None if math.isnan(value) else value for value in values]
+                for column, values in columns.items()
+            }
+        }
+    
+    def stats(self) -> Dict[str, int]:
+        """Get series cache statistics"""
+        return {
+            "series": len(self.series),
+            "full_computes": self.full_computes,
+            "incremental_updates": self.incremental_updates
+        }
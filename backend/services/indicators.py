@@ -0,0 +1,320 @@
+"""
+Vectorized technical indicators over OHLCV rows, with incremental updates
+
+Each indicator computes its full series in one NumPy pass and returns the rolling
+state needed to extend it; step() folds one more candle into that state without
+mutating it, so the still-open candle can be previewed and discarded.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+import math
+
+import numpy as np
+
+DAY_MS = 86_400_000
+# Largest exponent of decay ** -k used per block of the vectorized EWM
+EWM_BLOCK_EXPONENT = 300.0
+
+Columns = Dict[str, np.ndarray]
+Values = Dict[str, float]
+
+
+def _ewm(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """Compute y[i] = (1 - alpha) * y[i-1] + alpha * values[i] with y[-1] = initial"""
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        return values.copy()
+    
+    # Closed form per block; blocks keep decay ** -k well inside float64 range
+    block = max(1, int(EWM_BLOCK_EXPONENT / -math.log(decay)))
+    out = np.empty_like(values)
+    prev = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (prev + alpha * np.cumsum(chunk / powers))
+        prev = out[start + len(chunk) - 1]
+    return out
+
+
+def _rolling_windows(values: np.ndarray, period: int) -> np.ndarray:
+    """Get a (len - period + 1, period) view of sliding windows"""
+    return np.lib.stride_tricks.sliding_window_view(values, period)
+
+
+def _pad(values: np.ndarray, length: int) -> np.ndarray:
+    """Left-pad values with NaN up to length"""
+    return np.concatenate([np.full(length - len(values), np.nan), values])
+
+
+def _format_number(value: float) -> str:
+    """Format a parameter for use in a column name"""
+    return f"{value:g}"
+
+
+class Indicator:
+    """Base class for indicators"""
+    
+    name = ""
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Output column names"""
+        return (self.name,)
+    
+    @property
+    def warmup(self) -> int:
+        """Extra leading candles needed before values are accurate"""
+        return 0
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        """Compute every column over an (n, 6) OHLCV array and return the final state"""
+        raise NotImplementedError
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        """Fold one candle into state, returning its values and the new state"""
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """Simple moving average of close"""
+    
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.name = f"sma_{period}"
+    
+    @property
+    def warmup(self) -> int:
+        return self.period
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        close = data[:, 4]
+        values = np.full(len(close), np.nan)
+        if len(close) >= self.period:
+            values = _pad(_rolling_windows(close, self.period).mean(axis=1), len(close))
+        return {self.name: values}, tuple(close[-self.period:].tolist())
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        window = (state + (candle[4],))[-self.period:]
+        value = sum(window) / self.period if len(window) == self.period else math.nan
+        return {self.name: value}, window
+
+
+class EMA(Indicator):
+    """Exponential moving average of close, seeded with the first close"""
+    
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.name = f"ema_{period}"
+    
+    @property
+    def warmup(self) -> int:
+        return 3 * self.period
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        close = data[:, 4]
+        if len(close) == 0:
+            return {self.name: close.copy()}, (None, 0)
+        
+        values = _ewm(close, self.alpha, close[0])
+        state = (float(values[-1]), len(close))
+        values[:self.period - 1] = np.nan
+        return {self.name: values}, state
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        ema, count = state
+        close = candle[4]
+        ema = close if ema is None else ema + self.alpha * (close - ema)
+        count += 1
+        return {self.name: ema if count >= self.period else math.nan}, (ema, count)
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing"""
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.alpha = 1.0 / period
+        self.name = f"rsi_{period}"
+    
+    @property
+    def warmup(self) -> int:
+        return 3 * self.period
+    
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        """RSI from average gain and loss (100 when there are no losses)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        close = data[:, 4]
+        values = np.full(len(close), np.nan)
+        if len(close) < 2:
+            prev = float(close[-1]) if len(close) else None
+            return {self.name: values}, (prev, None, None, 0)
+        
+        change = np.diff(close)
+        gains = np.clip(change, 0.0, None)
+        losses = np.clip(-change, 0.0, None)
+        avg_gain = _ewm(gains, self.alpha, gains[0])
+        avg_loss = _ewm(losses, self.alpha, losses[0])
+        
+        values[1:] = self._rsi(avg_gain, avg_loss)
+        values[:self.period] = np.nan
+        state = (float(close[-1]), float(avg_gain[-1]), float(avg_loss[-1]), len(change))
+        return {self.name: values}, state
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        prev, avg_gain, avg_loss, count = state
+        close = candle[4]
+        if prev is None:
+            return {self.name: math.nan}, (close, None, None, 0)
+        
+        gain = max(close - prev, 0.0)
+        loss = max(prev - close, 0.0)
+        if avg_gain is None:
+            avg_gain, avg_loss = gain, loss
+        else:
+            avg_gain += self.alpha * (gain - avg_gain)
+            avg_loss += self.alpha * (loss - avg_loss)
+        count += 1
+        
+        value = float(self._rsi(avg_gain, avg_loss)) if count >= self.period else math.nan
+        return {self.name: value}, (close, avg_gain, avg_loss, count)
+
+
+class BollingerBands(Indicator):
+    """Bollinger bands: SMA of close plus/minus k population standard deviations"""
+    
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.period = period
+        self.k = k
+        self.suffix = f"{period}_{_format_number(k)}"
+        self.name = f"bbands_{self.suffix}"
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (f"bb_upper_{self.suffix}", f"bb_middle_{self.suffix}", f"bb_lower_{self.suffix}")
+    
+    @property
+    def warmup(self) -> int:
+        return self.period
+    
+    def _bands(self, middle, std) -> Tuple:
+        """Upper, middle and lower band"""
+        return middle + self.k * std, middle, middle - self.k * std
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        close = data[:, 4]
+        state = tuple(close[-self.period:].tolist())
+        if len(close) < self.period:
+            return {column: np.full(len(close), np.nan) for column in self.columns}, state
+        
+        windows = _rolling_windows(close, self.period)
+        bands = self._bands(windows.mean(axis=1), windows.std(axis=1))
+        return {column: _pad(band, len(close)) for column, band in zip(self.columns, bands)}, state
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        window = (state + (candle[4],))[-self.period:]
+        if len(window) < self.period:
+            return {column: math.nan for column in self.columns}, window
+        
+        values = np.asarray(window)
+        bands = self._bands(float(values.mean()), float(values.std()))
+        return dict(zip(self.columns, bands)), window
+
+
+class VWAP(Indicator):
+    """
+    Volume-weighted average of the typical price, reset at 00:00 UTC each day
+    
+    Values are NaN until the first session start in the data, so they do not
+    depend on where the window begins.
+    """
+    
+    name = "vwap"
+    
+    def compute(self, data: np.ndarray) -> Tuple[Columns, Any]:
+        if len(data) == 0:
+            return {self.name: np.empty(0)}, (None, 0.0, 0.0, False)
+        
+        ts = data[:, 0].astype(np.int64)
+        day = ts // DAY_MS
+        volume = np.nan_to_num(data[:, 5])
+        pv = (data[:, 2] + data[:, 3] + data[:, 4]) / 3.0 * volume
+        
+        # Index of the first candle of each row's day
+        new_day = np.r_[True, day[1:] != day[:-1]]
+        day_start = np.maximum.accumulate(np.where(new_day, np.arange(len(day)), 0))
+        cum_pv = np.cumsum(pv)
+        cum_v = np.cumsum(volume)
+        session_pv = cum_pv - np.r_[0.0, cum_pv][day_start]
+        session_v = cum_v - np.r_[0.0, cum_v][day_start]
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(session_v > 0, session_pv / session_v, np.nan)
+        complete = bool(ts[0] % DAY_MS == 0)
+        if not complete:
+            partial = day == day[0]
+            values[partial] = np.nan
+            complete = not partial[-1]
+        return {self.name: values}, (int(day[-1]), float(session_pv[-1]), float(session_v[-1]), complete)
+    
+    def step(self, state: Any, candle: Sequence[float]) -> Tuple[Values, Any]:
+        day, session_pv, session_v, complete = state
+        candle_day = int(candle[0]) // DAY_MS
+        if candle_day != day:
+            session_pv, session_v = 0.0, 0.0
+            complete = day is not None or int(candle[0]) % DAY_MS == 0
+        
+        volume = candle[5] or 0.0
+        session_pv += (candle[2] + candle[3] + candle[4]) / 3.0 * volume
+        session_v += volume
+        value = session_pv / session_v if complete and session_v > 0 else math.nan
+        return {self.name: value}, (candle_day, session_pv, session_v, complete)
+
+
+INDICATORS = {
+    "sma": (SMA, (int,)),
+    "ema": (EMA, (int,)),
+    "rsi": (RSI, (int,)),
+    "bbands": (BollingerBands, (int, float)),
+    "vwap": (VWAP, ())
+}
+
+
+def parse_indicators(spec: str) -> List[Indicator]:
+    """
+    Parse a comma-separated indicator list such as "sma:20,ema:50,rsi:14,bbands:20:2,vwap"
+    
+    Omitted parameters take the indicator defaults.
+    """
+    indicators: Dict[str, Indicator] = {}
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        
+        name, *params = item.split(":")
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        
+        cls, types = INDICATORS[name]
+        if len(params) > len(types):
+            raise ValueError(f"Too many parameters for {name}")
+        try:
+            args = [cast(param) for cast, param in zip(types, params)]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {item}")
+        if any(arg <= 0 for arg in args) or (args and args[0] > 1000):
+            raise ValueError(f"Invalid parameters for {name}: {item}")
+        
+        indicator = cls(*args)
+        indicators[indicator.name] = indicator
+    
+    if not indicators:
+        raise ValueError("No indicators requested")
+    return list(indicators.values())
+
@@ -0,0 +1,148 @@
+"""
+Searchable market indexes per exchange and a symbol-to-exchanges index
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+SEARCH_FIELDS = ("symbol", "base", "quote")
+
+
+class MarketIndex:
+    """
+    Markets of one exchange sorted by symbol, with lookup tables for search
+    
+    Built once per markets load. Prefix search bisects sorted (key, position)
+    lists per field, substring search scans one precomputed lowercase string
+    per market, and type/base/quote filters are dictionary lookups. Results
+    are in symbol order, so a page ends at a symbol that resumes the next one.
+    """
+    
+    def __init__(self, markets: Dict[str, Dict[str, Any]]):
+        """
+        Build index
+        
+        Args:
+            markets: ccxt markets by symbol
+        """
+        entries = []
+        for symbol, market in markets.items():
+            market = market or {}
+            entries.append({
+                "symbol": market.get("symbol") or symbol,
+                "base": market.get("base") or "",
+                "quote": market.get("quote") or "",
+                "type": market.get("type"),
+                "active": market.get("active"),
+            })
+        entries.sort(key=lambda entry: entry["symbol"])
+        
+        self.entries = entries
+        self.symbols = [entry["symbol"] for entry in entries]
+        self.prefix_keys = {
+            field: sorted((entry[field].lower(), i) for i, entry in enumerate(entries))
+            for field in SEARCH_FIELDS
+        }
+        self.haystacks = ["\0".join(entry[field].lower() for field in SEARCH_FIELDS) for entry in entries]
+        self.by_type = self._positions(entries, "type")
+        self.by_base = self._positions(entries, "base")
+        self.by_quote = self._positions(entries, "quote")
+    
+    @staticmethod
+    def _positions(entries: List[Dict[str, Any]], field: str) -> Dict[str, List[int]]:
+        """Group entry positions by the lowercased value of a field"""
+        positions: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            if entry[field]:
+                positions.setdefault(entry[field].lower(), []).append(i)
+        return positions
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        """Positions whose symbol, base or quote starts with prefix"""
+        matches: Set[int] = set()
+        for keys in self.prefix_keys.values():
+            i = bisect_left(keys, (prefix,))
+            while i < len(keys) and keys[i][0].startswith(prefix):
+                matches.add(keys[i][1])
+                i += 1
+        return matches
+    
+    def search(
+        self,
+        query: Optional[str] = None,
+        mode: str = "substring",
+        market_type: Optional[str] = None,
+        base: Optional[str] = None,
+        quote: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Find markets, one page at a time
+        
+        Args:
+            query: Text matched case-insensitively against symbol, base and quote
+            mode: "prefix" or "substring" matching of query
+            market_type: Only markets of this type (spot, swap, future, option)
+            base: Only markets with this base currency
+            quote: Only markets with this quote currency
+            cursor: next_cursor of the previous page
+            limit: Maximum markets returned
+        
+        Returns:
+            Page of markets, total matches and the cursor of the next page (None on the last)
+        """
+        if mode not in ("prefix", "substring"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        candidates: Optional[Set[int]] = None
+        for table, value in ((self.by_type, market_type), (self.by_base, base), (self.by_quote, quote)):
+            if value:
+                matches = set(table.get(value.lower(), ()))
+                candidates = matches if candidates is None else candidates & matches
+        if query:
+            text = query.lower()
+            if mode == "prefix":
+                matches = self._prefix_matches(text)
+            else:
+                pool: Iterable[int] = candidates if candidates is not None else range(len(self.entries))
+                matches = {i for i in pool if text in self.haystacks[i]}
+            candidates = matches if candidates is None else candidates & matches
+        
+        positions = sorted(candidates) if candidates is not None else range(len(self.entries))
+        start = bisect_left(positions, bisect_right(self.symbols, cursor)) if cursor else 0
+        page = positions[start:start + limit]
+        more = start + limit < len(positions)
+        return {
+            "markets": [self.entries[i] for i in page],
+            "total": len(positions),
+            "next_cursor": self.symbols[page[-1]] if page and more else None,
+        }
+
+
+class SymbolIndex:
+    """Exchanges listing each symbol, kept in step with their market indexes"""
+    
+    def __init__(self):
+        self.exchanges: Dict[str, Set[str]] = {}
+        self.symbols_by_exchange: Dict[str, Set[str]] = {}
+    
+    def update(self, exchange_id: str, symbols: Iterable[str]) -> None:
+        """Replace the symbols an exchange lists"""
+        new = set(symbols)
+        old = self.symbols_by_exchange.get(exchange_id, set())
+        for symbol in old - new:
+            listed = self.exchanges[symbol]
+            listed.discard(exchange_id)
+            if not listed:
+                del self.exchanges[symbol]
+        for symbol in new - old:
+            self.exchanges.setdefault(symbol, set()).add(exchange_id)
+        self.symbols_by_exchange[exchange_id] = new
+    
+    def lookup(self, symbol: str) -> List[str]:
+        """Get the exchanges listing a symbol"""
+        return sorted(self.exchanges.get(symbol, ()))
@@ -0,0 +1,73 @@
+"""
+Versioned on-disk snapshot of exchange markets for fast warm starts
+"""
+
+import ccxt
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes so stale files are ignored
+SNAPSHOT_VERSION = 1
+
+
+class MarketsSnapshot:
+    """Reads and writes the markets/currencies of each exchange as one JSON file"""
+    
+    def __init__(self, path: str):
+        """
+        Initialize markets snapshot
+        
+        Args:
+            path: Snapshot file location
+        """
+        self.path = path
+    
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load markets per exchange id
+        
+        Returns an empty dict when the file is missing, unreadable, or was
+        written by another snapshot version or ccxt release.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable markets snapshot {self.path}: {str(e)}")
+            return {}
+        
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("ccxt_version") != ccxt.__version__:
+            logger.info(f"Ignoring markets snapshot {self.path} from another version")
+            return {}
+        
+        return snapshot.get("exchanges", {})
+    
+    def save(self, exchanges: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the snapshot with the given markets per exchange id"""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "ccxt_version": ccxt.__version__,
+            "created": time.time(),
+            "exchanges": exchanges,
+        }
+        
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
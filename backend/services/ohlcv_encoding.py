@@ -0,0 +1,99 @@
+"""
+Encoders for raw ccxt OHLCV rows
+"""
+
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import json
+import struct
+import sys
+
+CSV_HEADER = "timestamp,datetime,open,high,low,close,volume\n"
+
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.ohlcv.columnar+json"
+BINARY_MEDIA_TYPE = "application/vnd.ohlcv.binary"
+
+# Binary layout: header, then n int64 timestamps, then n float64 per open/high/low/close/volume,
+# all little-endian. Header is magic, format version, 2 pad bytes, candle count and 4 reserved
+# bytes: 16 bytes, so every column starts 8-byte aligned and can be viewed in place
+# (Float64Array(buf, offset, n), np.frombuffer(buf, "<f8", n, offset)).
+BINARY_MAGIC = b"OHLC"
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct("<4sH2xI4x")
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _iso(ts: int) -> str:
+    """Format a millisecond timestamp as an ISO 8601 UTC string"""
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def encode_ndjson(candles: List[List[Any]]) -> bytes:
+    """Encode candles as newline-delimited JSON objects"""
+    return "".join(
+        json.dumps({
+            "timestamp": c[0],
+            "datetime": _iso(c[0]),
+            "open": c[1],
+            "high": c[2],
+            "low": c[3],
+            "close": c[4],
+            "volume": c[5]
+        }) + "\n"
+        for c in candles
+    ).encode()
+
+
+def encode_csv(candles: List[List[Any]]) -> bytes:
+    """Encode candles as CSV rows (without header)"""
+    return "".join(
+        f"{c[0]},{_iso(c[0])},{c[1]},{c[2]},{c[3]},{c[4]},{c[5]}\n"
+        for c in candles
+    ).encode()
+
+
+def encode_columnar_json(candles: List[List[Any]], meta: Dict[str, Any]) -> bytes:
+    """Encode candles as parallel arrays, one per field"""
+    columns = dict(meta)
+    columns["timestamp"] = [c[0] for c in candles]
+    for i, field in enumerate(FIELDS, start=1):
+        columns[field] = [c[i] for c in candles]
+    return json.dumps(columns, separators=(",", ":")).encode()
+
+
+def _little_endian(values: array) -> bytes:
+    """Get array bytes in little-endian order"""
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_binary(candles: List[List[Any]]) -> bytes:
+    """Encode candles as packed little-endian int64/float64 columns (missing values become NaN)"""
+    nan = float("nan")
+    parts = [
+        BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(candles)),
+        _little_endian(array("q", (int(c[0]) for c in candles)))
+    ]
+    for i in range(1, len(FIELDS) + 1):
+        parts.append(_little_endian(array("d", (nan if c[i] is None else c[i] for c in candles))))
+    return b"".join(parts)
+
+
+def decode_binary(payload: bytes) -> Dict[str, List[Any]]:
+    """Decode a binary payload back into columns"""
+    magic, version, count = BINARY_HEADER.unpack_from(payload)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not an OHLCV binary payload of a supported version")
+    
+    offset = BINARY_HEADER.size
+    columns: Dict[str, List[Any]] = {}
+    for field, typecode in (("timestamp", "q"),) + tuple((f, "d") for f in FIELDS):
+        values = array(typecode)
+        values.frombytes(payload[offset:offset + count * 8])
+        if sys.byteorder == "big":
+            values.byteswap()
+        columns[field] = values.tolist()
+        offset += count * 8
+    return columns
@@ -0,0 +1,55 @@
+"""
+Vectorized resampling of OHLCV rows into coarser timeframes
+"""
+
+from typing import Any, List, Sequence
+
+import numpy as np
+
+DAY_MS = 86_400_000
+WEEK_MS = 7 * DAY_MS
+# Exchanges open weekly candles on Monday 00:00 UTC; the epoch fell on a Thursday
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def bucket_offset(timeframe_ms: int) -> int:
+    """Get the alignment offset from the epoch for buckets of a timeframe"""
+    return WEEK_OFFSET_MS if timeframe_ms % WEEK_MS == 0 else 0
+
+
+def bucket_start(ts: int, timeframe_ms: int) -> int:
+    """Get the start of the bucket containing a millisecond timestamp"""
+    offset = bucket_offset(timeframe_ms)
+    return (ts - offset) // timeframe_ms * timeframe_ms + offset
+
+
+def resample_ohlcv(candles: Sequence[Sequence[Any]], timeframe_ms: int) -> List[List[Any]]:
+    """
+    Aggregate finer candles into buckets of timeframe_ms
+    
+    Candles must be sorted by timestamp. open is the first open in the bucket,
+    high the max, low the min, close the last close and volume the sum. Buckets
+    without source candles are omitted, as exchanges do.
+    """
+    if len(candles) == 0:
+        return []
+    
+    data = np.asarray(candles, dtype=np.float64)
+    ts = data[:, 0].astype(np.int64)
+    offset = bucket_offset(timeframe_ms)
+    buckets = (ts - offset) // timeframe_ms * timeframe_ms + offset
+    
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    
+    columns = (
+        data[starts, 1],
+        np.fmax.reduceat(data[:, 2], starts),
+        np.fmin.reduceat(data[:, 3], starts),
+        data[ends, 4],
+        np.add.reduceat(np.nan_to_num(data[:, 5]), starts)
+    )
+    rows = np.column_stack(columns).tolist()
+    for bucket, row in zip(buckets[starts].tolist(), rows):
+        row.insert(0, bucket)
+    return rows
@@ -0,0 +1,240 @@
+"""
+L2 order book kept in sorted arrays, updated from snapshots and incremental deltas
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import math
+import zlib
+
+# Levels per side covered by book checksums
+CHECKSUM_DEPTH = 25
+
+Level = List[float]
+
+
+class BookOutOfSync(Exception):
+    """A delta does not follow the book (sequence gap or checksum mismatch); it needs a new snapshot"""
+
+
+def book_checksum(
+    bids: Sequence[Sequence[float]],
+    asks: Sequence[Sequence[float]],
+    depth: int = CHECKSUM_DEPTH
+) -> int:
+    """
+    CRC32 of the top levels, best first
+    
+    Bid and ask levels are interleaved as "price:size" (Python float repr)
+    and joined with ":", so a feed and the book compute the same value.
+    """
+    parts = []
+    for i in range(depth):
+        for side in (bids, asks):
+            if i < len(side):
+                parts.append(f"{float(side[i][0])!r}:{float(side[i][1])!r}")
+    return zlib.crc32(":".join(parts).encode())
+
+
+class BookSide:
+    """
+    One side of a book as parallel sorted arrays of keys and sizes
+    
+    Keys are prices, negated for bids, so both sides are ascending with the
+    best level first. Updating a level is a binary search plus an in-place
+    list insert or delete; nothing is rebuilt per update.
+    """
+    
+    def __init__(self, descending: bool):
+        """
+        Initialize book side
+        
+        Args:
+            descending: True for bids (best = highest price)
+        """
+        self.sign = -1.0 if descending else 1.0
+        self.keys: List[float] = []
+        self.sizes: List[float] = []
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def set(self, price: float, size: float) -> bool:
+        """Set a level's size (0 removes it); returns whether the book changed"""
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if size == self.sizes[i]:
+                return False
+            if size:
+                self.sizes[i] = size
+            else:
+                del self.keys[i]
+                del self.sizes[i]
+            return True
+        if not size:
+            return False
+        self.keys.insert(i, key)
+        self.sizes.insert(i, size)
+        return True
+    
+    def replace(self, levels: Iterable[Sequence[float]]) -> List[Level]:
+        """Replace every level; returns the changes as [price, size] (size 0 = removed)"""
+        new = sorted((self.sign * float(price), float(size)) for price, size, *_ in levels if size)
+        changes: List[Level] = []
+        i = j = 0
+        while i < len(self.keys) or j < len(new):
+            if j == len(new) or (i < len(self.keys) and self.keys[i] < new[j][0]):
+                changes.append([self.sign * self.keys[i], 0.0])
+                i += 1
+            elif i == len(self.keys) or new[j][0] < self.keys[i]:
+                changes.append([self.sign * new[j][0], new[j][1]])
+                j += 1
+            else:
+                if self.sizes[i] != new[j][1]:
+                    changes.append([self.sign * new[j][0], new[j][1]])
+                i += 1
+                j += 1
+        self.keys = [key for key, _ in new]
+        self.sizes = [size for _, size in new]
+        return changes
+    
+    def levels(self, n: Optional[int] = None) -> List[Level]:
+        """Get the best n levels as [price, size]"""
+        sign = self.sign
+        return [[sign * key, size] for key, size in zip(self.keys[:n], self.sizes[:n])]
+    
+    def best(self) -> Optional[float]:
+        return self.sign * self.keys[0] if self.keys else None
+    
+    def buckets(self, step: float, n: int) -> List[Level]:
+        """Sum sizes into price buckets of width step (bids round down, asks up), best n buckets"""
+        rounding = math.floor if self.sign < 0 else math.ceil
+        # Bucket prices are rounded to the step's precision to hide float noise
+        digits = max(0, -math.floor(math.log10(step))) + 2
+        buckets: List[Level] = []
+        for key, size in zip(self.keys, self.sizes):
+            price = self.sign * key
+            bucket = round(rounding(price / step - self.sign * 1e-9) * step, digits)
+            if buckets and buckets[-1][0] == bucket:
+                buckets[-1][1] += size
+            elif len(buckets) == n:
+                break
+            else:
+                buckets.append([bucket, size])
+        return buckets
+    
+    def cumulative(self, n: int) -> List[Level]:
+        """Get the best n levels as [price, size, cumulative size, cumulative notional]"""
+        total = notional = 0.0
+        rows: List[Level] = []
+        for price, size in self.levels(n):
+            total += size
+            notional += price * size
+            rows.append([price, size, total, notional])
+        return rows
+
+
+class OrderBook:
+    """
+    L2 book of one (exchange, symbol) with sequence and checksum validation
+    
+    A snapshot sets the book and its sequence number. Deltas must continue
+    that sequence (prev_seq equal to the book's, or seq one past it when the
+    feed sends no prev_seq); older ones are ignored, and a gap or a checksum
+    that does not match the updated book raises BookOutOfSync so the owner
+    fetches a new snapshot.
+    """
+    
+    def __init__(self, exchange: str, symbol: str):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.seq: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        self.synced = False
+        self.updates = 0
+    
+    def apply_snapshot(
+        self,
+        bids: Iterable[Sequence[float]],
+        asks: Iterable[Sequence[float]],
+        seq: Optional[int] = None,
+        timestamp: Optional[int] = None
+    ) -> Dict[str, List[Level]]:
+        """Replace the book; returns the level changes against the previous book"""
+        changes = {"bids": self.bids.replace(bids), "asks": self.asks.replace(asks)}
+        self.seq = seq
+        self.timestamp = timestamp
+        self.synced = True
+        self.updates += 1
+        return changes
+    
+    def apply_delta(
+        self,
+        bids: Iterable[Sequence[float]],
+        asks: Iterable[Sequence[float]],
+        seq: Optional[int] = None,
+        prev_seq: Optional[int] = None,
+        checksum: Optional[int] = None,
+        timestamp: Optional[int] = None
+    ) -> Optional[Dict[str, List[Level]]]:
+        """
+        Apply changed levels (size 0 removes a level)
+        
+        Returns:
+            The levels that changed, or None for a delta the book already contains
+        """
+        if not self.synced:
+            raise BookOutOfSync(f"{self.exchange} {self.symbol} book has no snapshot")
+        if seq is not None and self.seq is not None:
+            if seq <= self.seq:
+                return None
+            expected = prev_seq if prev_seq is not None else seq - 1
+            if expected != self.seq:
+                self.synced = False
+                raise BookOutOfSync(f"{self.exchange} {self.symbol} book at {self.seq} got delta {expected}->{seq}")
+        
+        changes: Dict[str, List[Level]] = {"bids": [], "asks": []}
+        for name, side, levels in (("bids", self.bids, bids), ("asks", self.asks, asks)):
+            for price, size, *_ in levels:
+                if side.set(float(price), float(size)):
+                    changes[name].append([float(price), float(size)])
+        self.seq = seq if seq is not None else self.seq
+        self.timestamp = timestamp if timestamp is not None else self.timestamp
+        self.updates += 1
+        
+        if checksum is not None and checksum != self.checksum():
+            self.synced = False
+            raise BookOutOfSync(f"{self.exchange} {self.symbol} book checksum mismatch at {self.seq}")
+        return changes
+    
+    def checksum(self, depth: int = CHECKSUM_DEPTH) -> int:
+        return book_checksum(self.bids.levels(depth), self.asks.levels(depth), depth)
+    
+    def snapshot(self, depth: Optional[int] = None) -> Dict[str, Any]:
+        """Get the best depth levels per side with spread and mid price"""
+        best_bid, best_ask = self.bids.best(), self.asks.best()
+        both = best_bid is not None and best_ask is not None
+        return {
+            "exchange": self.exchange,
+            "symbol": self.symbol,
+            "bids": self.bids.levels(depth),
+            "asks": self.asks.levels(depth),
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "spread": best_ask - best_bid if both else None,
+            "mid": (best_ask + best_bid) / 2 if both else None,
+            "seq": self.seq,
+            "timestamp": self.timestamp,
+        }
+    
+    @classmethod
+    def from_snapshot(cls, exchange: str, symbol: str, snapshot: Dict[str, Any]) -> "OrderBook":
+        """Build a book from a ccxt order book"""
+        book = cls(exchange, symbol)
+        book.apply_snapshot(
+            snapshot.get("bids") or [], snapshot.get("asks") or [], snapshot.get("nonce"), snapshot.get("timestamp")
+        )
+        return book
@@ -0,0 +1,352 @@
+"""
+Streamed L2 order books kept in memory and fanned out to WebSocket subscribers
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import random
+
+import aiohttp
+
+from services.order_book import BookOutOfSync, OrderBook
+from services.upstream_scheduler import STREAMING
+
+try:
+    import ccxt.pro as ccxtpro
+except ImportError:
+    ccxtpro = None
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+SNAPSHOT = "book_snapshot"
+DELTA = "book_delta"
+
+
+class BookAdapter:
+    """
+    Order book feed of one exchange
+    
+    stream() yields messages shaped like the JSON feed protocol: {"type":
+    "book_snapshot" | "book_delta", "bids", "asks", "seq", "timestamp"},
+    deltas optionally with "prev_seq" and "checksum". The first message of
+    a stream is a snapshot.
+    """
+    
+    def stream(self, symbol: str) -> AsyncIterator[Dict[str, Any]]:
+        """Connect and yield book messages for symbol, raising when the feed breaks"""
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """Release the connection"""
+
+
+class PollingBookAdapter(BookAdapter):
+    """Snapshots fetched over REST at a fixed interval, for exchanges without a push feed"""
+    
+    def __init__(self, service: Any, exchange_id: str, depth: int, interval: float):
+        self.service = service
+        self.exchange_id = exchange_id
+        self.depth = depth
+        self.interval = interval
+    
+    async def stream(self, symbol: str) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            book = await self.service.get_order_book(self.exchange_id, symbol, self.depth, priority=STREAMING)
+            yield {
+                "type": SNAPSHOT,
+                "bids": book.get("bids") or [],
+                "asks": book.get("asks") or [],
+                "seq": book.get("nonce"),
+                "timestamp": book.get("timestamp"),
+            }
+            await asyncio.sleep(self.interval)
+
+
+class CcxtProBookAdapter(BookAdapter):
+    """Exchange WebSocket books through ccxt.pro's watch_order_book (ccxt.pro checks the exchange's sequence)"""
+    
+    def __init__(self, exchange_id: str, depth: int, config: Optional[Dict[str, Any]] = None):
+        if ccxtpro is None:
+            raise RuntimeError("ccxt.pro is not available in the installed ccxt")
+        self.exchange = getattr(ccxtpro, exchange_id)(config or {})
+        self.depth = depth
+    
+    async def stream(self, symbol: str) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            book = await self.exchange.watch_order_book(symbol, self.depth)
+            yield {
+                "type": SNAPSHOT,
+                "bids": book["bids"][:self.depth],
+                "asks": book["asks"][:self.depth],
+                "seq": book.get("nonce"),
+                "timestamp": book.get("timestamp"),
+            }
+    
+    async def close(self) -> None:
+        await self.exchange.close()
+
+
+class JsonBookAdapter(BookAdapter):
+    """
+    Generic JSON WebSocket book feed (also spoken by FakeTickerFeed)
+    
+    After {"action": "subscribe_book", "exchange": ..., "symbol": ..., "depth": n}
+    the server sends one book_snapshot message followed by book_delta messages.
+    """
+    
+    def __init__(self, url: str, exchange_id: str, depth: int, heartbeat: float = 15.0):
+        self.url = url
+        self.exchange_id = exchange_id
+        self.depth = depth
+        self.heartbeat = heartbeat
+        self.session: Optional[aiohttp.ClientSession] = None
+    
+    async def stream(self, symbol: str) -> AsyncIterator[Dict[str, Any]]:
+        self.session = aiohttp.ClientSession()
+        async with self.session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            await ws.send_json({
+                "action": "subscribe_book", "exchange": self.exchange_id, "symbol": symbol, "depth": self.depth
+            })
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = json.loads(message.data)
+                if data.get("type") in (SNAPSHOT, DELTA) and data.get("symbol") == symbol:
+                    yield data
+        raise ConnectionError(f"Feed {self.url} closed")
+    
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class OrderBookService:
+    """
+    Keeps an OrderBook per watched pair and streams its changes
+    
+    A pair is watched while it is pinned (configured streams) or has
+    WebSocket subscribers; each watched pair has one feed task. Feeds that
+    send snapshots only are diffed against the book, so subscribers always
+    get deltas. When a delta does not follow the book the feed is
+    reconnected at once for a new snapshot (a resync); when the feed fails
+    it is retried with jittered exponential backoff and the book is not
+    served meanwhile.
+    
+    Subscribers are objects with enqueue(message) (WebSocket client
+    connections). Each gets a book_snapshot of the best depth levels when
+    the book is (re)synced or when it subscribes, then every book_delta
+    with seq and prev_seq, so it can tell whether it missed one.
+    """
+    
+    def __init__(
+        self,
+        service: Any,
+        adapter_factory: Callable[[str], BookAdapter],
+        depth: int = 100,
+        reconnect_min: float = 0.5,
+        reconnect_max: float = 30.0
+    ):
+        """
+        Initialize order book service
+        
+        Args:
+            service: CryptocurrencyService used to resolve market ids
+            adapter_factory: Builds a fresh book adapter for an exchange on each connect
+            depth: Levels per side requested from feeds and sent in snapshots
+            reconnect_min: Seconds before the first reconnect after a failure
+            reconnect_max: Longest wait between reconnect attempts
+        """
+        self.service = service
+        self.adapter_factory = adapter_factory
+        self.depth = depth
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.books: Dict[Pair, OrderBook] = {}
+        self.subscribers: Dict[Pair, Set[Any]] = {}
+        self.pinned: Set[Pair] = set()
+        self.tasks: Dict[Pair, asyncio.Task] = {}
+        self.market_ids: Dict[str, Tuple[Any, Dict[str, str]]] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+    
+    async def _load_markets(self, exchange_id: str) -> None:
+        """Load an exchange's markets so market ids can be resolved"""
+        try:
+            await self.service.get_markets(exchange_id)
+        except Exception as e:
+            logger.warning(f"Markets unavailable for {exchange_id} order books: {str(e)}")
+    
+    def resolve(self, exchange_id: str, name: str) -> Pair:
+        """Map a market id (BTCUSDT) to its unified symbol once the exchange's markets are loaded"""
+        exchange = self.service.exchanges.get(exchange_id)
+        markets = getattr(exchange, 'markets', None) or {}
+        if name in markets:
+            return exchange_id, name
+        cached = self.market_ids.get(exchange_id)
+        if cached is None or cached[0] is not markets:
+            cached = self.market_ids[exchange_id] = (
+                markets, {market['id']: symbol for symbol, market in markets.items() if market.get('id')}
+            )
+        return exchange_id, cached[1].get(name, name)
+    
+    def get(self, exchange_id: str, symbol: str) -> Optional[OrderBook]:
+        """Get the streamed book of a pair, None if it is not watched or not in sync"""
+        book = self.books.get(self.resolve(exchange_id, symbol))
+        return book if book is not None and book.synced else None
+    
+    async def pin(self, exchange_id: str, symbol: str) -> None:
+        """Keep a pair's book streaming without subscribers"""
+        await self._load_markets(exchange_id)
+        pair = self.resolve(exchange_id, symbol)
+        self.pinned.add(pair)
+        self._watch(pair)
+    
+    async def subscribe(self, subscriber: Any, exchange_id: str, symbol: str) -> Pair:
+        """Stream a pair's book to a subscriber, starting with a snapshot; returns the resolved pair"""
+        await self._load_markets(exchange_id)
+        pair = self.resolve(exchange_id, symbol)
+        self.subscribers.setdefault(pair, set()).add(subscriber)
+        book = self.books.get(pair)
+        if book is not None and book.synced:
+            subscriber.enqueue(self._snapshot_message(book))
+        self._watch(pair)
+        return pair
+    
+    def unsubscribe(self, subscriber: Any, exchange_id: str, symbol: str) -> None:
+        """Stop streaming a pair to a subscriber, and stop its feed if nothing else watches it"""
+        pair = self.resolve(exchange_id, symbol)
+        subscribers = self.subscribers.get(pair)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[pair]
+            if pair not in self.pinned:
+                task = self.tasks.pop(pair, None)
+                if task is not None:
+                    task.cancel()
+                self.books.pop(pair, None)
+    
+    def _watch(self, pair: Pair) -> None:
+        if pair not in self.tasks:
+            self.counters.setdefault(pair[0], {"updates": 0, "resyncs": 0, "errors": 0})
+            self.tasks[pair] = asyncio.create_task(self._run(pair))
+            logger.info(f"Started order book feed for {pair[1]} on {pair[0]}")
+    
+    def _snapshot_message(self, book: OrderBook) -> str:
+        return json.dumps(dict(book.snapshot(self.depth), type=SNAPSHOT))
+    
+    def _publish(self, pair: Pair, message: str) -> None:
+        for subscriber in list(self.subscribers.get(pair, ())):
+            subscriber.enqueue(message)
+    
+    def _apply(self, pair: Pair, book: OrderBook, message: Dict[str, Any]) -> None:
+        """Apply one feed message to a book and publish what changed"""
+        prev_seq = book.seq
+        if message["type"] == SNAPSHOT:
+            resynced = not book.synced
+            changes = book.apply_snapshot(
+                message["bids"], message["asks"], message.get("seq"), message.get("timestamp")
+            )
+            if resynced:
+                self._publish(pair, self._snapshot_message(book))
+                return
+        else:
+            changes = book.apply_delta(
+                message["bids"], message["asks"], message.get("seq"), message.get("prev_seq"),
+                message.get("checksum"), message.get("timestamp")
+            )
+            if changes is None:
+                return
+        self.counters[pair[0]]["updates"] += 1
+        if (changes["bids"] or changes["asks"]) and self.subscribers.get(pair):
+            self._publish(pair, json.dumps({
+                "type": DELTA,
+                "exchange": pair[0],
+                "symbol": pair[1],
+                "seq": book.seq,
+                "prev_seq": prev_seq,
+                "timestamp": book.timestamp,
+                "bids": changes["bids"],
+                "asks": changes["asks"],
+            }))
+    
+    async def _run(self, pair: Pair) -> None:
+        """
+        Keep a book in sync for as long as the pair is watched
+        
+        A book that falls out of sync resubscribes at once, but one that keeps
+        failing within reconnect_max of its last resync backs off like a broken
+        connection instead of resubscribing in a tight loop.
+        """
+        exchange_id, symbol = pair
+        book = self.books[pair] = OrderBook(exchange_id, symbol)
+        counters = self.counters[exchange_id]
+        loop = asyncio.get_running_loop()
+        delay = self.reconnect_min
+        resync_delay = 0.0
+        last_resync = None
+        while True:
+            adapter = None
+            try:
+                adapter = self.adapter_factory(exchange_id)
+                async for message in adapter.stream(symbol):
+                    self._apply(pair, book, message)
+                    delay = self.reconnect_min
+                raise ConnectionError("feed ended")
+            except asyncio.CancelledError:
+                raise
+            except BookOutOfSync as e:
+                counters["resyncs"] += 1
+                now = loop.time()
+                if last_resync is None or now - last_resync > self.reconnect_max:
+                    resync_delay = 0.0
+                retry = resync_delay * random.uniform(0.5, 1.0)
+                last_resync = now + retry
+                resync_delay = min(max(resync_delay * 2, self.reconnect_min), self.reconnect_max)
+                logger.info(f"Resyncing order book in {retry:.1f}s: {str(e)}")
+            except Exception as e:
+                counters["errors"] += 1
+                book.synced = False
+                logger.warning(
+                    f"Order book feed for {symbol} on {exchange_id} failed ({str(e)}), reconnecting in {delay:.1f}s"
+                )
+                retry = delay * random.uniform(0.5, 1.0)
+                delay = min(delay * 2, self.reconnect_max)
+            finally:
+                if adapter is not None:
+                    try:
+                        await adapter.close()
+                    except Exception as e:
+                        logger.debug(f"Error closing order book feed: {str(e)}")
+            await asyncio.sleep(retry)
+    
+    async def stop(self) -> None:
+        """Stop all feeds"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.books.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get watched books and feed counters per exchange"""
+        return {
+            "books": {
+                f"{exchange_id}:{symbol}": {
+                    "synced": book.synced,
+                    "seq": book.seq,
+                    "bids": len(book.bids),
+                    "asks": len(book.asks),
+                    "updates": book.updates,
+                    "subscribers": len(self.subscribers.get((exchange_id, symbol), ())),
+                }
+                for (exchange_id, symbol), book in self.books.items()
+            },
+            "exchanges": {exchange_id: dict(counters) for exchange_id, counters in self.counters.items()},
+        }
@@ -0,0 +1,67 @@
+"""
+Single-flight coalescing of concurrent upstream requests
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """Shares one in-flight upstream call between concurrent callers of the same key"""
+    
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._callers: Dict[str, int] = {}
+        self.fetches = 0
+        self.callers_served = 0
+        self.max_callers = 0
+    
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the result for key, starting factory() only if no call is in flight
+        
+        Args:
+            key: Identity of the upstream request (usually the cache key)
+            factory: Zero-argument coroutine function performing the upstream call
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            self._callers[key] = 0
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        self._callers[key] += 1
+        
+        # Shield so a disconnecting caller does not cancel the fetch for everyone else
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        """Unregister a completed fetch and record how many callers it served"""
+        self._in_flight.pop(key, None)
+        callers = self._callers.pop(key, 0)
+        self.fetches += 1
+        self.callers_served += callers
+        self.max_callers = max(self.max_callers, callers)
+        
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Coalesced fetch for {key} failed for {callers} caller(s)")
+        elif callers > 1:
+            logger.debug(f"Coalesced fetch for {key} served {callers} callers")
+    
+    def in_flight(self) -> int:
+        """Get number of upstream calls currently in flight"""
+        return len(self._in_flight)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "in_flight": len(self._in_flight),
+            "fetches": self.fetches,
+            "callers_served": self.callers_served,
+            "coalesced": self.callers_served - self.fetches,
+            "callers_per_fetch": round(self.callers_served / self.fetches, 2) if self.fetches else 0.0,
+            "max_callers": self.max_callers,
+        }
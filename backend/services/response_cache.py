@@ -0,0 +1,168 @@
+"""
+Cache values stored with their final JSON encoding
+"""
+
+from cachetools import LRUCache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+import gzip
+import hashlib
+
+import orjson
+from pydantic import BaseModel
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Content codings by server preference; brotli and zstd are used when their modules are installed
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+try:
+    import brotli
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+except ImportError:
+    pass
+try:
+    import zstandard
+    COMPRESSORS["zstd"] = zstandard.ZstdCompressor(level=6).compress
+except ImportError:
+    pass
+COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def compute_etag(body: bytes) -> str:
+    """Get a strong ETag for a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def compose_json(fields: Dict[str, Any], key: str, items: List["EncodedResponse"]) -> bytes:
+    """Encode fields plus a list of already-encoded items under key, splicing their bodies in"""
+    head = orjson.dumps(fields)[:-1]
+    separator = b"," if fields else b""
+    return head + separator + orjson.dumps(key) + b":[" + b",".join(item.body for item in items) + b"]}"
+
+
+class EncodedResponse:
+    """
+    A response value with its encoded body and ETag
+    
+    Validation through the response model and JSON encoding happen once, when
+    the value is cached; every hit serves body as is. The raw value stays
+    available for callers that need the data rather than the bytes.
+    """
+    
+    __slots__ = ("value", "body", "etag")
+    
+    def __init__(self, value: Any, model: Optional[Type[BaseModel]] = None):
+        """
+        Encode a value
+        
+        Args:
+            value: Data to serve (a dict for model-backed responses)
+            model: Response model the value is validated and serialized through
+        """
+        self.value = value
+        data = model(**value).model_dump() if model is not None else value
+        self.body = orjson.dumps(data)
+        self.etag = compute_etag(self.body)
+    
+    @classmethod
+    def from_body(cls, value: Any, body: bytes) -> "EncodedResponse":
+        """Wrap a body encoded elsewhere (e.g. by compose_json) without encoding it again"""
+        encoded = cls.__new__(cls)
+        encoded.value = value
+        encoded.body = body
+        encoded.etag = compute_etag(body)
+        return encoded
+    
+    def __getstate__(self):
+        return self.value, self.body, self.etag
+    
+    def __setstate__(self, state):
+        self.value, self.body, self.etag = state
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against a body's ETag, whatever coding the client received"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Compressed variants carry the coding as a suffix ("<hash>-gzip")
+        base = candidate.rsplit("-", 1)[0] + '"' if "-" in candidate else candidate
+        if etag in (candidate, base):
+            return True
+    return False
+
+
+class ResponseCompressor:
+    """
+    Negotiates a content coding and caches compressed bodies by ETag
+    
+    Variants are keyed by the ETag of the uncompressed body, so every request
+    (and every process-local copy of a shared cache entry) for unchanged data
+    reuses one compression. The variant cache is bounded in bytes.
+    """
+    
+    def __init__(
+        self,
+        min_size: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        encodings: Optional[Sequence[str]] = None
+    ):
+        """
+        Initialize response compressor
+        
+        Args:
+            min_size: Smallest body in bytes worth compressing
+            max_bytes: Total size of cached compressed variants
+            encodings: Allowed codings by preference (all available if omitted)
+        """
+        self.min_size = min_size
+        self.encodings = [e for e in (encodings or COMPRESSORS) if e in COMPRESSORS]
+        self.variants: LRUCache = LRUCache(maxsize=max_bytes, getsizeof=len)
+        self.stats_counters = {"compressions": 0, "variant_hits": 0, "bytes_in": 0, "bytes_out": 0}
+    
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Pick the client's highest-weighted coding we support, preferring ours on ties"""
+        if not accept_encoding:
+            return None
+        weights: Dict[str, float] = {}
+        for part in accept_encoding.split(","):
+            coding, _, params = part.strip().partition(";")
+            weight = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    weight = float(params[2:])
+                except ValueError:
+                    weight = 0.0
+            weights[coding.strip().lower()] = weight
+        
+        best, best_weight = None, 0.0
+        for encoding in self.encodings:
+            weight = weights.get(encoding, weights.get("*", 0.0))
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+    
+    def compress(self, encoded: EncodedResponse, encoding: str) -> bytes:
+        """Get the body compressed with encoding, compressing at most once per ETag"""
+        key = (encoded.etag, encoding)
+        variant = self.variants.get(key)
+        if variant is not None:
+            self.stats_counters["variant_hits"] += 1
+            return variant
+        
+        variant = COMPRESSORS[encoding](encoded.body)
+        self.stats_counters["compressions"] += 1
+        self.stats_counters["bytes_in"] += len(encoded.body)
+        self.stats_counters["bytes_out"] += len(variant)
+        if len(variant) <= self.variants.maxsize:
+            self.variants[key] = variant
+        return variant
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get compression counters and the size of cached variants"""
+        return dict(self.stats_counters, encodings=self.encodings, cached_bytes=self.variants.currsize)
@@ -0,0 +1,323 @@
+"""
+Ticker board in a memory-mapped file, written by one process and read by all workers
+"""
+
+from typing import Any, Dict, Optional, Tuple, Type
+from datetime import datetime
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+from pydantic import BaseModel
+
+from services.response_cache import EncodedResponse
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TKB1"
+# magic, slot count, record size
+HEADER = struct.Struct("<4sII4x")
+# Seqlock version: odd while the writer is changing the record
+VERSION = struct.Struct("<Q")
+# version, kind, exchange, symbol, alias target slot, received (epoch seconds, 0 = not served),
+# exchange timestamp (epoch seconds), last, bid, ask, high, low, volume, datetime
+RECORD = struct.Struct("<QB7x24s40sI4xdd6d32s")
+
+EMPTY, TICKER, ALIAS = 0, 1, 2
+PRICE_FIELDS = ("last", "bid", "ask", "high", "low", "volume")
+# Reads retried while the writer is mid-update before giving up on a record
+READ_RETRIES = 100
+
+
+def _key(exchange: str, symbol: str) -> Tuple[bytes, bytes]:
+    """Encode a pair as it is stored in a record"""
+    exchange_bytes, symbol_bytes = exchange.encode(), symbol.encode()
+    if len(exchange_bytes) > 24 or len(symbol_bytes) > 40:
+        raise ValueError(f"Pair too long for the shared ticker board: {exchange}:{symbol}")
+    return exchange_bytes.ljust(24, b"\0"), symbol_bytes.ljust(40, b"\0")
+
+
+def _number(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class SharedTickerBoard:
+    """
+    TickerBoard whose entries live in a shared memory-mapped file
+    
+    The file is a fixed array of records, so memory does not grow with the
+    number of workers or updates. A pair's record is found by open addressing
+    from the CRC32 of its key; market-id aliases are records pointing at the
+    symbol's record. One process, the holder of an exclusive lock on the file,
+    writes; every other worker reads the mapping in place. Each record carries
+    a seqlock version the writer makes odd while changing it, so readers retry
+    instead of locking and never see a half-written ticker.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        slots: int = 4096,
+        model: Optional[Type[BaseModel]] = None,
+        max_age: float = 10.0
+    ):
+        """
+        Open or create a shared ticker board
+        
+        Args:
+            path: Board file (a tmpfs path such as /dev/shm/... avoids disk writeback)
+            slots: Records in the file; pairs and aliases each take one
+            model: Response model encoded bodies are validated through
+            max_age: Seconds after its last update an entry stops being served
+        """
+        if fcntl is None:
+            raise RuntimeError("The shared ticker board needs POSIX file locks")
+        self.path = path
+        self.slots = slots
+        self.model = model
+        self.max_age = max_age
+        self.writer = False
+        self._create(path, slots)
+        self._fd = os.open(path, os.O_RDWR)
+        magic, file_slots, record_size = HEADER.unpack(os.pread(self._fd, HEADER.size, 0).ljust(HEADER.size, b"\0"))
+        if magic != MAGIC or file_slots != slots or record_size != RECORD.size:
+            os.close(self._fd)
+            raise ValueError(
+                f"{path} holds a board with another layout ({file_slots} slots); remove it or change the slot count"
+            )
+        self._map = mmap.mmap(self._fd, HEADER.size + slots * RECORD.size)
+        
+        # Record positions never move, so each process remembers where it found a pair
+        self.positions: Dict[Tuple[str, str], int] = {}
+        # (exchange, requested name) -> (record version, encoded body)
+        self.encoded: Dict[Tuple[str, str], Tuple[int, EncodedResponse]] = {}
+        self.updates = 0
+        self.full = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.retries = 0
+    
+    @staticmethod
+    def _create(path: str, slots: int) -> None:
+        """Create the board file unless another process already has"""
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, slots, RECORD.size))
+                f.truncate(HEADER.size + slots * RECORD.size)
+            # Unlike a rename, linking fails if a concurrent worker created the file first
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    
+    def acquire_writer(self) -> bool:
+        """Become the board's single writer if no live process is; True if this process writes"""
+        if not self.writer:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            self.writer = True
+            self._recover()
+            logger.info(f"Writing the shared ticker board at {self.path} from process {os.getpid()}")
+        return True
+    
+    def _recover(self) -> None:
+        """Index existing records and close any a previous writer died while changing"""
+        for slot in range(self.slots):
+            offset = self._offset(slot)
+            version, = VERSION.unpack_from(self._map, offset)
+            if version % 2:
+                record = list(RECORD.unpack_from(self._map, offset))
+                record[5] = 0.0
+                self._write(slot, record)
+            record = RECORD.unpack_from(self._map, offset)
+            if record[1] != EMPTY:
+                self.positions[(record[2].rstrip(b"\0").decode(), record[3].rstrip(b"\0").decode())] = slot
+    
+    def _offset(self, slot: int) -> int:
+        return HEADER.size + slot * RECORD.size
+    
+    def _read(self, slot: int) -> Optional[Tuple[Any, ...]]:
+        """Read a consistent copy of a record, None if the writer kept changing it"""
+        offset = self._offset(slot)
+        for _ in range(READ_RETRIES):
+            record = RECORD.unpack_from(self._map, offset)
+            if record[0] % 2 == 0 and VERSION.unpack_from(self._map, offset)[0] == record[0]:
+                return record
+            self.retries += 1
+        return None
+    
+    def _write(self, slot: int, record: list) -> None:
+        """Replace a record under its seqlock version"""
+        offset = self._offset(slot)
+        version, = VERSION.unpack_from(self._map, offset)
+        version += 1 if version % 2 == 0 else 0
+        VERSION.pack_into(self._map, offset, version)
+        record[0] = version
+        RECORD.pack_into(self._map, offset, *record)
+        VERSION.pack_into(self._map, offset, version + 1)
+    
+    def _find(self, exchange: str, name: str) -> Optional[int]:
+        """Locate a pair's record by probing from its hash"""
+        exchange_key, name_key = _key(exchange, name)
+        start = zlib.crc32(exchange_key + name_key) % self.slots
+        for probe in range(self.slots):
+            slot = (start + probe) % self.slots
+            record = self._read(slot)
+            if record is None or record[1] == EMPTY:
+                return None
+            if record[2] == exchange_key and record[3] == name_key:
+                return slot
+        return None
+    
+    def _claim(self, exchange: str, name: str, kind: int, target: int = 0) -> Optional[int]:
+        """Get the record of a pair, taking a free one if it has none (writer only)"""
+        slot = self.positions.get((exchange, name))
+        if slot is not None:
+            return slot
+        exchange_key, name_key = _key(exchange, name)
+        start = zlib.crc32(exchange_key + name_key) % self.slots
+        for probe in range(self.slots):
+            slot = (start + probe) % self.slots
+            if RECORD.unpack_from(self._map, self._offset(slot))[1] == EMPTY:
+                self._write(slot, [0, kind, exchange_key, name_key, target, 0.0, 0.0] + [math.nan] * 6 + [b""])
+                self.positions[(exchange, name)] = slot
+                return slot
+        self.full += 1
+        logger.warning(f"Shared ticker board is full; {exchange}:{name} is not streamed")
+        return None
+    
+    def alias(self, exchange: str, name: str, symbol: str) -> None:
+        """Serve symbol's ticker for requests naming it by another name (e.g. the market id)"""
+        if name == symbol:
+            return
+        target = self._claim(exchange, symbol, TICKER)
+        if target is not None:
+            self._claim(exchange, name, ALIAS, target)
+    
+    def update(self, exchange: str, symbol: str, ticker: Dict[str, Any]) -> None:
+        """Replace the ticker of a pair"""
+        slot = self._claim(exchange, symbol, TICKER)
+        if slot is None:
+            return
+        exchange_key, symbol_key = _key(exchange, symbol)
+        timestamp = ticker.get("timestamp")
+        self._write(slot, [
+            0, TICKER, exchange_key, symbol_key, 0, time.time(),
+            timestamp.timestamp() if isinstance(timestamp, datetime) else _number(timestamp)
+        ] + [_number(ticker.get(field)) for field in PRICE_FIELDS] + [
+            (ticker.get("datetime") or "").encode()[:32]
+        ])
+        self.updates += 1
+    
+    def invalidate(self, exchange: str) -> int:
+        """Stop serving an exchange's entries until they are updated again; returns how many"""
+        dropped = 0
+        for (pair_exchange, _), slot in self.positions.items():
+            record = list(RECORD.unpack_from(self._map, self._offset(slot)))
+            if pair_exchange == exchange and record[1] == TICKER and record[5]:
+                record[5] = 0.0
+                self._write(slot, record)
+                dropped += 1
+        return dropped
+    
+    def _entry(self, exchange: str, name: str) -> Optional[Tuple[Any, ...]]:
+        """Get a fresh ticker record by symbol or alias, counting the outcome"""
+        try:
+            slot = self.positions.get((exchange, name))
+            record = self._read(slot) if slot is not None else None
+            if record is None or _key(exchange, name) != (record[2], record[3]):
+                slot = self._find(exchange, name)
+                record = self._read(slot) if slot is not None else None
+                if record is not None:
+                    self.positions[(exchange, name)] = slot
+        except ValueError:
+            record = None
+        if record is not None and record[1] == ALIAS:
+            record = self._read(record[4])
+        if record is None or record[1] != TICKER or not record[5]:
+            self.misses += 1
+            return None
+        if time.time() - record[5] > self.max_age:
+            self.expired += 1
+            return None
+        self.hits += 1
+        return record
+    
+    def _ticker(self, exchange: str, name: str, record: Tuple[Any, ...]) -> Dict[str, Any]:
+        ticker = {"exchange": exchange, "symbol": name}
+        ticker.update(zip(PRICE_FIELDS, map(_optional, record[7:13])))
+        ticker["timestamp"] = datetime.fromtimestamp(0 if math.isnan(record[6]) else record[6])
+        ticker["datetime"] = record[13].rstrip(b"\0").decode()
+        return ticker
+    
+    def get(self, exchange: str, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the fresh ticker of a pair, None if it is not streamed or its feed went quiet"""
+        record = self._entry(exchange, symbol)
+        return self._ticker(exchange, symbol, record) if record is not None else None
+    
+    def get_encoded(self, exchange: str, symbol: str) -> Optional[EncodedResponse]:
+        """Get the fresh ticker of a pair encoded for a response, re-encoded only after updates"""
+        record = self._entry(exchange, symbol)
+        if record is None:
+            return None
+        cached = self.encoded.get((exchange, symbol))
+        if cached is not None and cached[0] == record[0]:
+            return cached[1]
+        encoded = EncodedResponse(self._ticker(exchange, symbol, record), self.model)
+        self.encoded[(exchange, symbol)] = (record[0], encoded)
+        return encoded
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get slot usage and this process's read counters"""
+        now = time.time()
+        entries = fresh = aliases = 0
+        for slot in range(self.slots):
+            record = RECORD.unpack_from(self._map, self._offset(slot))
+            if record[1] == ALIAS:
+                aliases += 1
+            elif record[1] == TICKER and record[5]:
+                entries += 1
+                fresh += now - record[5] <= self.max_age
+        return {
+            "path": self.path,
+            "writer": self.writer,
+            "slots": self.slots,
+            "aliases": aliases,
+            "entries": entries,
+            "fresh": fresh,
+            "full": self.full,
+            "updates": self.updates,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "retries": self.retries,
+        }
+    
+    def close(self) -> None:
+        """Unmap the board, giving up the writer lock"""
+        self._map.close()
+        os.close(self._fd)
+        self.writer = False
@@ -0,0 +1,105 @@
+"""
+In-memory board of the latest streamed ticker per exchange and symbol
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Type
+import time
+
+from pydantic import BaseModel
+
+from services.response_cache import EncodedResponse
+
+Pair = Tuple[str, str]
+
+
+class TickerBoard:
+    """
+    Latest pushed ticker per (exchange, symbol), read without awaiting anything
+    
+    Entries older than max_age (a silent or broken feed) are not served, so
+    readers fall back to REST. Market ids (BTCUSDT) are aliases of unified
+    symbols (BTC/USDT); each name a ticker is requested under gets its own
+    encoded body, built on the first read after an update.
+    """
+    
+    def __init__(self, model: Optional[Type[BaseModel]] = None, max_age: float = 10.0):
+        """
+        Initialize ticker board
+        
+        Args:
+            model: Response model encoded bodies are validated through
+            max_age: Seconds after its last update an entry stops being served
+        """
+        self.model = model
+        self.max_age = max_age
+        # pair -> [ticker, monotonic receive time, encoded body per requested name]
+        self.entries: Dict[Pair, List[Any]] = {}
+        self.aliases: Dict[Pair, str] = {}
+        self.updates = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    def alias(self, exchange: str, name: str, symbol: str) -> None:
+        """Serve symbol's ticker for requests naming it by another name (e.g. the market id)"""
+        if name != symbol:
+            self.aliases[(exchange, name)] = symbol
+    
+    def acquire_writer(self) -> bool:
+        """An in-process board is always written by its own process"""
+        return True
+    
+    def update(self, exchange: str, symbol: str, ticker: Dict[str, Any]) -> None:
+        """Replace the ticker of a pair"""
+        self.entries[(exchange, symbol)] = [ticker, time.monotonic(), {}]
+        self.updates += 1
+    
+    def invalidate(self, exchange: str) -> int:
+        """Stop serving an exchange's entries until they are updated again; returns how many"""
+        pairs = [pair for pair in self.entries if pair[0] == exchange]
+        for pair in pairs:
+            del self.entries[pair]
+        return len(pairs)
+    
+    def _entry(self, exchange: str, symbol: str) -> Optional[List[Any]]:
+        """Get a fresh entry by symbol or alias, counting the outcome"""
+        entry = self.entries.get((exchange, self.aliases.get((exchange, symbol), symbol)))
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry[1] > self.max_age:
+            self.expired += 1
+            return None
+        self.hits += 1
+        return entry
+    
+    def get(self, exchange: str, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the fresh ticker of a pair, None if it is not streamed or its feed went quiet"""
+        entry = self._entry(exchange, symbol)
+        if entry is None:
+            return None
+        ticker = entry[0]
+        return ticker if ticker["symbol"] == symbol else dict(ticker, symbol=symbol)
+    
+    def get_encoded(self, exchange: str, symbol: str) -> Optional[EncodedResponse]:
+        """Get the fresh ticker of a pair encoded for a response"""
+        entry = self._entry(exchange, symbol)
+        if entry is None:
+            return None
+        encoded = entry[2].get(symbol)
+        if encoded is None:
+            ticker = entry[0] if entry[0]["symbol"] == symbol else dict(entry[0], symbol=symbol)
+            encoded = entry[2][symbol] = EncodedResponse(ticker, self.model)
+        return encoded
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get entry and read counters"""
+        now = time.monotonic()
+        return {
+            "entries": len(self.entries),
+            "fresh": sum(1 for entry in self.entries.values() if now - entry[1] <= self.max_age),
+            "updates": self.updates,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
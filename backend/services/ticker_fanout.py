@@ -0,0 +1,117 @@
+"""
+Subscription-driven ticker fan-out for WebSocket clients
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+import json
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+
+def _json_default(value: Any) -> Any:
+    """Encode datetimes as ISO strings and anything else via str()"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class TickerFanout:
+    """Runs one upstream poller per subscribed (exchange, symbol) pair"""
+    
+    def __init__(
+        self,
+        fetch_ticker: Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]],
+        deliver: Callable[[Iterable[Any], str, Pair], Awaitable[None]],
+        interval: float = 2.0
+    ):
+        """
+        Initialize ticker fan-out
+        
+        Args:
+            fetch_ticker: Coroutine function returning the latest ticker for (exchange, symbol)
+            deliver: Coroutine function queuing one serialized message (keyed by pair) on subscribers
+            interval: Seconds between upstream polls per pair
+        """
+        self.fetch_ticker = fetch_ticker
+        self.deliver = deliver
+        self.interval = interval
+        self.subscribers: Dict[Pair, Set[Any]] = {}
+        self.pollers: Dict[Pair, asyncio.Task] = {}
+        # Last message delivered per pair, sent straight away to late subscribers
+        self.last_messages: Dict[Pair, str] = {}
+    
+    async def subscribe(self, subscriber: Any, exchange: str, symbol: str) -> None:
+        """Add a subscriber to a pair, starting its poller if it is the first"""
+        pair = (exchange, symbol)
+        subscribers = self.subscribers.setdefault(pair, set())
+        if subscriber in subscribers:
+            return
+        subscribers.add(subscriber)
+        
+        if pair not in self.pollers:
+            self.pollers[pair] = asyncio.create_task(self._poll(pair))
+            logger.info(f"Started ticker poller for {symbol} on {exchange}")
+        elif pair in self.last_messages:
+            # Unchanged prices are not re-sent, so a pair's current ticker may be a while coming
+            await self.deliver([subscriber], self.last_messages[pair], pair)
+    
+    def unsubscribe(self, subscriber: Any, exchange: str, symbol: str) -> None:
+        """Remove a subscriber from a pair, stopping its poller if it was the last"""
+        pair = (exchange, symbol)
+        subscribers = self.subscribers.get(pair)
+        if subscribers is None:
+            return
+        
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[pair]
+            poller = self.pollers.pop(pair, None)
+            if poller is not None:
+                poller.cancel()
+            self.last_messages.pop(pair, None)
+            logger.info(f"Stopped ticker poller for {symbol} on {exchange}")
+    
+    def subscriber_count(self, exchange: str, symbol: str) -> int:
+        """Get number of subscribers watching a pair"""
+        return len(self.subscribers.get((exchange, symbol), ()))
+    
+    async def _poll(self, pair: Pair) -> None:
+        """Fetch a pair, serialize each change once and deliver it to its subscribers"""
+        exchange, symbol = pair
+        
+        while pair in self.subscribers:
+            try:
+                ticker = await self.fetch_ticker(exchange, symbol)
+                if ticker:
+                    message = json.dumps({
+                        "type": "ticker",
+                        "exchange": exchange,
+                        "symbol": symbol,
+                        "data": ticker
+                    }, default=_json_default)
+                    
+                    # Unchanged prices are not re-sent
+                    subscribers = self.subscribers.get(pair)
+                    if message != self.last_messages.get(pair) and subscribers:
+                        self.last_messages[pair] = message
+                        await self.deliver(list(subscribers), message, pair)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ticker poller error for {symbol} on {exchange}: {str(e)}")
+            
+            await asyncio.sleep(self.interval)
+    
+    async def stop(self) -> None:
+        """Cancel all pollers"""
+        pollers = list(self.pollers.values())
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self.pollers.clear()
+        self.subscribers.clear()
+        self.last_messages.clear()
@@ -0,0 +1,286 @@
+"""
+Exchange push-feed ingestion into the live ticker board
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+from services.ticker_board import TickerBoard
+
+try:
+    import ccxt.pro as ccxtpro
+except ImportError:
+    ccxtpro = None
+
+logger = logging.getLogger(__name__)
+
+# (symbol, ccxt ticker, feed sequence number or None)
+FeedUpdate = Tuple[str, Dict[str, Any], Optional[int]]
+
+
+def parse_streams(spec: str) -> Dict[str, List[str]]:
+    """Parse "binance:BTC/USDT,kraken:BTC/USD" into symbols per exchange"""
+    streams: Dict[str, List[str]] = {}
+    for item in spec.split(","):
+        exchange, _, symbol = item.strip().partition(":")
+        if not exchange or not symbol:
+            if item.strip():
+                raise ValueError(f"Invalid ticker stream (expected exchange:symbol): {item}")
+            continue
+        streams.setdefault(exchange, []).append(symbol)
+    return streams
+
+
+class FeedAdapter:
+    """Push feed of one exchange; implementations yield ticker updates until the connection ends"""
+    
+    def stream(self, symbols: List[str]) -> AsyncIterator[FeedUpdate]:
+        """Connect, subscribe to symbols and yield updates, raising when the feed breaks"""
+        raise NotImplementedError
+    
+    async def close(self) -> None:
+        """Release the connection"""
+
+
+class CcxtProAdapter(FeedAdapter):
+    """Exchange WebSocket feed through ccxt.pro's watch_tickers / watch_ticker"""
+    
+    def __init__(self, exchange_id: str, config: Optional[Dict[str, Any]] = None):
+        if ccxtpro is None:
+            raise RuntimeError("ccxt.pro is not available in the installed ccxt")
+        self.exchange = getattr(ccxtpro, exchange_id)(config or {})
+    
+    async def stream(self, symbols: List[str]) -> AsyncIterator[FeedUpdate]:
+        if self.exchange.has.get('watchTickers'):
+            while True:
+                tickers = await self.exchange.watch_tickers(symbols)
+                for symbol, ticker in tickers.items():
+                    yield symbol, ticker, None
+        
+        # Without watchTickers: one watcher per symbol, merged into a single stream; a failing watcher ends it
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def watch(symbol: str):
+            try:
+                while True:
+                    queue.put_nowait((symbol, await self.exchange.watch_ticker(symbol), None))
+            except Exception as e:
+                queue.put_nowait(e)
+        
+        watchers = [asyncio.create_task(watch(symbol)) for symbol in symbols]
+        try:
+            while True:
+                update = await queue.get()
+                if isinstance(update, Exception):
+                    raise update
+                yield update
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+    
+    async def close(self) -> None:
+        await self.exchange.close()
+
+
+class JsonFeedAdapter(FeedAdapter):
+    """
+    Generic JSON WebSocket feed (also spoken by FakeTickerFeed)
+    
+    After {"action": "subscribe", "exchange": ..., "symbols": [...]} the server
+    sends {"type": "ticker", "symbol": ..., "seq": n, "data": {ccxt ticker}}
+    messages, seq counting up by one per symbol.
+    """
+    
+    def __init__(self, url: str, exchange_id: str, heartbeat: float = 15.0):
+        self.url = url
+        self.exchange_id = exchange_id
+        self.heartbeat = heartbeat
+        self.session: Optional[aiohttp.ClientSession] = None
+    
+    async def stream(self, symbols: List[str]) -> AsyncIterator[FeedUpdate]:
+        self.session = aiohttp.ClientSession()
+        async with self.session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+            await ws.send_json({"action": "subscribe", "exchange": self.exchange_id, "symbols": symbols})
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = json.loads(message.data)
+                if data.get("type") == "ticker":
+                    yield data["symbol"], data["data"], data.get("seq")
+        raise ConnectionError(f"Feed {self.url} closed")
+    
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class TickerIngestor:
+    """
+    Keeps one feed connection per exchange writing into a TickerBoard
+    
+    A broken feed is reconnected with jittered exponential backoff. While it
+    is down the exchange's entries are dropped from the board, so reads fall
+    back to REST instead of serving prices that may have moved. Sequence
+    numbers, where the feed has them, are checked per symbol: skipped numbers
+    are counted as gaps (each ticker message is a full snapshot, so the next
+    one heals the entry) and repeated or older ones are discarded.
+    
+    With a board shared by several processes only the one holding its writer
+    lock streams; the others keep trying to take over in case it exits.
+    """
+    
+    def __init__(
+        self,
+        service: Any,
+        board: TickerBoard,
+        streams: Dict[str, List[str]],
+        adapter_factory: Callable[[str], FeedAdapter],
+        reconnect_min: float = 0.5,
+        reconnect_max: float = 30.0,
+        takeover_interval: float = 5.0
+    ):
+        """
+        Initialize ticker ingestor
+        
+        Args:
+            service: CryptocurrencyService used to format tickers and resolve market ids
+            board: Board the streamed tickers are written to
+            streams: Symbols to stream per exchange
+            adapter_factory: Builds a fresh feed adapter for an exchange on each connect
+            reconnect_min: Seconds before the first reconnect attempt
+            reconnect_max: Longest wait between reconnect attempts
+            takeover_interval: Seconds between attempts to become a shared board's writer
+        """
+        self.service = service
+        self.board = board
+        self.streams = streams
+        self.adapter_factory = adapter_factory
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.takeover_interval = takeover_interval
+        self.takeover: Optional[asyncio.Task] = None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.sequences: Dict[Tuple[str, str], int] = {}
+        self.feeds: Dict[str, Dict[str, Any]] = {
+            exchange_id: {
+                "state": "idle",
+                "symbols": len(symbols),
+                "connects": 0,
+                "updates": 0,
+                "gaps": 0,
+                "out_of_order": 0,
+                "last_update": None,
+                "last_error": None,
+            }
+            for exchange_id, symbols in streams.items()
+        }
+    
+    def start(self) -> None:
+        """Start one feed task per exchange, or wait to become the board's writer first"""
+        if not self.board.acquire_writer():
+            if self.takeover is None:
+                self.takeover = asyncio.create_task(self._await_writer())
+            return
+        for exchange_id, symbols in self.streams.items():
+            if exchange_id not in self.tasks:
+                self.tasks[exchange_id] = asyncio.create_task(self._run(exchange_id, symbols))
+    
+    async def _await_writer(self) -> None:
+        """Start streaming once the process writing the shared board is gone"""
+        while not self.board.acquire_writer():
+            await asyncio.sleep(self.takeover_interval)
+        self.takeover = None
+        self.start()
+    
+    async def stop(self) -> None:
+        """Stop all feeds"""
+        tasks = list(self.tasks.values())
+        if self.takeover is not None:
+            tasks.append(self.takeover)
+            self.takeover = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+    
+    async def _register_aliases(self, exchange_id: str, symbols: List[str]) -> None:
+        """Let requests naming markets by exchange id (BTCUSDT) read the streamed symbols"""
+        try:
+            await self.service.get_markets(exchange_id)
+        except Exception as e:
+            logger.warning(f"Markets unavailable for {exchange_id} stream aliases: {str(e)}")
+            return
+        markets = self.service.exchanges[exchange_id].markets or {}
+        for symbol in symbols:
+            market_id = (markets.get(symbol) or {}).get('id')
+            if market_id:
+                self.board.alias(exchange_id, market_id, symbol)
+    
+    def _apply(self, exchange_id: str, symbol: str, ticker: Dict[str, Any], seq: Optional[int]) -> None:
+        """Check an update's sequence number and write it to the board"""
+        feed = self.feeds[exchange_id]
+        if seq is not None:
+            last = self.sequences.get((exchange_id, symbol))
+            if last is not None and seq <= last:
+                feed["out_of_order"] += 1
+                return
+            if last is not None and seq > last + 1:
+                feed["gaps"] += 1
+                logger.info(f"{exchange_id} feed skipped {seq - last - 1} updates for {symbol}")
+            self.sequences[(exchange_id, symbol)] = seq
+        
+        self.board.update(exchange_id, symbol, self.service._format_ticker(exchange_id, symbol, ticker))
+        feed["updates"] += 1
+        feed["last_update"] = time.time()
+    
+    async def _run(self, exchange_id: str, symbols: List[str]) -> None:
+        """Stream an exchange for the lifetime of the ingestor, reconnecting when the feed breaks"""
+        feed = self.feeds[exchange_id]
+        await self._register_aliases(exchange_id, symbols)
+        delay = self.reconnect_min
+        while True:
+            feed["state"] = "connecting"
+            adapter = None
+            try:
+                adapter = self.adapter_factory(exchange_id)
+                async for symbol, ticker, seq in adapter.stream(symbols):
+                    if feed["state"] != "streaming":
+                        feed["state"] = "streaming"
+                        feed["connects"] += 1
+                        delay = self.reconnect_min
+                        logger.info(f"Streaming {len(symbols)} tickers from {exchange_id}")
+                    self._apply(exchange_id, symbol, ticker, seq)
+                raise ConnectionError("feed ended")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                feed["state"] = "reconnecting"
+                feed["last_error"] = str(e)
+                dropped = self.board.invalidate(exchange_id)
+                # A restarted feed may count from scratch
+                for symbol in symbols:
+                    self.sequences.pop((exchange_id, symbol), None)
+                logger.warning(
+                    f"{exchange_id} ticker feed failed ({str(e)}); {dropped} tickers back on REST, "
+                    f"reconnecting in {delay:.1f}s"
+                )
+            finally:
+                if adapter is not None:
+                    try:
+                        await adapter.close()
+                    except Exception as e:
+                        logger.debug(f"Error closing {exchange_id} feed: {str(e)}")
+            
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.reconnect_max)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get state and counters per exchange feed"""
+        return {exchange_id: dict(feed) for exchange_id, feed in self.feeds.items()}
@@ -0,0 +1,328 @@
+"""
+On-disk journal of upstream exchange calls for record and replay modes
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import ccxt
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Leading arguments that identify what a call asks for; later ones (since, limit) may differ between runs
+KEY_ARGS = {"load_markets": 0, "fetch_ticker": 1, "fetch_tickers": 1, "fetch_order_book": 1, "fetch_ohlcv": 2}
+# Arguments that do not change a response (load_markets' reload flag)
+SIGNIFICANT_ARGS = {"load_markets": 0}
+
+
+def _encode_args(method: str, args: Sequence[Any]) -> Tuple[str, str]:
+    """Get the (args, key) lookup columns of a call"""
+    args = list(args[:SIGNIFICANT_ARGS.get(method, len(args))])
+    key = args[:KEY_ARGS.get(method, len(args))]
+    return orjson.dumps(args, default=str).decode(), orjson.dumps(key, default=str).decode()
+
+
+def _error_class(name: str) -> type:
+    """Map a recorded exception name back to a ccxt exception"""
+    if name == "TimeoutError":
+        return ccxt.RequestTimeout
+    error = getattr(ccxt, name, None)
+    return error if isinstance(error, type) and issubclass(error, ccxt.BaseError) else ccxt.ExchangeError
+
+
+class UpstreamJournal:
+    """
+    Upstream responses and their latencies, indexed by exchange, method and arguments
+    
+    Recording buffers calls in memory and writes them in batches from a worker
+    thread (flush); each response is stored as zlib-compressed JSON. Lookups
+    find the latest response recorded at or before a point in the recording,
+    matching the exact arguments first and otherwise only the identifying
+    ones (so an OHLCV window anchored on "now" still finds its series).
+    """
+    
+    def __init__(self, path: str):
+        """
+        Open or create a journal
+        
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        
+        # Flushed and read from worker threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS calls (
+                id INTEGER PRIMARY KEY,
+                exchange TEXT NOT NULL,
+                method TEXT NOT NULL,
+                args TEXT NOT NULL,
+                key TEXT NOT NULL,
+                ts REAL NOT NULL,
+                latency REAL NOT NULL,
+                error TEXT,
+                response BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS calls_by_args ON calls (exchange, method, args, ts);
+            CREATE INDEX IF NOT EXISTS calls_by_key ON calls (exchange, method, key, ts);
+            CREATE TABLE IF NOT EXISTS exchanges (
+                exchange TEXT PRIMARY KEY,
+                metadata BLOB NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+        self.pending: List[Tuple[Any, ...]] = []
+        self.recorded = 0
+        self.replay_origin: Optional[float] = None
+        self.start = self._conn.execute("SELECT MIN(ts) FROM calls").fetchone()[0]
+        logger.info(f"Upstream journal opened at {path}")
+    
+    def record(
+        self,
+        exchange: str,
+        method: str,
+        args: Sequence[Any],
+        ts: float,
+        latency: float,
+        result: Any = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Buffer one finished call (ts is its wall-clock start); written by the next flush"""
+        try:
+            args_json, key_json = _encode_args(method, args)
+            payload = str(error).encode() if error is not None else orjson.dumps(
+                result, default=str, option=orjson.OPT_NON_STR_KEYS
+            )
+        except (TypeError, orjson.JSONEncodeError) as e:
+            # A response the journal cannot store must not fail the call itself
+            logger.warning(f"Not recording {exchange} {method}: {str(e)}")
+            return
+        self.pending.append((
+            exchange, method, args_json, key_json, ts, latency,
+            type(error).__name__ if error is not None else None, payload
+        ))
+    
+    def record_exchange(self, exchange_id: str, exchange: Any) -> None:
+        """Store what replay needs to present an exchange like the recorded one"""
+        metadata = {
+            "name": getattr(exchange, "name", exchange_id),
+            "rateLimit": getattr(exchange, "rateLimit", None),
+            "timeframes": getattr(exchange, "timeframes", None),
+            "has": {k: v for k, v in (getattr(exchange, "has", None) or {}).items() if isinstance(v, bool)},
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exchanges VALUES (?, ?)",
+                (exchange_id, orjson.dumps(metadata, default=str))
+            )
+            self._conn.commit()
+    
+    def exchange_metadata(self, exchange_id: str) -> Dict[str, Any]:
+        """Get the recorded metadata of an exchange (empty if it was never recorded)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT metadata FROM exchanges WHERE exchange = ?", (exchange_id,)
+            ).fetchone()
+        return orjson.loads(row[0]) if row else {}
+    
+    def take_pending(self) -> List[Tuple[Any, ...]]:
+        """Hand over the buffered calls for a flush (on the thread that records them)"""
+        rows, self.pending = self.pending, []
+        return rows
+    
+    def restore(self, rows: List[Tuple[Any, ...]]) -> None:
+        """Buffer calls again after a failed flush, ahead of those recorded since"""
+        self.pending[:0] = rows
+    
+    def flush(self, rows: Optional[List[Tuple[Any, ...]]] = None) -> int:
+        """
+        Compress and write calls; returns the number written
+        
+        Args:
+            rows: Calls from take_pending(), so a flush in a worker thread never
+                touches the buffer record() appends to (the whole buffer if omitted)
+        
+        Raises:
+            sqlite3.Error: The write failed; omitted rows are buffered again,
+                given ones are left for the caller to restore()
+        """
+        taken = rows is None
+        if taken:
+            rows = self.take_pending()
+        if not rows:
+            return 0
+        
+        compressed = [row[:7] + (zlib.compress(row[7]),) for row in rows]
+        try:
+            with self._lock:
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO calls (exchange, method, args, key, ts, latency, error, response) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        compressed
+                    )
+                    self._conn.commit()
+                except sqlite3.Error:
+                    self._conn.rollback()
+                    raise
+                if self.start is None:
+                    self.start = min(row[4] for row in rows)
+        except sqlite3.Error:
+            if taken:
+                self.restore(rows)
+            raise
+        self.recorded += len(rows)
+        return len(rows)
+    
+    def replay_time(self, speed: float) -> float:
+        """Map now onto the recording's clock, the first replayed call starting at its beginning"""
+        now = time.monotonic()
+        if self.replay_origin is None:
+            self.replay_origin = now
+        return (self.start or 0.0) + (now - self.replay_origin) * speed
+    
+    def lookup(
+        self,
+        exchange: str,
+        method: str,
+        args: Sequence[Any],
+        at: float
+    ) -> Optional[Tuple[float, Optional[type], Any]]:
+        """
+        Find the response to replay for a call made at recording time at
+        
+        Returns:
+            (latency, exception class or None, result or error message), or None if never recorded
+        """
+        args_json, key_json = _encode_args(method, args)
+        with self._lock:
+            for column, value in (("args", args_json), ("key", key_json)):
+                query = (
+                    f"SELECT latency, error, response FROM calls "
+                    f"WHERE exchange = ? AND method = ? AND {column} = ?"
+                )
+                row = self._conn.execute(
+                    query + " AND ts <= ? ORDER BY ts DESC LIMIT 1", (exchange, method, value, at)
+                ).fetchone() or self._conn.execute(
+                    query + " ORDER BY ts LIMIT 1", (exchange, method, value)
+                ).fetchone()
+                if row is not None:
+                    break
+            else:
+                return None
+        
+        latency, error, response = row
+        payload = zlib.decompress(response)
+        if error is not None:
+            return latency, _error_class(error), payload.decode()
+        return latency, None, orjson.loads(payload)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get recorded call counts per exchange and method"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT exchange, method, COUNT(*) FROM calls GROUP BY exchange, method"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for exchange, method, count in rows:
+            counts.setdefault(exchange, {})[method] = count
+        return {"path": self.path, "pending": len(self.pending), "calls": counts}
+    
+    def close(self) -> None:
+        """Write buffered calls and close the database"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayExchange:
+    """
+    Async ccxt exchange stand-in answering from an UpstreamJournal
+    
+    Responses follow the recording's clock: a call made t seconds into the
+    replay gets the latest response recorded by t * speed seconds into the
+    recording, after sleeping the recorded latency divided by speed. Recorded
+    failures are raised again as their ccxt exceptions.
+    """
+    
+    def __init__(self, exchange_id: str, journal: UpstreamJournal, speed: float = 1.0):
+        """
+        Initialize replay exchange
+        
+        Args:
+            exchange_id: Exchange whose recording is replayed
+            journal: Journal to replay
+            speed: Replay clock rate (1 = original timing, 10 = ten times faster)
+        """
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        metadata = journal.exchange_metadata(exchange_id)
+        self.id = exchange_id
+        self.journal = journal
+        self.speed = speed
+        self.name = metadata.get("name", exchange_id)
+        self.timeframes = metadata.get("timeframes")
+        self.has = metadata.get("has", {})
+        # Recorded pacing, compressed like the clock
+        self.rateLimit = metadata["rateLimit"] / speed if metadata.get("rateLimit") else None
+        self.markets: Dict[str, Any] = {}
+        self.currencies: Dict[str, Any] = {}
+    
+    async def _replay(self, method: str, *args) -> Any:
+        """Serve one call from the journal"""
+        at = self.journal.replay_time(self.speed)
+        found = await asyncio.to_thread(self.journal.lookup, self.id, method, args, at)
+        if found is None:
+            raise ccxt.ExchangeError(f"{self.id} {method}{args} is not in the journal")
+        
+        latency, error, payload = found
+        await asyncio.sleep(latency / self.speed)
+        if error is not None:
+            raise error(payload)
+        return payload
+    
+    def set_markets(self, markets: Dict[str, Any], currencies: Optional[Dict[str, Any]] = None):
+        self.markets = markets
+        self.currencies = currencies or {}
+        return markets
+    
+    async def load_markets(self, reload: bool = False) -> Dict[str, Any]:
+        if self.markets and not reload:
+            return self.markets
+        return self.set_markets(await self._replay("load_markets"))
+    
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return await self._replay("fetch_ticker", symbol)
+    
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        return await self._replay("fetch_tickers", symbols)
+    
+    async def fetch_ohlcv(
+        self,
+        symbol: str,
+        timeframe: str = "1m",
+        since: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[List[Any]]:
+        return await self._replay("fetch_ohlcv", symbol, timeframe, since, limit)
+    
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        return await self._replay("fetch_order_book", symbol, limit)
+    
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,228 @@
+"""
+Priority-aware, rate-limit-aware scheduling of upstream exchange calls
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from services.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+INTERACTIVE = 0
+STREAMING = 1
+BACKFILL = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STREAMING: "streaming", BACKFILL: "backfill"}
+
+# Cost of unified methods in ccxt rate-limit units (one unit refills every exchange.rateLimit ms)
+DEFAULT_METHOD_COSTS = {"fetch_tickers": 10, "load_markets": 10}
+EXCHANGE_METHOD_COSTS = {
+    # Request weights from the Binance spot API docs (rateLimit=50ms, 1200 weight/minute)
+    "binance": {"fetch_ticker": 2, "fetch_tickers": 80, "fetch_ohlcv": 2, "fetch_order_book": 5, "load_markets": 40},
+    "kraken": {"load_markets": 2},
+}
+
+
+class UpstreamBusyError(Exception):
+    """Raised when an upstream call cannot start within its deadline"""
+    
+    def __init__(self, exchange_id: str, retry_after: float):
+        super().__init__(f"{exchange_id} rate limit queue is full; retry in {retry_after:.1f}s")
+        self.exchange_id = exchange_id
+        self.retry_after = retry_after
+
+
+class ExchangeLimiter:
+    """Token bucket and priority queue for one exchange"""
+    
+    def __init__(self, exchange_id: str, rate: float, capacity: float):
+        """
+        Initialize exchange limiter
+        
+        Args:
+            exchange_id: Exchange the bucket models
+            rate: Cost units refilled per second
+            capacity: Largest burst in cost units
+        """
+        self.exchange_id = exchange_id
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        # Heap of (priority, sequence, cost, future)
+        self.waiters: List[Any] = []
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.rejected = 0
+    
+    def refill(self) -> None:
+        """Add the tokens earned since the last refill"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def estimated_wait(self, cost: float, priority: int) -> float:
+        """Seconds until a new request would be granted, given everything queued ahead of it"""
+        ahead = sum(w[2] for w in self.waiters if w[0] <= priority and not w[3].done())
+        return max(0.0, ahead + min(cost, self.capacity) - self.tokens) / self.rate
+    
+    def queue_depth(self) -> Dict[str, int]:
+        """Get number of queued requests per priority class"""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self.waiters:
+            if not future.done():
+                depth[PRIORITY_NAMES[priority]] += 1
+        return depth
+    
+    async def dispatch(self) -> None:
+        """Grant queued requests in priority order as tokens become available"""
+        while self.waiters:
+            priority, _, cost, future = self.waiters[0]
+            if future.done():
+                # The caller gave up (deadline or disconnect)
+                heapq.heappop(self.waiters)
+                continue
+            
+            self.refill()
+            # A request costing more than the bucket holds runs on a full bucket and leaves debt
+            needed = min(cost, self.capacity)
+            if self.tokens >= needed:
+                heapq.heappop(self.waiters)
+                self.tokens -= cost
+                self.granted += 1
+                future.set_result(None)
+                continue
+            
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+
+
+class UpstreamScheduler:
+    """Per-exchange token buckets with priority classes in front of every upstream call"""
+    
+    def __init__(
+        self,
+        burst_seconds: float = 1.0,
+        deadlines: Optional[Dict[int, Optional[float]]] = None
+    ):
+        """
+        Initialize upstream scheduler
+        
+        Args:
+            burst_seconds: Bucket capacity, as seconds' worth of each exchange's refill rate
+            deadlines: Longest wait in seconds per priority class before rejecting (None waits)
+        """
+        self.burst_seconds = burst_seconds
+        self.deadlines = deadlines if deadlines is not None else {
+            INTERACTIVE: 5.0, STREAMING: 2.0, BACKFILL: None
+        }
+        self.limiters: Dict[str, ExchangeLimiter] = {}
+        self._sequence = itertools.count()
+        self.wait_time = Histogram(
+            "upstream_scheduler_wait_seconds",
+            "Time upstream calls waited for rate-limit tokens",
+            ("exchange", "priority")
+        )
+        self.rejections = Counter(
+            "upstream_scheduler_rejected_total",
+            "Upstream calls rejected because they could not start within their deadline",
+            ("exchange", "priority")
+        )
+    
+    def cost(self, exchange_id: str, method: str) -> float:
+        """Get the rate-limit cost of a unified method on an exchange"""
+        costs = EXCHANGE_METHOD_COSTS.get(exchange_id, {})
+        return costs.get(method, DEFAULT_METHOD_COSTS.get(method, 1))
+    
+    def _limiter(self, exchange_id: str, rate_limit_ms: float) -> ExchangeLimiter:
+        """Get or create the limiter for an exchange"""
+        limiter = self.limiters.get(exchange_id)
+        if limiter is None:
+            rate = 1000.0 / rate_limit_ms
+            limiter = self.limiters[exchange_id] = ExchangeLimiter(
+                exchange_id, rate, max(1.0, rate * self.burst_seconds)
+            )
+        return limiter
+    
+    async def acquire(
+        self,
+        exchange_id: str,
+        method: str,
+        rate_limit_ms: float,
+        priority: int = INTERACTIVE
+    ) -> None:
+        """
+        Wait until a call may be sent to the exchange
+        
+        Raises:
+            UpstreamBusyError: The call cannot start within its priority's deadline
+        """
+        limiter = self._limiter(exchange_id, rate_limit_ms)
+        cost = self.cost(exchange_id, method)
+        priority_name = PRIORITY_NAMES[priority]
+        limiter.refill()
+        
+        if not limiter.waiters and limiter.tokens >= min(cost, limiter.capacity):
+            limiter.tokens -= cost
+            limiter.granted += 1
+            self.wait_time.observe(0.0, exchange_id, priority_name)
+            return
+        
+        deadline = self.deadlines.get(priority)
+        estimate = limiter.estimated_wait(cost, priority)
+        if deadline is not None and estimate > deadline:
+            limiter.rejected += 1
+            self.rejections.inc(exchange_id, priority_name)
+            raise UpstreamBusyError(exchange_id, estimate)
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(limiter.waiters, (priority, next(self._sequence), cost, future))
+        if limiter.dispatcher is None or limiter.dispatcher.done():
+            limiter.dispatcher = asyncio.ensure_future(limiter.dispatch())
+        
+        start = time.perf_counter()
+        try:
+            # Later higher-priority arrivals can push us past the estimate
+            await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+        except asyncio.TimeoutError:
+            future.cancel()
+            limiter.rejected += 1
+            self.rejections.inc(exchange_id, priority_name)
+            raise UpstreamBusyError(exchange_id, limiter.estimated_wait(cost, priority))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        self.wait_time.observe(time.perf_counter() - start, exchange_id, priority_name)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get bucket level, queue depth and counters per exchange"""
+        stats = {}
+        for exchange_id, limiter in self.limiters.items():
+            limiter.refill()
+            stats[exchange_id] = {
+                "rate_per_second": round(limiter.rate, 3),
+                "capacity": round(limiter.capacity, 3),
+                "tokens": round(limiter.tokens, 3),
+                "queued": limiter.queue_depth(),
+                "estimated_wait_seconds": {
+                    name: round(limiter.estimated_wait(1, priority), 3)
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+                "granted": limiter.granted,
+                "rejected": limiter.rejected,
+            }
+        return stats
+    
+    async def stop(self) -> None:
+        """Cancel dispatchers and fail anything still queued"""
+        for limiter in self.limiters.values():
+            for _, _, _, future in limiter.waiters:
+                future.cancel()
+            limiter.waiters.clear()
+            if limiter.dispatcher is not None:
+                limiter.dispatcher.cancel()
+                await asyncio.gather(limiter.dispatcher, return_exceptions=True)
@@ -3,96 +3,338 @@ WebSocket manager for real-time updates
 """
 
 from fastapi import WebSocket
-from typing import List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+from collections import OrderedDict
+import itertools
 import json
 import logging
 import asyncio
+import time
+
+from services.ticker_fanout import TickerFanout
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_EXCHANGE = "binance"
+
+# Overflow policies applied when a client's send queue is full
+DROP_OLDEST = "drop_oldest"
+LATEST_PER_SYMBOL = "latest_per_symbol"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_OLDEST, LATEST_PER_SYMBOL, DISCONNECT)
+
+
+class ClientConnection:
+    """A WebSocket client with its own bounded send queue and writer task"""
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, websocket: WebSocket, manager: "WebSocketManager", max_queue: int, policy: str):
+        """
+        Initialize client connection
+        
+        Args:
+            websocket: Accepted WebSocket
+            manager: Owning manager, notified when the client must be dropped
+            max_queue: Maximum number of pending outbound messages
+            policy: Overflow policy (drop_oldest, latest_per_symbol or disconnect)
+        """
+        self.id = next(self._ids)
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max_queue
+        self.policy = policy
+        self.subscriptions: Set[Tuple[str, str]] = set()
+        self.book_subscriptions: Set[Tuple[str, str]] = set()
+        
+        # Pending messages keyed by conflation key (latest_per_symbol) or sequence number
+        self.queue: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+        self.closed = False
+        
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.last_send_lag = 0.0
+        self.max_send_lag = 0.0
+        self.writer = asyncio.create_task(self._write())
+    
+    def enqueue(self, message: str, key: Optional[Hashable] = None) -> bool:
+        """
+        Queue a serialized message without waiting for the socket
+        
+        Args:
+            message: Serialized message
+            key: Conflation key (e.g. the symbol); only used by latest_per_symbol
+        
+        Returns False when the message was not queued.
+        """
+        if self.closed:
+            return False
+        
+        if self.policy == LATEST_PER_SYMBOL and key is not None:
+            if key in self.queue:
+                # Replace in place, keeping the age of the oldest undelivered update
+                self.queue[key] = (message, self.queue[key][1])
+                self.conflated += 1
+                return True
+        else:
+            key = next(self._seq)
+        
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            if self.policy == DISCONNECT:
+                logger.warning(f"WebSocket client {self.id} send queue full, disconnecting")
+                self.manager.disconnect(self.websocket, code=1013, reason="Client too slow")
+                return False
+            self.queue.popitem(last=False)
+        
+        self.queue[key] = (message, time.monotonic())
+        self._ready.set()
+        return True
+    
+    def lag(self) -> float:
+        """Get age in seconds of the oldest undelivered message"""
+        if not self.queue:
+            return 0.0
+        return time.monotonic() - next(iter(self.queue.values()))[1]
+    
+    async def _write(self):
+        """Drain the queue to the socket"""
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                
+                _, (message, enqueued_at) = self.queue.popitem(last=False)
+                await self.websocket.send_text(message)
+                self.sent += 1
+                self.last_send_lag = time.monotonic() - enqueued_at
+                self.max_send_lag = max(self.max_send_lag, self.last_send_lag)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error sending to WebSocket client {self.id}: {str(e)}")
+            self.manager.disconnect(self.websocket)
+    
+    def close(self):
+        """Stop the writer and discard pending messages"""
+        self.closed = True
+        self.queue.clear()
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get per-connection send statistics"""
+        return {
+            "id": self.id,
+            "queue_depth": len(self.queue),
+            "lag_seconds": round(self.lag(), 3),
+            "last_send_lag_seconds": round(self.last_send_lag, 3),
+            "max_send_lag_seconds": round(self.max_send_lag, 3),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+            "subscriptions": len(self.subscriptions),
+            "book_subscriptions": len(self.book_subscriptions),
+        }
+
 
 class WebSocketManager:
     """Manages WebSocket connections and subscriptions"""
     
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.subscriptions: Dict[WebSocket, List[str]] = {}
+    def __init__(
+        self,
+        fetch_ticker: Optional[Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]]] = None,
+        poll_interval: float = 2.0,
+        max_queue: int = 256,
+        overflow_policy: str = LATEST_PER_SYMBOL,
+        order_books: Optional[Any] = None
+    ):
+        """
+        Initialize WebSocket manager
+        
+        Args:
+            fetch_ticker: Coroutine function used to stream tickers to subscribers
+            poll_interval: Seconds between upstream polls per subscribed pair
+            max_queue: Maximum pending outbound messages per client
+            overflow_policy: What to do when a client's queue is full
+            order_books: OrderBookService streaming book deltas to subscribe_book clients
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.dropped_clients = 0
+        self.fanout = TickerFanout(fetch_ticker, self._deliver, poll_interval) if fetch_ticker else None
+        self.order_books = order_books
     
     async def connect(self, websocket: WebSocket):
         """Accept a new WebSocket connection"""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        self.subscriptions[websocket] = []
+        self.active_connections[websocket] = ClientConnection(
+            websocket, self, self.max_queue, self.overflow_policy
+        )
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
     
-    def disconnect(self, websocket: WebSocket):
-        """Remove a WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if websocket in self.subscriptions:
-            del self.subscriptions[websocket]
+    def disconnect(self, websocket: WebSocket, code: Optional[int] = None, reason: str = ""):
+        """
+        Remove a WebSocket connection
+        
+        Args:
+            websocket: Connection to remove
+            code: If given, also close the socket with this close code
+            reason: Close reason sent with code
+        """
+        connection = self.active_connections.pop(websocket, None)
+        if connection is None:
+            return
+        
+        connection.close()
+        if self.fanout:
+            for exchange, symbol in connection.subscriptions:
+                self.fanout.unsubscribe(connection, exchange, symbol)
+        if self.order_books:
+            for exchange, symbol in connection.book_subscriptions:
+                self.order_books.unsubscribe(connection, exchange, symbol)
+        
+        if code is not None:
+            self.dropped_clients += 1
+            asyncio.create_task(self._close_socket(websocket, code, reason))
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
+    async def _close_socket(self, websocket: WebSocket, code: int, reason: str):
+        """Close a socket the server gave up on"""
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception as e:
+            logger.debug(f"Error closing WebSocket: {str(e)}")
+    
+    async def _deliver(self, connections: Iterable[ClientConnection], message_str: str, key: Optional[Hashable] = None):
+        """Queue a pre-serialized message on the given connections"""
+        for connection in connections:
+            connection.enqueue(message_str, key)
+    
+    def _send(self, websocket: WebSocket, message: Dict[str, Any]):
+        """Queue a message for one client"""
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            connection.enqueue(json.dumps(message))
+    
     async def handle_message(self, websocket: WebSocket, message: str):
         """Handle incoming WebSocket message"""
+        connection = self.active_connections.get(websocket)
+        
         try:
             data = json.loads(message)
             action = data.get("action")
             
             if action == "subscribe":
+                exchange = data.get("exchange", DEFAULT_EXCHANGE)
                 symbols = data.get("symbols", [])
-                if websocket in self.subscriptions:
-                    self.subscriptions[websocket].extend(symbols)
-                await websocket.send_text(json.dumps({
+                if connection is not None:
+                    for symbol in symbols:
+                        connection.subscriptions.add((exchange, symbol))
+                        if self.fanout:
+                            await self.fanout.subscribe(connection, exchange, symbol)
+                self._send(websocket, {
                     "type": "subscribed",
+                    "exchange": exchange,
                     "symbols": symbols
-                }))
+                })
             
             elif action == "unsubscribe":
+                exchange = data.get("exchange", DEFAULT_EXCHANGE)
                 symbols = data.get("symbols", [])
-                if websocket in self.subscriptions:
-                    self.subscriptions[websocket] = [
-                        s for s in self.subscriptions[websocket] if s not in symbols
-                    ]
-                await websocket.send_text(json.dumps({
+                if connection is not None:
+                    for symbol in symbols:
+                        connection.subscriptions.discard((exchange, symbol))
+                        if self.fanout:
+                            self.fanout.unsubscribe(connection, exchange, symbol)
+                self._send(websocket, {
                     "type": "unsubscribed",
+                    "exchange": exchange,
+                    "symbols": symbols
+                })
+            
+            elif action in ("subscribe_book", "unsubscribe_book"):
+                exchange = data.get("exchange", DEFAULT_EXCHANGE)
+                symbols = data.get("symbols", [])
+                if self.order_books is None:
+                    self._send(websocket, {
+                        "type": "error",
+                        "message": "Order book streaming is disabled"
+                    })
+                    return
+                # Queued before the snapshot subscribing sends, so clients see it first
+                self._send(websocket, {
+                    "type": "book_subscribed" if action == "subscribe_book" else "book_unsubscribed",
+                    "exchange": exchange,
                     "symbols": symbols
-                }))
+                })
+                if connection is not None:
+                    for symbol in symbols:
+                        if action == "subscribe_book":
+                            pair = await self.order_books.subscribe(connection, exchange, symbol)
+                            connection.book_subscriptions.add(pair)
+                        else:
+                            pair = self.order_books.resolve(exchange, symbol)
+                            connection.book_subscriptions.discard(pair)
+                            self.order_books.unsubscribe(connection, exchange, symbol)
             
             else:
-                await websocket.send_text(json.dumps({
+                self._send(websocket, {
                     "type": "error",
                     "message": f"Unknown action: {action}"
-                }))
+                })
         
         except json.JSONDecodeError:
-            await websocket.send_text(json.dumps({
+            self._send(websocket, {
                 "type": "error",
                 "message": "Invalid JSON format"
-            }))
+            })
         except Exception as e:
             logger.error(f"Error handling WebSocket message: {str(e)}")
-            await websocket.send_text(json.dumps({
+            self._send(websocket, {
                 "type": "error",
                 "message": str(e)
-            }))
+            })
     
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast message to all connected clients"""
         if not self.active_connections:
             return
         
-        message_str = json.dumps(message)
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_str)
-            except Exception as e:
-                logger.warning(f"Error broadcasting to connection: {str(e)}")
-                disconnected.append(connection)
+        await self._deliver(list(self.active_connections.values()), json.dumps(message))
+    
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Get send statistics
         
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
-
+        Args:
+            top: Number of most-lagging connections to include in detail
+        """
+        connections = list(self.active_connections.values())
+        slowest = sorted(connections, key=lambda c: (c.lag(), len(c.queue)), reverse=True)[:top]
+        return {
+            "connections": len(connections),
+            "overflow_policy": self.overflow_policy,
+            "max_queue": self.max_queue,
+            "queued": sum(len(c.queue) for c in connections),
+            "dropped": sum(c.dropped for c in connections),
+            "dropped_clients": self.dropped_clients,
+            "max_lag_seconds": round(max((c.lag() for c in connections), default=0.0), 3),
+            "slowest": [c.stats() for c in slowest],
+        }
+    
+    async def shutdown(self):
+        """Stop all ticker pollers and writers"""
+        if self.fanout:
+            await self.fanout.stop()
+        for websocket in list(self.active_connections):
+            self.disconnect(websocket)
@@ -0,0 +1,126 @@
+"""
+Tests for cache backends
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import time
+import pytest
+from services.cache_backends import SQLiteCacheBackend
+from services.cache_service import CachePolicy, CacheService
+
+
+def test_sqlite_backend_expiry_and_limits(tmp_path):
+    """Test entries expire after their lifetime and namespaces are trimmed to size"""
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), cleanup_every=4)
+    backend.configure("ticker", max_size=2, lifetime=0.2)
+    
+    backend.set("ticker", "ticker:a", {"last": 1.0}, time.time() + 0.1)
+    assert backend.get("ticker", "ticker:a")[0] == {"last": 1.0}
+    
+    for key in ("ticker:b", "ticker:c", "ticker:d"):
+        backend.set("ticker", key, 1, time.time() + 0.1)
+    assert backend.size("ticker") == 2
+    assert backend.evictions("ticker") == 2
+    
+    time.sleep(0.25)
+    assert backend.get("ticker", "ticker:d") is None
+
+
+def test_sqlite_lock_is_exclusive_until_expiry(tmp_path):
+    """Test only one backend holds a key's lock until it is released or expires"""
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    
+    assert first.try_lock("ticker:a", timeout=0.2)
+    assert not second.try_lock("ticker:a", timeout=0.2)
+    first.unlock("ticker:a")
+    assert second.try_lock("ticker:a", timeout=0.1)
+    
+    time.sleep(0.15)
+    assert first.try_lock("ticker:a", timeout=1)
+
+
+def test_sqlite_busy_database_does_not_block(tmp_path):
+    """Test a write held by another process turns sets, locks and unlocks into quick no-ops"""
+    path = str(tmp_path / "cache.db")
+    backend = SQLiteCacheBackend(path, busy_timeout=0.01)
+    backend.configure("ticker", max_size=10, lifetime=60)
+    backend.set("ticker", "ticker:a", 1, time.time() + 30)
+    assert backend.try_lock("ticker:b", timeout=60)
+    
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    started = time.monotonic()
+    backend.set("ticker", "ticker:c", 3, time.time() + 30)
+    assert not backend.try_lock("ticker:d", timeout=60)
+    backend.unlock("ticker:b")
+    assert time.monotonic() - started < 1.0
+    assert backend.get("ticker", "ticker:a")[0] == 1
+    assert backend.get("ticker", "ticker:c") is None
+    assert backend.busy == 3
+    
+    writer.execute("COMMIT")
+    backend.set("ticker", "ticker:c", 3, time.time() + 30)
+    assert backend.get("ticker", "ticker:c")[0] == 3
+    assert SQLiteCacheBackend(path).try_lock("ticker:b", timeout=60)
+
+
+def test_sqlite_stats_and_clear_survive_busy_database(tmp_path, monkeypatch):
+    """Test size and clear do not raise while another process holds the database"""
+    path = str(tmp_path / "cache.db")
+    backend = SQLiteCacheBackend(path, busy_timeout=0.01)
+    backend.configure("ticker", max_size=10, lifetime=60)
+    backend.set("ticker", "ticker:a", 1, time.time() + 30)
+    
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    backend.clear()
+    assert backend.busy == 1
+    assert backend.size("ticker") == 1
+    writer.execute("COMMIT")
+    
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+    
+    monkeypatch.setattr(backend, "_connect", locked)
+    assert backend.size("ticker") == 1
+    assert backend.size("historical") == 0
+    assert backend.busy == 3
+
+
+def _worker(path, log_path, results):
+    """Load one key through a shared cache, logging each upstream call"""
+    cache = CacheService(
+        policies={"ticker": CachePolicy(ttl=60)},
+        backend=SQLiteCacheBackend(path)
+    )
+    
+    async def loader():
+        with open(log_path, "a") as log:
+            log.write(f"{os.getpid()}\n")
+        await asyncio.sleep(0.3)
+        return {"last": 42.0}
+    
+    results.put(asyncio.run(cache.get_or_load("ticker:binance:BTC/USDT", loader)))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_workers_share_one_upstream_call(tmp_path):
+    """Test several processes missing the same key make a single upstream call"""
+    context = multiprocessing.get_context("fork")
+    path, log_path = str(tmp_path / "cache.db"), str(tmp_path / "calls.log")
+    SQLiteCacheBackend(path)
+    results = context.Queue()
+    
+    workers = [context.Process(target=_worker, args=(path, log_path, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+    
+    assert [results.get(timeout=1) for _ in workers] == [{"last": 42.0}] * 4
+    with open(log_path) as log:
+        assert len(log.readlines()) == 1
@@ -3,8 +3,9 @@ Tests for cache service
 """
 
 import pytest
+import asyncio
 import time
-from services.cache_service import CacheService
+from services.cache_service import CachePolicy, CacheService
 
 
 def test_cache_set_get():
@@ -40,3 +41,67 @@ def test_cache_size():
     cache.set("test_key", "test_value")
     assert cache.size() == 1
 
+
+
+def test_namespace_policies():
+    """Test namespaces get their own TTL and size limit"""
+    cache = CacheService(ttl=60, max_size=100, policies={"ticker": CachePolicy(ttl=1, max_size=2)})
+    for i in range(3):
+        cache.set(f"ticker:binance:{i}", i)
+    cache.set("markets:binance", ["BTC/USDT"])
+    
+    assert cache.get("ticker:binance:0") is None
+    assert cache.get("ticker:binance:2") == 2
+    
+    time.sleep(1.1)
+    assert cache.get("ticker:binance:2") is None
+    assert cache.get("markets:binance") == ["BTC/USDT"]
+
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing():
+    """Test an expired entry in its stale window is returned at once and refreshed once"""
+    cache = CacheService(policies={"ticker": CachePolicy(ttl=0.05, stale_ttl=10)})
+    calls = []
+    
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+    
+    assert await cache.get_or_load("ticker:a", loader) == 1
+    await asyncio.sleep(0.06)
+    
+    # Stale: served immediately, with a single background refresh
+    results = await asyncio.wait_for(
+        asyncio.gather(*[cache.get_or_load("ticker:a", loader) for _ in range(5)]),
+        timeout=0.03
+    )
+    assert results == [1] * 5
+    await asyncio.sleep(0.08)
+    
+    assert len(calls) == 2
+    assert await cache.get_or_load("ticker:a", loader) == 2
+    assert cache.stats()["ticker"]["stale_hits"] == 5
+    assert cache.stats()["ticker"]["refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hot_key_refreshed_before_expiry():
+    """Test a hit in the refresh-ahead window refreshes the entry before it expires"""
+    cache = CacheService(policies={"ticker": CachePolicy(ttl=0.1, refresh_ahead=0.5)})
+    calls = []
+    
+    async def loader():
+        calls.append(1)
+        return len(calls)
+    
+    await cache.get_or_load("ticker:a", loader)
+    await asyncio.sleep(0.07)
+    assert await cache.get_or_load("ticker:a", loader) == 1
+    await asyncio.sleep(0.01)
+    
+    # Refreshed in the background, so the entry is fresh past the original expiry
+    await asyncio.sleep(0.05)
+    assert cache.get("ticker:a") == 2
+    assert cache.stats()["ticker"]["misses"] == 1
@@ -0,0 +1,55 @@
+"""
+Tests for candle store
+"""
+
+from services.candle_store import CandleStore
+
+
+def test_put_and_get_range(tmp_path):
+    """Test stored candles are returned in time order within the range"""
+    store = CandleStore(str(tmp_path / "candles.db"))
+    store.put("binance", "BTC/USDT", "1m", [
+        [120000, 3, 3, 3, 3, 1],
+        [0, 1, 1, 1, 1, 1],
+        [60000, 2, 2, 2, 2, 1],
+    ])
+    
+    rows = store.get_range("binance", "BTC/USDT", "1m", 0, 60000)
+    assert [row[0] for row in rows] == [0, 60000]
+    assert store.get_range("binance", "BTC/USDT", "5m", 0, 60000) == []
+
+
+def test_store_survives_reopen(tmp_path):
+    """Test candles persist across store instances"""
+    path = str(tmp_path / "candles.db")
+    store = CandleStore(path)
+    store.put("kraken", "ETH/USD", "1h", [[0, 1, 2, 0.5, 1.5, 10]])
+    store.close()
+    
+    reopened = CandleStore(path)
+    assert reopened.get_range("kraken", "ETH/USD", "1h", 0, 0) == [(0, 1, 2, 0.5, 1.5, 10)]
+    assert reopened.count("kraken") == 1
+
+
+def test_mark_empty(tmp_path):
+    """Test empty markers are stored with null prices"""
+    store = CandleStore(str(tmp_path / "candles.db"))
+    store.mark_empty("binance", "BTC/USDT", "1m", [0, 60000])
+    
+    rows = store.get_range("binance", "BTC/USDT", "1m", 0, 60000)
+    assert [row[1] for row in rows] == [None, None]
+
+
+def test_series_pruned_to_newest_rows(tmp_path):
+    """Test each series keeps only its newest max_rows rows once enough rows are written"""
+    store = CandleStore(str(tmp_path / "candles.db"), max_rows=3, prune_every=4)
+    store.put("binance", "ETH/USDT", "1m", [[0, 1, 1, 1, 1, 1]])
+    store.put("binance", "BTC/USDT", "1m", [[ts * 60000, 1, 1, 1, 1, 1] for ts in range(5)])
+    assert [row[0] for row in store.get_range("binance", "BTC/USDT", "1m", 0, 10 ** 9)] == [120000, 180000, 240000]
+    
+    store.put("binance", "BTC/USDT", "1m", [[ts * 60000, 1, 1, 1, 1, 1] for ts in range(5, 8)])
+    assert store.count() == 7
+    store.put("binance", "BTC/USDT", "1m", [[480000, 1, 1, 1, 1, 1]])
+    assert [row[0] for row in store.get_range("binance", "BTC/USDT", "1m", 0, 10 ** 9)] == [360000, 420000, 480000]
+    assert store.get_range("binance", "ETH/USDT", "1m", 0, 0) == [(0, 1, 1, 1, 1, 1)]
+    assert store.pruned == 6
@@ -0,0 +1,93 @@
+"""
+Tests for circuit breaker
+"""
+
+import pytest
+import time
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerPolicy, CircuitBreaker, CircuitOpenError
+
+
+def test_breaker_opens_on_error_rate():
+    """Test the breaker opens once enough windowed calls fail and then fails fast"""
+    breaker = CircuitBreaker("kraken", BreakerPolicy(error_rate=0.5, min_calls=4))
+    
+    for failed in (False, True, False):
+        breaker.record(0.1, failed)
+    assert breaker.state == CLOSED
+    
+    breaker.record(0.1, True)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert exc_info.value.retry_after > 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_opens_on_slow_p95():
+    """Test a slow tail opens the breaker even without errors"""
+    breaker = CircuitBreaker("huobi", BreakerPolicy(slow_p95=5.0, min_calls=10))
+    
+    for _ in range(9):
+        breaker.record(0.1, False)
+    assert breaker.latency_percentile(0.95) is None
+    
+    breaker.record(20.0, False)
+    assert breaker.state == OPEN
+    assert breaker.stats()["p95_ms"] == 20000.0
+
+
+def test_half_open_probe_closes_or_reopens():
+    """Test one probe is let through after the open period and decides the next state"""
+    breaker = CircuitBreaker("kraken", BreakerPolicy(min_calls=1, open_seconds=0.01))
+    breaker.record(0.1, True)
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+    
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(0.1, True)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record(0.1, False)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["calls"] == 0
+    breaker.before_call()
+
+
+def test_released_probe_lets_next_call_through():
+    """Test a probe cancelled before finishing does not wedge the breaker half-open"""
+    breaker = CircuitBreaker("kraken", BreakerPolicy(min_calls=1, open_seconds=0.01))
+    breaker.record(0.1, True)
+    time.sleep(0.02)
+    
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_window_statistics_follow_evicted_calls():
+    """Test failure count and latency percentiles drop calls leaving the window"""
+    breaker = CircuitBreaker("kraken", BreakerPolicy(error_rate=0.9, slow_p95=60.0, min_calls=2, max_calls=4))
+    breaker.record(9.0, True)
+    breaker.record(0.2, False)
+    assert breaker.error_rate() == 0.5
+    assert breaker.latency_percentile(1.0) == 9.0
+    
+    for latency in (0.1, 0.3, 0.4):
+        breaker.record(latency, False)
+    assert breaker.stats()["calls"] == 4
+    assert breaker.error_rate() == 0.0
+    assert breaker.latencies == [0.1, 0.2, 0.3, 0.4]
+    assert breaker.latency_percentile(0.5) == 0.2
+    
+    breaker.policy.window = 0.01
+    time.sleep(0.02)
+    assert breaker.error_rate() == 0.0
+    assert breaker.latencies == []
+    assert breaker.latency_percentile(0.5) is None
@@ -3,7 +3,13 @@ Tests for cryptocurrency service
 """
 
 import pytest
+import asyncio
+import ccxt
+import time
+from datetime import datetime
 from services.crypto_service import CryptocurrencyService
+from services.circuit_breaker import BreakerPolicy, CircuitOpenError
+from services.upstream_scheduler import UpstreamScheduler
 
 
 @pytest.mark.asyncio
@@ -45,3 +51,439 @@ async def test_get_ticker():
     
     await service.cleanup()
 
+
+
+def test_invalid_backend():
+    """Test unknown backend names are rejected"""
+    with pytest.raises(ValueError):
+        CryptocurrencyService(backend="invalid")
+
+
+@pytest.mark.asyncio
+async def test_async_backend_shares_session():
+    """Test async exchanges share one pooled HTTP session"""
+    service = CryptocurrencyService(backend="async", pool_limit_per_host=5)
+    binance = service._create_exchange("binance")
+    kraken = service._create_exchange("kraken")
+    
+    assert service.session is not None
+    assert binance.session is service.session
+    assert kraken.session is service.session
+    assert service.session.connector.limit_per_host == 5
+    
+    service.exchanges = {"binance": binance, "kraken": kraken}
+    await service.cleanup()
+    assert service.session is None
+
+
+@pytest.mark.asyncio
+async def test_async_backend_awaits_coroutines():
+    """Test coroutine exchange methods are awaited directly"""
+    class FakeExchange:
+        markets = {"BTC/USDT": {}}
+        
+        async def fetch_ticker(self, symbol):
+            return {"last": 1.0, "timestamp": 0, "datetime": ""}
+    
+    service = CryptocurrencyService(backend="async")
+    service.exchanges["fake"] = FakeExchange()
+    ticker = await service.get_ticker("fake", "BTC/USDT")
+    assert ticker["last"] == 1.0
+    assert ticker["symbol"] == "BTC/USDT"
+
+
+def test_enabled_exchanges():
+    """Test the enabled exchange set is configurable"""
+    service = CryptocurrencyService(exchange_ids=["kraken"])
+    assert service.supported_exchanges == ["kraken"]
+
+
+@pytest.mark.asyncio
+async def test_markets_load_lazily_once():
+    """Test markets load on first use with one upstream call for concurrent callers"""
+    class FakeExchange:
+        def __init__(self):
+            self.markets = {}
+            self.load_calls = 0
+        
+        async def load_markets(self, reload=False):
+            self.load_calls += 1
+            await asyncio.sleep(0.01)
+            self.markets = {"BTC/USDT": {}, "ETH/USDT": {}}
+            return self.markets
+    
+    service = CryptocurrencyService()
+    fake = FakeExchange()
+    service.exchanges["fake"] = fake
+    
+    results = await asyncio.gather(*[service.get_markets("fake") for _ in range(10)])
+    
+    assert fake.load_calls == 1
+    assert all(result == ["BTC/USDT", "ETH/USDT"] for result in results)
+    assert service.markets_source["fake"] == "live"
+
+
+@pytest.mark.asyncio
+async def test_initialize_exchange_from_snapshot():
+    """Test snapshot markets are restored without a network call"""
+    service = CryptocurrencyService()
+    cached = {
+        "markets": {
+            "BTC/USDT": {
+                "id": "BTCUSDT", "symbol": "BTC/USDT", "base": "BTC", "quote": "USDT",
+                "baseId": "BTC", "quoteId": "USDT", "type": "spot", "spot": True,
+                "active": True, "precision": {}, "limits": {}
+            }
+        },
+        "currencies": {}
+    }
+    
+    await service._initialize_exchange("binance", cached)
+    
+    assert "BTC/USDT" in await service.get_markets("binance")
+    assert service.markets_source["binance"] == "snapshot"
+    assert "binance" in service.startup_times
+    await service.cleanup()
+
+
+class FakeBulkExchange:
+    """Fake exchange with optional fetch_tickers support"""
+    
+    def __init__(self, bulk=True):
+        self.has = {"fetchTickers": bulk}
+        self.markets = {"BTC/USDT": {}, "ETH/USDT": {}, "SOL/USDT": {}}
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.active = 0
+        self.max_active = 0
+    
+    async def fetch_tickers(self, symbols=None):
+        self.bulk_calls += 1
+        return {
+            symbol: {"last": 1.0, "timestamp": 0, "datetime": ""}
+            for symbol in (symbols or self.markets)
+        }
+    
+    async def fetch_ticker(self, symbol):
+        self.single_calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"last": 1.0, "timestamp": 0, "datetime": ""}
+
+
+@pytest.mark.asyncio
+async def test_get_tickers_uses_bulk_fetch():
+    """Test batch tickers use one fetch_tickers call"""
+    service = CryptocurrencyService()
+    fake = FakeBulkExchange()
+    service.exchanges["fake"] = fake
+    
+    tickers = await service.get_tickers("fake", ["BTC/USDT", "ETH/USDT"])
+    
+    assert fake.bulk_calls == 1
+    assert fake.single_calls == 0
+    assert sorted(t["symbol"] for t in tickers) == ["BTC/USDT", "ETH/USDT"]
+
+
+@pytest.mark.asyncio
+async def test_get_tickers_fallback_is_bounded():
+    """Test exchanges without fetch_tickers are queried with bounded concurrency"""
+    service = CryptocurrencyService()
+    fake = FakeBulkExchange(bulk=False)
+    service.exchanges["fake"] = fake
+    
+    tickers = await service.get_tickers("fake", ["BTC/USDT", "ETH/USDT", "SOL/USDT"], concurrency=2)
+    
+    assert len(tickers) == 3
+    assert fake.single_calls == 3
+    assert fake.max_active == 2
+    
+    with pytest.raises(ValueError):
+        await service.get_tickers("fake")
+
+
+@pytest.mark.asyncio
+async def test_cross_exchange_ticker_respects_deadline():
+    """Test slow exchanges are reported as timeouts and best prices use the rest"""
+    class FakeExchange:
+        def __init__(self, bid, ask, delay=0.0, fail=False):
+            self.bid, self.ask, self.delay, self.fail = bid, ask, delay, fail
+            self.markets = {"BTC/USDT": {}}
+        
+        async def fetch_ticker(self, symbol):
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("exchange down")
+            return {"last": self.bid, "bid": self.bid, "ask": self.ask, "timestamp": 0, "datetime": ""}
+    
+    service = CryptocurrencyService()
+    service.exchanges = {
+        "fast": FakeExchange(100.0, 101.0),
+        "better": FakeExchange(100.5, 100.9),
+        "slow": FakeExchange(200.0, 50.0, delay=5),
+        "broken": FakeExchange(0, 0, fail=True),
+    }
+    service.exchanges["nolisting"] = FakeExchange(1, 1)
+    service.exchanges["nolisting"].markets = {"ETH/USDT": {}}
+    
+    snapshot = await service.get_cross_exchange_ticker("BTC/USDT", deadline=0.2)
+    statuses = {r["exchange"]: r["status"] for r in snapshot["results"]}
+    
+    assert snapshot["elapsed_ms"] < 1000
+    assert statuses == {
+        "fast": "ok", "better": "ok", "slow": "timeout", "broken": "error", "nolisting": "unsupported"
+    }
+    assert snapshot["best_bid"] == {"exchange": "better", "price": 100.5}
+    assert snapshot["best_ask"] == {"exchange": "better", "price": 100.9}
+    assert snapshot["spread"] == pytest.approx(0.4)
+
+
+class FakeOHLCVExchange:
+    """Fake exchange serving deterministic 1m candles and recording requested ranges"""
+    
+    def __init__(self):
+        self.markets = {"BTC/USDT": {}}
+        self.requests = []
+    
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        self.requests.append((since, limit))
+        now = int(time.time() * 1000)
+        return [
+            [ts, 1.0, 2.0, 0.5, 1.5, 10.0]
+            for ts in range(since, since + limit * 60000, 60000)
+            if ts <= now
+        ]
+
+
+@pytest.mark.asyncio
+async def test_ohlcv_served_from_candle_store(tmp_path):
+    """Test closed candles are fetched once and overlapping windows share storage"""
+    service = CryptocurrencyService(candle_store_path=str(tmp_path / "candles.db"))
+    fake = FakeOHLCVExchange()
+    service.exchanges["fake"] = fake
+    since = datetime.fromtimestamp((int(time.time()) // 60 - 500) * 60)
+    
+    first = await service.get_historical_data("fake", "BTC/USDT", "1m", limit=100, since=since)
+    assert len(first) == 100
+    assert len(fake.requests) == 1
+    
+    # Same window is answered locally
+    again = await service.get_historical_data("fake", "BTC/USDT", "1m", limit=100, since=since)
+    assert again == first
+    assert len(fake.requests) == 1
+    
+    # A larger window only fetches the candles not stored yet
+    await service.get_historical_data("fake", "BTC/USDT", "1m", limit=200, since=since)
+    assert len(fake.requests) == 2
+    assert fake.requests[-1] == (int(since.timestamp() * 1000) + 100 * 60000, 100)
+
+
+@pytest.mark.asyncio
+async def test_ohlcv_store_survives_restart(tmp_path):
+    """Test a new service instance reuses candles stored by a previous one"""
+    path = str(tmp_path / "candles.db")
+    since = datetime.fromtimestamp((int(time.time()) // 60 - 100) * 60)
+    
+    service = CryptocurrencyService(candle_store_path=path)
+    service.exchanges["fake"] = FakeOHLCVExchange()
+    await service.get_historical_data("fake", "BTC/USDT", "1m", limit=50, since=since)
+    
+    restarted = CryptocurrencyService(candle_store_path=path)
+    fake = FakeOHLCVExchange()
+    restarted.exchanges["fake"] = fake
+    data = await restarted.get_historical_data("fake", "BTC/USDT", "1m", limit=50, since=since)
+    
+    assert len(data) == 50
+    assert fake.requests == []
+
+
+@pytest.mark.asyncio
+async def test_iter_ohlcv_pages_through_range():
+    """Test long ranges are paged with since and returned without gaps or overlap"""
+    service = CryptocurrencyService()
+    fake = FakeOHLCVExchange()
+    service.exchanges["fake"] = fake
+    start = (int(time.time()) // 60 - 2500) * 60000
+    end = start + 2499 * 60000
+    
+    pages = [page async for page in service.iter_ohlcv("fake", "BTC/USDT", "1m", start, end, page_limit=1000)]
+    timestamps = [c[0] for page in pages for c in page]
+    
+    assert [len(page) for page in pages] == [1000, 1000, 500]
+    assert timestamps == list(range(start, end + 1, 60000))
+
+
+@pytest.mark.asyncio
+async def test_ohlcv_resampled_from_base_timeframe(tmp_path):
+    """Test coarser and non-native timeframes are built from the base timeframe"""
+    service = CryptocurrencyService(
+        candle_store_path=str(tmp_path / "candles.db"),
+        base_timeframes=["1m"]
+    )
+    fake = FakeOHLCVExchange()
+    fake.timeframes = {"1m": "1m", "1h": "1h"}
+    service.exchanges["fake"] = fake
+    since = (int(time.time()) // 3600 - 10) * 3600 * 1000
+    
+    hourly = await service.get_ohlcv("fake", "BTC/USDT", "1h", limit=2, since=since)
+    assert [c[0] for c in hourly] == [since, since + 3600000]
+    assert hourly[0] == [since, 1.0, 2.0, 0.5, 1.5, 600.0]
+    
+    # 7m is not offered natively and is served from the stored 1m candles
+    requests = len(fake.requests)
+    minutes = await service.get_ohlcv("fake", "BTC/USDT", "7m", limit=3, since=since)
+    assert len(fake.requests) == requests
+    assert all(c[0] % 420000 == 0 and c[5] == 70.0 for c in minutes)
+    
+    with pytest.raises(ValueError):
+        await service.get_ohlcv("fake", "BTC/USDT", "90s", limit=3, since=since)
+
+
+def test_native_timeframe_preferred_over_many_base_pages():
+    """Test a native timeframe is fetched directly once resampling would need several pages of base candles"""
+    service = CryptocurrencyService(base_timeframes=["1m", "1h"])
+    fake = FakeOHLCVExchange()
+    fake.timeframes = {"1m": "1m", "30m": "30m", "1h": "1h", "4h": "4h"}
+    
+    assert service._source_timeframe("fake", fake, "30m", 10) == "1m"
+    assert service._source_timeframe("fake", fake, "30m", 1000) == "30m"
+    assert service._source_timeframe("fake", fake, "4h", 250) == "1h"
+    assert service._source_timeframe("fake", fake, "4h", 1000) == "4h"
+    # Without a native series the base is paged through whatever the limit
+    assert service._source_timeframe("fake", fake, "7m", 1000) == "1m"
+
+
+@pytest.mark.asyncio
+async def test_upstream_calls_are_timed():
+    """Test exchange calls record latency and failures per exchange and method"""
+    class FailingExchange:
+        id = "failing"
+        markets = {"BTC/USDT": {}}
+        
+        def fetch_ticker(self, symbol):
+            raise ccxt.NetworkError("down")
+    
+    service = CryptocurrencyService()
+    service.exchanges["failing"] = FailingExchange()
+    
+    with pytest.raises(ccxt.NetworkError):
+        await service.get_ticker("failing", "BTC/USDT")
+    assert service.upstream_errors.values[("failing", "fetch_ticker", "NetworkError")] == 1
+    assert sum(service.upstream_latency.counts[("failing", "fetch_ticker")]) == 1
+    assert service.thread_calls_in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_paces_calls_by_priority():
+    """Test calls go through the scheduler at their priority and ccxt's throttle is disabled"""
+    scheduler = UpstreamScheduler()
+    service = CryptocurrencyService(scheduler=scheduler)
+    assert service._create_exchange("binance").enableRateLimit is False
+    assert CryptocurrencyService()._create_exchange("binance").enableRateLimit is True
+    
+    fake = FakeOHLCVExchange()
+    fake.id = "fake"
+    fake.rateLimit = 1
+    service.exchanges["fake"] = fake
+    start = (int(time.time()) // 60 - 20) * 60000
+    
+    await service.get_ohlcv("fake", "BTC/USDT", "1m", limit=5, since=start)
+    pages = [page async for page in service.iter_ohlcv("fake", "BTC/USDT", "1m", start, start + 9 * 60000, page_limit=5)]
+    
+    assert sum(len(page) for page in pages) == 10
+    assert sum(scheduler.wait_time.counts[("fake", "interactive")]) == 1
+    assert sum(scheduler.wait_time.counts[("fake", "backfill")]) == 2
+    assert scheduler.stats()["fake"]["granted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_last_known_ticker():
+    """Test a failing exchange trips its breaker and tickers fall back to the last good value"""
+    class FlakyExchange:
+        id = "flaky"
+        markets = {"BTC/USDT": {}}
+        down = False
+        calls = 0
+        
+        async def fetch_ticker(self, symbol):
+            self.calls += 1
+            if self.down:
+                raise ccxt.RequestTimeout("timed out")
+            return {"last": 5.0, "timestamp": 0, "datetime": ""}
+    
+    service = CryptocurrencyService(breaker_policy=BreakerPolicy(min_calls=2, error_rate=0.5))
+    fake = FlakyExchange()
+    service.exchanges["flaky"] = fake
+    
+    assert (await service.get_ticker("flaky", "BTC/USDT"))["last"] == 5.0
+    fake.down = True
+    with pytest.raises(ccxt.RequestTimeout):
+        await service.get_ticker("flaky", "BTC/USDT")
+    assert service.breakers["flaky"].state == "open"
+    
+    calls = fake.calls
+    ticker = await service.get_ticker("flaky", "BTC/USDT")
+    assert ticker["stale"] is True
+    assert ticker["last"] == 5.0
+    assert fake.calls == calls
+    with pytest.raises(CircuitOpenError):
+        await service.get_ticker("flaky", "ETH/USDT")
+
+
+@pytest.mark.asyncio
+async def test_slow_reads_are_hedged():
+    """Test a read slower than the p95 latency is resent and the faster response wins"""
+    class SlowTailExchange:
+        id = "tail"
+        markets = {"BTC/USDT": {}}
+        calls = 0
+        
+        async def fetch_ticker(self, symbol):
+            self.calls += 1
+            # Every tenth call stalls; its duplicate answers at normal speed
+            await asyncio.sleep(5 if self.calls % 10 == 0 else 0.001)
+            return {"last": float(self.calls), "timestamp": 0, "datetime": ""}
+    
+    service = CryptocurrencyService(
+        breaker_policy=BreakerPolicy(min_calls=5, slow_p95=60),
+        hedge_min_delay=0.01
+    )
+    service.exchanges["tail"] = SlowTailExchange()
+    
+    start = time.perf_counter()
+    for _ in range(10):
+        await service.get_ticker("tail", "BTC/USDT")
+    
+    assert time.perf_counter() - start < 2
+    assert service.hedged_requests.values[("tail", "fetch_ticker", "hedge")] == 1
+
+
+@pytest.mark.asyncio
+async def test_markets_indexed_after_load():
+    """Test loaded markets are searchable and listed in the cross-exchange symbol index"""
+    class FakeExchange:
+        def __init__(self, symbols):
+            self.markets = {}
+            self.symbols = symbols
+        
+        async def load_markets(self, reload=False):
+            self.markets = {
+                symbol: {"symbol": symbol, "base": symbol.split("/")[0], "quote": symbol.split("/")[1], "type": "spot"}
+                for symbol in self.symbols
+            }
+            return self.markets
+    
+    service = CryptocurrencyService()
+    service.exchanges["one"] = FakeExchange(["BTC/USDT", "ETH/USDC"])
+    service.exchanges["two"] = FakeExchange(["ETH/USDC", "SOL/USDC"])
+    
+    page = await service.search_markets("one", "eth")
+    assert page["exchange"] == "one"
+    assert [m["symbol"] for m in page["markets"]] == ["ETH/USDC"]
+    assert service.exchanges_for_symbol("ETH/USDC") == ["one"]
+    
+    await service.refresh_markets()
+    assert service.exchanges_for_symbol("ETH/USDC") == ["one", "two"]
+    assert service.exchanges_for_symbol("DOGE/USDT") == []
@@ -0,0 +1,85 @@
+"""
+Tests for fake exchange
+"""
+
+import pytest
+import random
+import ccxt
+from services.crypto_service import CryptocurrencyService
+from services.fake_exchange import FakeExchange, parse_latency
+
+
+def test_parse_latency_specs():
+    """Test latency specs build samplers of the named distributions"""
+    rng = random.Random(1)
+    assert parse_latency("0.05")(rng) == 0.05
+    assert all(0.01 <= parse_latency("uniform:0.01:0.02")(rng) <= 0.02 for _ in range(100))
+    assert parse_latency("lognormal:0.03:0.5")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
+
+
+@pytest.mark.asyncio
+async def test_fake_exchange_serves_deterministic_data():
+    """Test markets, tickers and candles are ccxt-shaped and repeatable"""
+    fake = FakeExchange(markets=50, latency="0")
+    markets = await fake.load_markets()
+    assert len(markets) == 50
+    assert markets["BTC/USDT"]["id"] == "BTCUSDT"
+    
+    ticker = await fake.fetch_ticker("BTCUSDT")
+    assert ticker["symbol"] == "BTC/USDT"
+    assert ticker["bid"] < ticker["last"] < ticker["ask"]
+    
+    first = await fake.fetch_ohlcv("ETH/USDT", "1h", 1672531200000, 24)
+    assert first == await fake.fetch_ohlcv("ETH/USDT", "1h", 1672531200000, 24)
+    assert len(first) == 24
+    assert first[1][0] - first[0][0] == 3_600_000
+    assert all(low <= open_ <= high and low <= close <= high for _, open_, high, low, close, _ in first)
+    
+    with pytest.raises(ccxt.BadSymbol):
+        await fake.fetch_ticker("NOPE/USDT")
+    assert fake.stats()["calls"] == {"load_markets": 1, "fetch_ticker": 1, "fetch_ohlcv": 2}
+
+
+@pytest.mark.asyncio
+async def test_fake_exchange_simulates_failures():
+    """Test error rate, 429s beyond the call limit and timeouts raise ccxt errors"""
+    failing = FakeExchange(latency="0", error_rate=1.0)
+    failing.set_markets({"BTC/USDT": {"id": "BTCUSDT", "symbol": "BTC/USDT"}})
+    with pytest.raises(ccxt.ExchangeNotAvailable):
+        await failing.fetch_ticker("BTC/USDT")
+    
+    limited = FakeExchange(latency="0", max_calls_per_second=2)
+    limited.set_markets(failing.markets)
+    await limited.fetch_ticker("BTC/USDT")
+    await limited.fetch_ticker("BTC/USDT")
+    with pytest.raises(ccxt.RateLimitExceeded):
+        await limited.fetch_ticker("BTC/USDT")
+    assert limited.stats()["rate_limited"] == 1
+    
+    slow = FakeExchange(config={"timeout": 10}, latency="1")
+    slow.set_markets(failing.markets)
+    with pytest.raises(ccxt.RequestTimeout):
+        await slow.fetch_ticker("BTC/USDT")
+
+
+@pytest.mark.asyncio
+async def test_service_uses_exchange_factory():
+    """Test an exchange factory replaces ccxt and receives the service's ccxt config"""
+    built = {}
+    
+    def factory(exchange_id, config):
+        built[exchange_id] = FakeExchange(exchange_id, config, markets=20, latency="0")
+        return built[exchange_id]
+    
+    service = CryptocurrencyService(exchange_ids=["fake"], request_timeout=1234, exchange_factory=factory)
+    await service.initialize()
+    try:
+        assert built["fake"].timeout == 1234
+        ticker = await service.get_ticker("fake", "ETH/USDT")
+        assert ticker["exchange"] == "fake"
+        assert len(await service.get_tickers("fake", ["BTC/USDT", "ETH/USDT"])) == 2
+        assert service.exchanges_for_symbol("BTC/USDT") == ["fake"]
+    finally:
+        await service.cleanup()
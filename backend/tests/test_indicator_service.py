@@ -0,0 +1,61 @@
+"""
+Tests for indicator service
+"""
+
+import numpy as np
+import pytest
+from services.indicator_service import IndicatorService
+from services.indicators import parse_indicators
+
+MINUTE = 60_000
+
+
+class FakeCryptoService:
+    """Serves 1m candles up to a settable clock, the last one still open"""
+    
+    def __init__(self, now):
+        self.now = now
+        self.requests = []
+    
+    def candle(self, ts):
+        close = 100.0 + (ts // MINUTE) % 17
+        return [ts, close, close + 1, close - 1, close, 2.0]
+    
+    async def get_ohlcv(self, exchange_id, symbol, timeframe="1h", limit=100, since=None):
+        self.requests.append((since, limit))
+        last = self.now // MINUTE * MINUTE
+        start = since if since is not None else last - (limit - 1) * MINUTE
+        return [self.candle(ts) for ts in range(start, last + 1, MINUTE)][:limit]
+
+
+@pytest.mark.asyncio
+async def test_series_updates_incrementally(monkeypatch):
+    """Test later requests fold in newly closed candles instead of recomputing"""
+    clock = {"now": 1672531230000}
+    monkeypatch.setattr("services.indicator_service.time.time", lambda: clock["now"] / 1000)
+    crypto = FakeCryptoService(clock["now"])
+    service = IndicatorService(crypto, max_points=100)
+    indicators = parse_indicators("sma:5,ema:10,rsi:14,bbands:20:2,vwap")
+    
+    first = await service.get_indicators("fake", "BTC/USDT", "1m", indicators, limit=10)
+    assert len(first["timestamp"]) == 10
+    assert first["timestamp"][-1] == 1672531200000
+    assert service.stats()["full_computes"] == 1
+    
+    clock["now"] = crypto.now = clock["now"] + 3 * MINUTE
+    second = await service.get_indicators("fake", "BTC/USDT", "1m", indicators, limit=10)
+    assert second["timestamp"][-1] == 1672531200000 + 3 * MINUTE
+    assert service.stats() == {"series": 1, "full_computes": 1, "incremental_updates": 1}
+    # Only the candles since the last closed one were fetched: three closed plus the open one
+    assert crypto.requests[-1] == (1672531200000, 4)
+    
+    # Same values as a fresh full pass
+    fresh = IndicatorService(crypto, max_points=100)
+    expected = await fresh.get_indicators("fake", "BTC/USDT", "1m", indicators, limit=10)
+    assert second["timestamp"] == expected["timestamp"]
+    for column, values in expected["indicators"].items():
+        np.testing.assert_allclose(
+            np.array(second["indicators"][column], dtype=float),
+            np.array(values, dtype=float),
+            rtol=1e-9
+        )
@@ -0,0 +1,77 @@
+"""
+Tests for technical indicators
+"""
+
+import math
+import numpy as np
+import pytest
+from services.indicators import EMA, RSI, VWAP, parse_indicators
+
+HOUR = 3_600_000
+
+
+def make_candles(count, start=1672531200000, step=HOUR):
+    """Build candles with a wandering close"""
+    rng = np.random.default_rng(7)
+    closes = 100 + np.cumsum(rng.normal(0, 1, count))
+    return [
+        [start + i * step, c - 0.5, c + 1.0, c - 1.0, float(c), 1.0 + i % 5]
+        for i, c in enumerate(closes)
+    ]
+
+
+def test_incremental_matches_full_pass():
+    """Test stepping saved state over new candles equals recomputing everything"""
+    candles = make_candles(300)
+    data = np.asarray(candles)
+    
+    for indicator in parse_indicators("sma:20,ema:12,rsi:14,bbands:20:2,vwap"):
+        _, state = indicator.compute(data[:250])
+        stepped = {column: [] for column in indicator.columns}
+        for candle in candles[250:]:
+            values, state = indicator.step(state, candle)
+            for column, value in values.items():
+                stepped[column].append(value)
+        
+        full, _ = indicator.compute(data)
+        for column in indicator.columns:
+            np.testing.assert_allclose(stepped[column], full[column][250:], rtol=1e-9)
+
+
+def test_ema_matches_recursive_definition():
+    """Test the blocked vectorized EMA over a long series with a short period"""
+    closes = [c[4] for c in make_candles(3000)]
+    values = EMA(2).compute(np.asarray(make_candles(3000)))[0]["ema_2"]
+    
+    ema = closes[0]
+    for close, value in zip(closes[1:], values[1:]):
+        ema += 2 / 3 * (close - ema)
+        assert value == pytest.approx(ema)
+
+
+def test_rsi_warmup_and_bounds():
+    """Test RSI is undefined during warm-up and 100 without losses"""
+    rising = [[i * HOUR, 0, 0, 0, float(i), 1.0] for i in range(30)]
+    values = RSI(14).compute(np.asarray(rising))[0]["rsi_14"]
+    
+    assert all(math.isnan(v) for v in values[:14])
+    assert all(v == 100.0 for v in values[14:])
+
+
+def test_vwap_resets_each_day():
+    """Test VWAP starts over at 00:00 UTC"""
+    candles = make_candles(48)
+    values, _ = VWAP().compute(np.asarray(candles))
+    
+    first = candles[24]
+    assert values["vwap"][24] == pytest.approx((first[2] + first[3] + first[4]) / 3)
+
+
+def test_parse_indicators():
+    """Test indicator specs, defaults and rejection of bad input"""
+    names = [i.name for i in parse_indicators("SMA:20, ema:50,bbands,bbands:20:2,vwap")]
+    assert names == ["sma_20", "ema_50", "bbands_20_2", "vwap"]
+    
+    for spec in ("macd:12", "sma:abc", "sma:0", "vwap:3", ""):
+        with pytest.raises(ValueError):
+            parse_indicators(spec)
@@ -61,3 +61,328 @@ def test_get_markets_invalid_exchange():
     response = client.get("/api/markets/invalid_exchange")
     assert response.status_code == 500
 
+
+
+def test_get_tickers_invalid_exchange():
+    """Test getting batch tickers with invalid exchange"""
+    response = client.get("/api/tickers/invalid_exchange?symbols=BTC/USDT")
+    assert response.status_code == 500
+
+
+def test_get_tickers_fills_ticker_cache():
+    """Test batch tickers populate the per-symbol ticker cache"""
+    from main import crypto_service, cache_service
+    
+    class FakeExchange:
+        has = {"fetchTickers": True}
+        markets = {"BTC/USDT": {}, "ETH/USDT": {}}
+        
+        async def fetch_tickers(self, symbols=None):
+            return {
+                symbol: {"last": 2.0, "timestamp": 0, "datetime": ""}
+                for symbol in (symbols or self.markets)
+            }
+    
+    crypto_service.exchanges["fakebulk"] = FakeExchange()
+    try:
+        response = client.get("/api/tickers/fakebulk?symbols=BTC/USDT,ETH/USDT")
+        assert response.status_code == 200
+        assert len(response.json()["tickers"]) == 2
+        assert cache_service.get("ticker:fakebulk:ETH/USDT").value["last"] == 2.0
+        
+        # Served from the per-symbol cache, with the ETag of the composed body
+        etag = response.headers["etag"]
+        cached = client.get("/api/tickers/fakebulk?symbols=BTC/USDT,ETH/USDT")
+        assert cached.headers["etag"] == etag and cached.content == response.content
+        not_modified = client.get(
+            "/api/tickers/fakebulk?symbols=BTC/USDT,ETH/USDT", headers={"If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+    finally:
+        del crypto_service.exchanges["fakebulk"]
+
+
+def test_cross_exchange_snapshot_unknown_exchange():
+    """Test snapshot marks unknown exchanges as unsupported"""
+    response = client.get("/api/snapshot?symbol=BTC/USDT&deadline=0.5&exchanges=invalid_exchange")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["results"][0]["status"] == "unsupported"
+    assert data["best_bid"] is None
+
+
+def test_export_historical_invalid_exchange():
+    """Test exporting from an invalid exchange fails before streaming"""
+    response = client.get(
+        "/api/historical/export?exchange=invalid_exchange&symbol=BTC/USDT&start=2023-01-01T00:00:00"
+    )
+    assert response.status_code == 500
+
+
+def test_export_historical_resumes_from_cursor():
+    """Test the export streams CSV and resumes after the cursor"""
+    from main import crypto_service
+    
+    class FakeExchange:
+        markets = {"BTC/USDT": {}}
+        
+        async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            return [[ts, 1.0, 1.0, 1.0, 1.0, 1.0] for ts in range(since, since + limit * 60000, 60000)]
+    
+    crypto_service.exchanges["fakeexport"] = FakeExchange()
+    try:
+        params = "exchange=fakeexport&symbol=BTC/USDT&timeframe=1m&format=csv"
+        params += "&start=2023-01-01T00:00:00Z&end=2023-01-01T00:09:00Z"
+        
+        response = client.get(f"/api/historical/export?{params}")
+        assert response.status_code == 200
+        rows = response.text.splitlines()
+        assert rows[0].startswith("timestamp,")
+        assert len(rows) == 11
+        
+        last_ts = int(rows[5].split(",")[0])
+        resumed = client.get(f"/api/historical/export?{params}&cursor={last_ts}").text.splitlines()
+        assert resumed == rows[6:]
+    finally:
+        del crypto_service.exchanges["fakeexport"]
+
+
+def test_historical_columnar_formats():
+    """Test /api/historical negotiates columnar JSON and binary responses"""
+    from main import crypto_service
+    from services.ohlcv_encoding import decode_binary
+    
+    class FakeExchange:
+        markets = {"BTC/USDT": {}}
+        
+        async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            return [[ts, 1.0, 2.0, 0.5, 1.5, 3.0] for ts in range(since, since + limit * 60000, 60000)]
+    
+    crypto_service.exchanges["fakecolumnar"] = FakeExchange()
+    try:
+        body = {
+            "exchange": "fakecolumnar",
+            "symbol": "BTC/USDT",
+            "timeframe": "1m",
+            "limit": 5,
+            "since": "2023-01-01T00:00:00Z"
+        }
+        
+        response = client.post(
+            "/api/historical", json=body, headers={"Accept": "application/vnd.ohlcv.columnar+json"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.ohlcv.columnar+json"
+        assert response.json()["close"] == [1.5] * 5
+        
+        response = client.post("/api/historical", json=body, headers={"Accept": "application/vnd.ohlcv.binary"})
+        assert response.status_code == 200
+        assert decode_binary(response.content)["timestamp"][0] == 1672531200000
+    finally:
+        del crypto_service.exchanges["fakecolumnar"]
+
+
+def test_historical_get_conditional_and_compressed():
+    """Test GET /api/historical answers If-None-Match with 304 and compresses large bodies"""
+    from main import crypto_service
+    
+    class FakeExchange:
+        markets = {"BTC/USDT": {}}
+        
+        async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+            return [[ts, 1.0, 2.0, 0.5, 1.5, 3.0] for ts in range(since, since + limit * 60000, 60000)]
+    
+    crypto_service.exchanges["fakeconditional"] = FakeExchange()
+    try:
+        params = {
+            "exchange": "fakeconditional",
+            "symbol": "BTC/USDT",
+            "timeframe": "1m",
+            "limit": 200,
+            "since": "2023-01-01T00:00:00Z"
+        }
+        
+        response = client.get("/api/historical", params=params, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"].endswith('-gzip"')
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert len(response.json()["data"]) == 200
+        
+        plain = client.get("/api/historical", params=params, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == response.json()
+        
+        for etag in (response.headers["etag"], plain.headers["etag"]):
+            not_modified = client.get("/api/historical", params=params, headers={"If-None-Match": etag})
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+        
+        posted = client.post(
+            "/api/historical", json=params, headers={"If-None-Match": plain.headers["etag"]}
+        )
+        assert posted.status_code == 200
+    finally:
+        del crypto_service.exchanges["fakeconditional"]
+
+
+def test_indicators_rejects_unknown_indicator():
+    """Test /api/indicators validates the indicator list"""
+    response = client.get("/api/indicators/binance", params={"symbol": "BTC/USDT", "indicators": "macd:12"})
+    assert response.status_code == 400
+
+
+def test_metrics_endpoint():
+    """Test /metrics exposes request latency by route template"""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert "# TYPE crypto_upstream_request_duration_seconds histogram" in response.text
+    assert "thread_pool_queue_depth" in response.text
+    assert 'request_coalescer_callers_served_total{coalescer="cache_loader"}' in response.text
+
+
+def test_cache_stats_report_coalescing():
+    """Test /api/cache/stats publishes callers served per fetch by each coalescer"""
+    response = client.get("/api/cache/stats")
+    assert response.status_code == 200
+    coalescing = response.json()["coalescing"]
+    assert set(coalescing) == {"requests", "cache_loader"}
+    assert {"fetches", "callers_served", "callers_per_fetch"} <= set(coalescing["cache_loader"])
+
+
+def test_upstream_busy_maps_to_503():
+    """Test a call rejected by the scheduler asks the client to retry"""
+    from main import crypto_service
+    from services.upstream_scheduler import UpstreamBusyError
+    
+    class BusyExchange:
+        markets = {"BTCUSDT": {}}
+        
+        async def fetch_ticker(self, symbol):
+            raise UpstreamBusyError("busy", 2.5)
+    
+    crypto_service.exchanges["busy"] = BusyExchange()
+    try:
+        response = client.get("/api/ticker/busy/BTCUSDT")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+    finally:
+        del crypto_service.exchanges["busy"]
+
+
+def test_ticker_cache_hit_serves_encoded_body():
+    """Test repeated ticker requests serve the cached bytes with an ETag"""
+    from main import crypto_service
+    
+    class CountingExchange:
+        markets = {"BTCUSDT": {}}
+        calls = 0
+        
+        async def fetch_ticker(self, symbol):
+            self.calls += 1
+            return {"last": 3.0, "bid": 2.9, "timestamp": 1704164645000, "datetime": ""}
+    
+    fake = CountingExchange()
+    crypto_service.exchanges["fakeencoded"] = fake
+    try:
+        first = client.get("/api/ticker/fakeencoded/BTCUSDT")
+        second = client.get("/api/ticker/fakeencoded/BTCUSDT")
+        assert first.status_code == second.status_code == 200
+        assert fake.calls == 1
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.json()["last"] == 3.0
+        assert second.json()["stale"] is False
+    finally:
+        del crypto_service.exchanges["fakeencoded"]
+
+
+def test_streamed_ticker_served_from_board():
+    """Test a ticker on the streamed board is served without an upstream call"""
+    from main import crypto_service, ticker_board
+    
+    class FailingExchange:
+        markets = {}
+        
+        async def fetch_ticker(self, symbol):
+            raise AssertionError("streamed ticker fetched upstream")
+    
+    crypto_service.exchanges["fakestream"] = FailingExchange()
+    ticker_board.update("fakestream", "BTC/USDT", crypto_service._format_ticker(
+        "fakestream", "BTC/USDT", {"last": 5.0, "timestamp": 1704164645000}
+    ))
+    ticker_board.alias("fakestream", "BTCUSDT", "BTC/USDT")
+    try:
+        response = client.get("/api/ticker/fakestream/BTCUSDT")
+        assert response.status_code == 200
+        assert response.json()["last"] == 5.0 and response.json()["symbol"] == "BTCUSDT"
+        assert client.get("/api/tickers/fakestream?symbols=BTCUSDT").json()["tickers"][0]["last"] == 5.0
+        assert client.get("/api/streams/stats").json()["board"]["entries"] >= 1
+    finally:
+        ticker_board.invalidate("fakestream")
+        del crypto_service.exchanges["fakestream"]
+
+
+def test_order_book_endpoints_from_rest_snapshot():
+    """Test top-N, bucketed and cumulative views of an order book fetched over REST"""
+    from main import crypto_service
+    from services.fake_exchange import FakeExchange
+    
+    crypto_service.exchanges["fakebook"] = FakeExchange("fakebook", markets=20, latency="0")
+    try:
+        top = client.get("/api/orderbook/fakebook/BTCUSDT?depth=5")
+        assert top.status_code == 200
+        data = top.json()
+        assert data["symbol"] == "BTCUSDT" and data["streamed"] is False
+        assert len(data["bids"]) == len(data["asks"]) == 5
+        assert data["bids"][0][0] == data["best_bid"] < data["best_ask"] == data["asks"][0][0]
+        
+        step = round(data["mid"] / 100, 2)
+        aggregated = client.get(f"/api/orderbook/fakebook/BTCUSDT/aggregated?step={step}&levels=3").json()
+        assert len(aggregated["bids"]) <= 3 and aggregated["step"] == step
+        assert all(bucket[0] <= data["best_bid"] for bucket in aggregated["bids"])
+        
+        depth = client.get("/api/orderbook/fakebook/BTCUSDT/depth?levels=3").json()
+        assert [row[2] for row in depth["asks"]] == [
+            sum(level[1] for level in data["asks"][:i + 1]) for i in range(3)
+        ]
+        assert client.get("/api/orderbook/fakebook/BTCUSDT/aggregated?step=0").status_code == 422
+    finally:
+        del crypto_service.exchanges["fakebook"]
+
+
+def test_market_search_and_symbol_lookup():
+    """Test /api/markets pages through the index and /api/symbols finds listing exchanges"""
+    from main import crypto_service
+    
+    class FakeExchange:
+        markets = {}
+        
+        async def load_markets(self, reload=False):
+            self.markets = {
+                f"C{i}/USDT": {"symbol": f"C{i}/USDT", "base": f"C{i}", "quote": "USDT", "type": "spot"}
+                for i in range(25)
+            }
+            return self.markets
+    
+    crypto_service.exchanges["fakemarkets"] = FakeExchange()
+    try:
+        response = client.get("/api/markets/fakemarkets", params={"q": "c1", "match": "prefix", "limit": 5})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 11
+        assert [m["symbol"] for m in data["markets"]] == ["C1/USDT", "C10/USDT", "C11/USDT", "C12/USDT", "C13/USDT"]
+        
+        response = client.get(
+            "/api/markets/fakemarkets", params={"q": "c1", "match": "prefix", "limit": 5, "cursor": data["next_cursor"]}
+        )
+        assert response.json()["markets"][0]["symbol"] == "C14/USDT"
+        
+        response = client.get("/api/symbols", params={"symbol": "C3/USDT"})
+        assert response.json() == {"symbol": "C3/USDT", "exchanges": ["fakemarkets"]}
+    finally:
+        del crypto_service.exchanges["fakemarkets"]
+        crypto_service.symbol_index.update("fakemarkets", [])
@@ -0,0 +1,82 @@
+"""
+Tests for market indexes
+"""
+
+import pytest
+from services.market_index import MarketIndex, SymbolIndex
+
+
+def make_markets():
+    """Build ccxt-shaped markets"""
+    markets = {}
+    for base, quote, market_type in (
+        ("BTC", "USDT", "spot"),
+        ("ETH", "USDT", "spot"),
+        ("ETH", "USDC", "spot"),
+        ("ETHFI", "USDT", "spot"),
+        ("SETH", "BTC", "spot"),
+        ("ETH", "USDT", "swap"),
+        ("BTC", "USDC", "swap"),
+    ):
+        symbol = f"{base}/{quote}" if market_type == "spot" else f"{base}/{quote}:{quote}"
+        markets[symbol] = {"symbol": symbol, "base": base, "quote": quote, "type": market_type, "active": True}
+    return markets
+
+
+def test_substring_and_prefix_search():
+    """Test queries match symbol, base and quote case-insensitively in symbol order"""
+    index = MarketIndex(make_markets())
+    
+    substring = index.search("eth")
+    assert [m["symbol"] for m in substring["markets"]] == [
+        "ETH/USDC", "ETH/USDT", "ETH/USDT:USDT", "ETHFI/USDT", "SETH/BTC"
+    ]
+    prefix = index.search("eth", mode="prefix")
+    assert [m["symbol"] for m in prefix["markets"]] == ["ETH/USDC", "ETH/USDT", "ETH/USDT:USDT", "ETHFI/USDT"]
+    assert index.search("usdc", mode="prefix")["total"] == 2
+    
+    with pytest.raises(ValueError):
+        index.search("eth", mode="regex")
+
+
+def test_filters_combine_with_query():
+    """Test type, base and quote filters intersect with each other and the query"""
+    index = MarketIndex(make_markets())
+    
+    assert [m["symbol"] for m in index.search(market_type="swap")["markets"]] == ["BTC/USDC:USDC", "ETH/USDT:USDT"]
+    assert [m["symbol"] for m in index.search("eth", market_type="spot", quote="usdt")["markets"]] == [
+        "ETH/USDT", "ETHFI/USDT"
+    ]
+    assert index.search(base="ETH", quote="USDC")["markets"][0]["symbol"] == "ETH/USDC"
+    assert index.search(base="DOGE")["total"] == 0
+
+
+def test_cursor_pagination_covers_every_match_once():
+    """Test pages resume after the cursor symbol until next_cursor is None"""
+    index = MarketIndex(make_markets())
+    symbols, cursor = [], None
+    
+    while True:
+        page = index.search(cursor=cursor, limit=3)
+        symbols.extend(m["symbol"] for m in page["markets"])
+        assert page["total"] == 7
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    
+    assert symbols == sorted(make_markets())
+
+
+def test_symbol_index_tracks_listing_changes():
+    """Test the reverse index follows each exchange's latest markets"""
+    index = SymbolIndex()
+    index.update("binance", ["BTC/USDT", "ETH/USDC"])
+    index.update("kraken", ["ETH/USDC"])
+    
+    assert index.lookup("ETH/USDC") == ["binance", "kraken"]
+    
+    index.update("binance", ["BTC/USDT"])
+    assert index.lookup("ETH/USDC") == ["kraken"]
+    index.update("kraken", [])
+    assert index.lookup("ETH/USDC") == []
+    assert "ETH/USDC" not in index.exchanges
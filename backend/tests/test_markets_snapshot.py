@@ -0,0 +1,41 @@
+"""
+Tests for markets snapshot
+"""
+
+import json
+from services import markets_snapshot
+from services.markets_snapshot import MarketsSnapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test saved markets load back unchanged"""
+    snapshot = MarketsSnapshot(str(tmp_path / "markets.json"))
+    exchanges = {"binance": {"markets": {"BTC/USDT": {"id": "BTCUSDT"}}, "currencies": {}}}
+    snapshot.save(exchanges)
+    assert snapshot.load() == exchanges
+
+
+def test_snapshot_missing_file(tmp_path):
+    """Test a missing snapshot loads as empty"""
+    snapshot = MarketsSnapshot(str(tmp_path / "missing.json"))
+    assert snapshot.load() == {}
+
+
+def test_snapshot_version_mismatch(tmp_path):
+    """Test snapshots from another version are ignored"""
+    path = tmp_path / "markets.json"
+    snapshot = MarketsSnapshot(str(path))
+    snapshot.save({"binance": {"markets": {}, "currencies": {}}})
+    
+    data = json.loads(path.read_text())
+    data["version"] = markets_snapshot.SNAPSHOT_VERSION + 1
+    path.write_text(json.dumps(data))
+    
+    assert snapshot.load() == {}
+
+
+def test_snapshot_corrupt_file(tmp_path):
+    """Test an unreadable snapshot loads as empty"""
+    path = tmp_path / "markets.json"
+    path.write_text("{not json")
+    assert MarketsSnapshot(str(path)).load() == {}
@@ -0,0 +1,36 @@
+"""
+Tests for metrics
+"""
+
+from services.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    """Test counters and function-backed gauges in the text format"""
+    registry = MetricsRegistry()
+    errors = registry.register(Counter("errors_total", "Errors", ("exchange", "method")))
+    registry.register(Gauge("depth", "Queue depth", function=lambda: {(): 3}))
+    
+    errors.inc("binance", "fetch_ticker")
+    errors.inc("binance", "fetch_ticker")
+    errors.inc('we"ird', "fetch_ohlcv", amount=0.5)
+    
+    lines = registry.render().splitlines()
+    assert "# TYPE errors_total counter" in lines
+    assert 'errors_total{exchange="binance",method="fetch_ticker"} 2' in lines
+    assert 'errors_total{exchange="we\\"ird",method="fetch_ohlcv"} 0.5' in lines
+    assert "depth 3" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test histogram bucket, sum and count lines"""
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/api")
+    
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/api",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/api",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/api",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/api"} 2.65' in lines
+    assert 'latency_seconds_count{route="/api"} 4' in lines
@@ -0,0 +1,66 @@
+"""
+Tests for OHLCV encoding
+"""
+
+import json
+import math
+import numpy as np
+from services.ohlcv_encoding import (
+    BINARY_HEADER,
+    CSV_HEADER,
+    decode_binary,
+    encode_binary,
+    encode_columnar_json,
+    encode_csv,
+    encode_ndjson
+)
+
+CANDLES = [[1672531200000, 1.0, 2.0, 0.5, 1.5, 10.0], [1672531260000, 1.5, 2.5, 1.0, 2.0, 20.0]]
+
+
+def test_encode_ndjson():
+    """Test each candle becomes one JSON line"""
+    lines = encode_ndjson(CANDLES).decode().splitlines()
+    assert len(lines) == 2
+    first = json.loads(lines[0])
+    assert first["timestamp"] == 1672531200000
+    assert first["datetime"] == "2023-01-01T00:00:00Z"
+    assert first["close"] == 1.5
+
+
+def test_encode_csv():
+    """Test each candle becomes one CSV row matching the header"""
+    rows = encode_csv(CANDLES).decode().splitlines()
+    assert len(rows) == 2
+    assert len(rows[0].split(",")) == len(CSV_HEADER.strip().split(","))
+    assert rows[1].startswith("1672531260000,2023-01-01T00:01:00Z,1.5")
+
+
+def test_encode_columnar_json():
+    """Test candles become parallel arrays alongside the metadata"""
+    columns = json.loads(encode_columnar_json(CANDLES, {"symbol": "BTC/USDT"}))
+    assert columns["symbol"] == "BTC/USDT"
+    assert columns["timestamp"] == [1672531200000, 1672531260000]
+    assert columns["volume"] == [10.0, 20.0]
+
+
+def test_binary_round_trip():
+    """Test the packed layout decodes to the original columns"""
+    payload = encode_binary(CANDLES + [[1672531320000, 2.0, 2.0, 2.0, 2.0, None]])
+    assert len(payload) == 16 + 3 * 8 * 6
+    
+    columns = decode_binary(payload)
+    assert columns["timestamp"] == [1672531200000, 1672531260000, 1672531320000]
+    assert columns["close"] == [1.5, 2.0, 2.0]
+    assert math.isnan(columns["volume"][2])
+
+
+def test_binary_columns_are_aligned():
+    """Test each column starts on an 8-byte boundary and can be viewed without copying"""
+    payload = encode_binary(CANDLES)
+    assert BINARY_HEADER.size % 8 == 0
+    
+    timestamps = np.frombuffer(payload, "<i8", len(CANDLES), offset=BINARY_HEADER.size)
+    assert timestamps.tolist() == [1672531200000, 1672531260000]
+    closes = np.frombuffer(payload, "<f8", len(CANDLES), offset=BINARY_HEADER.size + 4 * len(CANDLES) * 8)
+    assert closes.tolist() == [1.5, 2.0]
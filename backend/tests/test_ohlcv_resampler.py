@@ -0,0 +1,50 @@
+"""
+Tests for OHLCV resampler
+"""
+
+from services.ohlcv_resampler import bucket_start, resample_ohlcv
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+def test_resample_aggregates_buckets():
+    """Test open/high/low/close/volume aggregation into aligned buckets"""
+    start = 1672531200000
+    candles = [
+        [start + i * MINUTE, 10.0 + i, 20.0 + i, 5.0 - i, 11.0 + i, 1.0]
+        for i in range(10)
+    ]
+    
+    assert resample_ohlcv(candles, 5 * MINUTE) == [
+        [start, 10.0, 24.0, 1.0, 15.0, 5.0],
+        [start + 5 * MINUTE, 15.0, 29.0, -4.0, 20.0, 5.0]
+    ]
+
+
+def test_resample_partial_and_missing_buckets():
+    """Test buckets are aligned to the epoch and empty buckets are omitted"""
+    start = 1672531200000
+    candles = [
+        [start + 3 * MINUTE, 1.0, 2.0, 0.5, 1.5, 1.0],
+        [start + 16 * MINUTE, 3.0, 4.0, 2.5, 3.5, None]
+    ]
+    
+    assert resample_ohlcv(candles, 5 * MINUTE) == [
+        [start, 1.0, 2.0, 0.5, 1.5, 1.0],
+        [start + 15 * MINUTE, 3.0, 4.0, 2.5, 3.5, 0.0]
+    ]
+    assert resample_ohlcv([], HOUR) == []
+
+
+def test_weekly_buckets_start_on_monday():
+    """Test weekly buckets open on Monday 00:00 UTC"""
+    # 2023-01-04 is a Wednesday; its week opens Monday 2023-01-02
+    wednesday = 1672790400000
+    assert bucket_start(wednesday, 7 * DAY) == 1672617600000
+    
+    candles = [[wednesday + i * DAY, 1.0, 2.0, 0.5, 1.5, 1.0] for i in range(7)]
+    weeks = resample_ohlcv(candles, 7 * DAY)
+    assert [w[0] for w in weeks] == [1672617600000, 1672617600000 + 7 * DAY]
+    assert [w[5] for w in weeks] == [5.0, 2.0]
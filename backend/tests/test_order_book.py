@@ -0,0 +1,62 @@
+"""
+Tests for the sorted-array L2 order book
+"""
+
+import pytest
+from services.order_book import BookOutOfSync, BookSide, OrderBook, book_checksum
+
+
+def make_book():
+    book = OrderBook("fake", "BTC/USDT")
+    book.apply_snapshot([[99.0, 1.0], [100.0, 2.0], [98.5, 3.0]], [[101.0, 1.5], [102.0, 2.5]], seq=10)
+    return book
+
+
+def test_sides_keep_best_level_first():
+    """Test bids sort high to low, asks low to high, and size 0 removes a level"""
+    book = make_book()
+    assert book.bids.levels() == [[100.0, 2.0], [99.0, 1.0], [98.5, 3.0]]
+    assert book.asks.levels(1) == [[101.0, 1.5]]
+    
+    side = BookSide(descending=True)
+    assert side.set(5.0, 1.0) and side.set(7.0, 2.0) and side.set(6.0, 3.0)
+    assert not side.set(6.0, 3.0) and not side.set(8.0, 0)
+    assert side.set(7.0, 0)
+    assert side.levels() == [[6.0, 3.0], [5.0, 1.0]]
+
+
+def test_snapshot_replacement_returns_changed_levels():
+    """Test replacing a side yields only added, resized and removed levels"""
+    book = make_book()
+    changes = book.apply_snapshot([[100.0, 2.0], [99.0, 4.0], [97.0, 1.0]], [[101.0, 1.5]], seq=20)
+    assert changes == {"bids": [[99.0, 4.0], [98.5, 0.0], [97.0, 1.0]], "asks": [[102.0, 0.0]]}
+    assert book.seq == 20
+
+
+def test_deltas_follow_sequence_and_checksum():
+    """Test stale deltas are ignored while gaps and checksum mismatches demand a resync"""
+    book = make_book()
+    assert book.apply_delta([[100.0, 0]], [[101.5, 1.0]], seq=11) == {
+        "bids": [[100.0, 0.0]], "asks": [[101.5, 1.0]]
+    }
+    assert book.snapshot()["best_bid"] == 99.0 and book.snapshot()["spread"] == 2.0
+    assert book.apply_delta([[99.0, 9.0]], [], seq=11) is None
+    
+    expected = book_checksum([[99.0, 5.0], [98.5, 3.0]], [[101.0, 1.5], [101.5, 1.0], [102.0, 2.5]])
+    book.apply_delta([[99.0, 5.0]], [], seq=14, prev_seq=11, checksum=expected)
+    with pytest.raises(BookOutOfSync):
+        book.apply_delta([[99.0, 6.0]], [], seq=16, prev_seq=15)
+    assert not book.synced
+    
+    book = make_book()
+    with pytest.raises(BookOutOfSync):
+        book.apply_delta([[99.0, 6.0]], [], seq=11, checksum=expected)
+
+
+def test_price_buckets_and_cumulative_depth():
+    """Test levels sum into buckets rounded away from the spread and accumulate in order"""
+    book = OrderBook("fake", "ETH/USDT")
+    book.apply_snapshot([[0.3, 1.0], [0.29, 2.0], [0.21, 4.0], [0.19, 8.0]], [[0.31, 1.0], [0.4, 2.0], [0.41, 3.0]])
+    assert book.bids.buckets(0.1, 5) == [[0.3, 1.0], [0.2, 6.0], [0.1, 8.0]]
+    assert book.asks.buckets(0.1, 1) == [[0.4, 3.0]]
+    assert book.asks.cumulative(2) == [[0.31, 1.0, 1.0, 0.31], [0.4, 2.0, 3.0, 1.11]]
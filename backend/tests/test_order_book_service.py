@@ -0,0 +1,138 @@
+"""
+Tests for streamed order books and their WebSocket deltas
+"""
+
+import asyncio
+import json
+import pytest
+from services.crypto_service import CryptocurrencyService
+from services.fake_exchange import FakeExchange
+from services.fake_ticker_feed import FakeTickerFeed
+from services.order_book import OrderBook
+from services.order_book_service import JsonBookAdapter, OrderBookService, PollingBookAdapter
+
+
+class Subscriber:
+    """Rebuilds a book from the messages a WebSocket client would receive"""
+    
+    def __init__(self):
+        self.messages = []
+        self.book = OrderBook("fake", "BTC/USDT")
+        self.missed = 0
+    
+    def enqueue(self, message):
+        data = json.loads(message)
+        self.messages.append(data)
+        if data["type"] == "book_snapshot":
+            self.book.apply_snapshot(data["bids"], data["asks"], data["seq"])
+        elif data["prev_seq"] != self.book.seq:
+            self.missed += 1
+        else:
+            self.book.apply_delta(data["bids"], data["asks"], data["seq"], data["prev_seq"])
+
+
+async def wait_for(condition, timeout=3.0):
+    """Poll until condition() holds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+async def make_service(adapter_factory):
+    crypto = CryptocurrencyService(
+        exchange_ids=["fake"], exchange_factory=lambda exchange_id, config: FakeExchange(markets=20, latency="0")
+    )
+    await crypto.initialize()
+    return crypto, OrderBookService(crypto, adapter_factory, depth=20, reconnect_min=0.01)
+
+
+@pytest.mark.asyncio
+async def test_subscribers_rebuild_the_book_from_deltas_across_resyncs():
+    """Test snapshot plus deltas reproduce the book, and a feed gap resyncs with a fresh snapshot"""
+    feed = FakeTickerFeed(interval=0.002, drop_every=40)
+    url = await feed.start()
+    crypto, books = await make_service(lambda exchange_id: JsonBookAdapter(url, exchange_id, depth=20))
+    subscriber = Subscriber()
+    try:
+        assert await books.subscribe(subscriber, "fake", "BTCUSDT") == ("fake", "BTC/USDT")
+        await wait_for(lambda: books.counters["fake"]["resyncs"] >= 1 and books.get("fake", "BTC/USDT") is not None)
+        await wait_for(lambda: books.counters["fake"]["updates"] >= 50)
+        
+        book = books.get("fake", "BTCUSDT")
+        assert subscriber.missed == 0
+        assert [m["type"] for m in subscriber.messages].count("book_snapshot") >= 2
+        assert subscriber.book.seq == book.seq
+        assert subscriber.book.bids.levels() == book.bids.levels()
+        assert subscriber.book.asks.levels() == book.asks.levels()
+        
+        books.unsubscribe(subscriber, "fake", "BTCUSDT")
+        assert not books.tasks and books.get("fake", "BTC/USDT") is None
+    finally:
+        await books.stop()
+        await feed.stop()
+        await crypto.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_polled_snapshots_are_streamed_as_deltas():
+    """Test REST snapshots are diffed into deltas for subscribers of a pinned book"""
+    crypto = None
+    crypto, books = await make_service(lambda exchange_id: PollingBookAdapter(crypto, exchange_id, 20, 0.01))
+    subscriber = Subscriber()
+    try:
+        await books.pin("fake", "ETH/USDT")
+        await books.subscribe(subscriber, "fake", "ETH/USDT")
+        await wait_for(lambda: [m["type"] for m in subscriber.messages].count("book_delta") >= 2)
+        
+        book = books.get("fake", "ETH/USDT")
+        assert len(book.bids) == len(book.asks) == 20
+        assert subscriber.missed == 0
+        assert subscriber.book.bids.levels() == book.bids.levels()
+        assert books.stats()["books"]["fake:ETH/USDT"]["subscribers"] == 1
+        
+        # Pinned books keep streaming without subscribers
+        books.unsubscribe(subscriber, "fake", "ETH/USDT")
+        assert ("fake", "ETH/USDT") in books.tasks
+    finally:
+        await books.stop()
+        await crypto.cleanup()
+
+
+class GappedAdapter:
+    """Feed whose first delta after every snapshot skips a sequence number"""
+    
+    def __init__(self, connects):
+        self.connects = connects
+    
+    async def stream(self, symbol):
+        self.connects.append(asyncio.get_running_loop().time())
+        yield {"type": "book_snapshot", "bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]], "seq": 1}
+        yield {"type": "book_delta", "bids": [[98.0, 1.0]], "asks": [], "seq": 3, "prev_seq": 2}
+    
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_repeated_resyncs_back_off():
+    """Test the first resync is immediate but a feed that keeps falling out of sync is not hammered"""
+    connects = []
+    crypto = CryptocurrencyService(
+        exchange_ids=["fake"], exchange_factory=lambda exchange_id, config: FakeExchange(markets=20, latency="0")
+    )
+    await crypto.initialize()
+    books = OrderBookService(
+        crypto, lambda exchange_id: GappedAdapter(connects), depth=20, reconnect_min=0.05, reconnect_max=0.2
+    )
+    try:
+        await books.pin("fake", "BTC/USDT")
+        await asyncio.sleep(0.5)
+        
+        assert 3 <= len(connects) <= 8
+        assert connects[1] - connects[0] < 0.04
+        assert connects[-1] - connects[-2] >= 0.1
+        assert books.stats()["exchanges"]["fake"]["resyncs"] == len(connects)
+    finally:
+        await books.stop()
+        await crypto.cleanup()
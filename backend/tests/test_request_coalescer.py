@@ -0,0 +1,88 @@
+"""
+Tests for request coalescer
+"""
+
+import pytest
+import asyncio
+from services.request_coalescer import RequestCoalescer
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_fetch():
+    """Test concurrent callers for the same key await a single upstream call"""
+    coalescer = RequestCoalescer()
+    calls = 0
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"last": 42000.0}
+    
+    results = await asyncio.gather(*[
+        coalescer.run("ticker:binance:BTC/USDT", fetch) for _ in range(50)
+    ])
+    
+    assert calls == 1
+    assert all(result == {"last": 42000.0} for result in results)
+    stats = coalescer.stats()
+    assert stats["fetches"] == 1
+    assert stats["callers_served"] == 50
+    assert stats["max_callers"] == 50
+    assert stats["callers_per_fetch"] == 50.0
+    assert coalescer.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_fetch_independently():
+    """Test different keys are not coalesced"""
+    coalescer = RequestCoalescer()
+    calls = []
+    
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+    
+    results = await asyncio.gather(
+        coalescer.run("a", lambda: fetch("a")),
+        coalescer.run("b", lambda: fetch("b")),
+    )
+    
+    assert results == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers():
+    """Test an upstream failure is raised to every waiting caller"""
+    coalescer = RequestCoalescer()
+    
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+    
+    results = await asyncio.gather(
+        *[coalescer.run("key", fetch) for _ in range(3)],
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(result, ValueError) for result in results)
+    assert coalescer.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_fetch():
+    """Test cancelling one caller leaves the shared fetch running for others"""
+    coalescer = RequestCoalescer()
+    
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    first = asyncio.create_task(coalescer.run("key", fetch))
+    second = asyncio.create_task(coalescer.run("key", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    
+    assert await second == "done"
@@ -0,0 +1,107 @@
+"""
+Tests for cached response encoding
+"""
+
+import gzip
+import json
+import pickle
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from models.schemas import TickerResponse
+from services.response_cache import COMPRESSORS, EncodedResponse, ResponseCompressor, compose_json, etag_matches
+
+
+def make_ticker(symbol="BTC/USDT", last=42000.5):
+    """Build a ticker dict as produced by the crypto service"""
+    return {
+        "exchange": "binance",
+        "symbol": symbol,
+        "last": last,
+        "bid": 41999.0,
+        "ask": None,
+        "high": 43000.0,
+        "low": 41000.0,
+        "volume": 1234.5,
+        "timestamp": datetime(2024, 1, 2, 3, 4, 5, 678000),
+        "datetime": "2024-01-02T03:04:05.678Z"
+    }
+
+
+def test_encoded_body_matches_response_model_output():
+    """Test the cached body decodes to what FastAPI's response_model path would send"""
+    ticker = make_ticker()
+    encoded = EncodedResponse(ticker, TickerResponse)
+    
+    expected = jsonable_encoder(TickerResponse.model_validate(TickerResponse(**ticker).model_dump()))
+    assert json.loads(encoded.body) == expected
+    assert encoded.value is ticker
+    assert encoded.etag.startswith('"') and len(encoded.etag) == 34
+    assert EncodedResponse(make_ticker(), TickerResponse).etag == encoded.etag
+    assert EncodedResponse(make_ticker(last=1.0), TickerResponse).etag != encoded.etag
+
+
+def test_compose_json_splices_item_bodies():
+    """Test batch bodies embed per-item bodies unchanged"""
+    items = [EncodedResponse(make_ticker(symbol)) for symbol in ("BTC/USDT", "ETH/USDT")]
+    
+    body = compose_json({"exchange": "binance"}, "tickers", items)
+    
+    data = json.loads(body)
+    assert data["exchange"] == "binance"
+    assert [t["symbol"] for t in data["tickers"]] == ["BTC/USDT", "ETH/USDT"]
+    assert json.loads(compose_json({}, "tickers", [])) == {"tickers": []}
+
+
+def test_encoded_response_pickles_for_shared_backends():
+    """Test entries survive the shared cache backend's pickling"""
+    encoded = EncodedResponse({"exchange": "binance", "markets": ["BTC/USDT"]})
+    
+    restored = pickle.loads(pickle.dumps(encoded, protocol=pickle.HIGHEST_PROTOCOL))
+    
+    assert (restored.value, restored.body, restored.etag) == (encoded.value, encoded.body, encoded.etag)
+
+
+def test_negotiate_honors_weights_and_server_preference():
+    """Test content coding negotiation by q-value, wildcard and server preference on ties"""
+    compressor = ResponseCompressor(encodings=["br", "gzip"])
+    expected_best = "br" if "br" in COMPRESSORS else "gzip"
+    
+    assert compressor.negotiate(None) is None
+    assert compressor.negotiate("identity") is None
+    assert compressor.negotiate("gzip, deflate") == "gzip"
+    assert compressor.negotiate("gzip, br") == expected_best
+    assert compressor.negotiate("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert compressor.negotiate("gzip;q=0") is None
+    assert compressor.negotiate("*") == expected_best
+
+
+def test_etag_matches_compressed_variants():
+    """Test If-None-Match matches the plain ETag, coding-suffixed variants, weak forms and *"""
+    etag = EncodedResponse({"a": 1}).etag
+    variant = etag[:-1] + '-gzip"'
+    
+    assert etag_matches(etag, etag)
+    assert etag_matches(variant, etag)
+    assert etag_matches(f'"other", W/{variant}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_compressor_caches_variant_per_etag():
+    """Test a body is compressed once per ETag and coding, then served from the variant cache"""
+    compressor = ResponseCompressor(encodings=["gzip"])
+    encoded = EncodedResponse({"markets": [f"C{i}/USDT" for i in range(500)]})
+    
+    first = compressor.compress(encoded, "gzip")
+    second = compressor.compress(EncodedResponse(encoded.value), "gzip")
+    assert second is first
+    assert gzip.decompress(first) == encoded.body
+    
+    stats = compressor.stats()
+    assert stats["compressions"] == 1
+    assert stats["variant_hits"] == 1
+    assert stats["bytes_out"] < stats["bytes_in"]
+    assert stats["cached_bytes"] == len(first)
@@ -0,0 +1,107 @@
+"""
+Tests for the memory-mapped ticker board shared between processes
+"""
+
+import multiprocessing
+import time
+from datetime import datetime
+import pytest
+from models.schemas import TickerResponse
+from services.shared_ticker_board import SharedTickerBoard
+
+
+def make_ticker(symbol, last):
+    return {
+        "exchange": "fake", "symbol": symbol, "last": last, "bid": last, "ask": last, "high": None,
+        "low": None, "volume": 1.0, "timestamp": datetime.fromtimestamp(1704164645), "datetime": "2024-01-02"
+    }
+
+
+def read_torn(path, reads, results):
+    """Count reads whose fields come from different updates"""
+    board = SharedTickerBoard(path, slots=64)
+    torn = seen = 0
+    for _ in range(reads):
+        ticker = board.get("fake", "BTC/USDT")
+        if ticker is not None:
+            seen += 1
+            torn += not ticker["last"] == ticker["bid"] == ticker["ask"]
+    results.put((seen, torn))
+
+
+def test_writer_updates_are_read_by_other_instances(tmp_path):
+    """Test a second mapping of the file sees updates, aliases and invalidation without a writer lock"""
+    path = str(tmp_path / "board")
+    writer = SharedTickerBoard(path, slots=64, model=TickerResponse)
+    reader = SharedTickerBoard(path, slots=64, model=TickerResponse)
+    try:
+        assert writer.acquire_writer() and not reader.acquire_writer()
+        writer.alias("fake", "BTCUSDT", "BTC/USDT")
+        assert reader.get("fake", "BTCUSDT") is None
+        writer.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 1.5))
+        
+        ticker = reader.get("fake", "BTCUSDT")
+        assert ticker == dict(make_ticker("BTCUSDT", 1.5))
+        encoded = reader.get_encoded("fake", "BTCUSDT")
+        assert reader.get_encoded("fake", "BTCUSDT") is encoded
+        writer.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 2.5))
+        assert reader.get_encoded("fake", "BTCUSDT") is not encoded
+        assert reader.get("fake", "BTC/USDT")["last"] == 2.5
+        
+        assert writer.invalidate("fake") == 1
+        assert reader.get("fake", "BTC/USDT") is None
+        assert reader.stats()["entries"] == 0 and reader.stats()["aliases"] == 1
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_writer_lock_is_taken_over(tmp_path):
+    """Test a new writer takes over when the old one closes and keeps its records"""
+    path = str(tmp_path / "board")
+    first = SharedTickerBoard(path, slots=64)
+    second = SharedTickerBoard(path, slots=64)
+    assert first.acquire_writer()
+    first.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 1.0))
+    assert not second.acquire_writer()
+    first.close()
+    
+    assert second.acquire_writer()
+    second.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 2.0))
+    assert second.stats()["entries"] == 1 and second.get("fake", "BTC/USDT")["last"] == 2.0
+    second.close()
+    with pytest.raises(ValueError):
+        SharedTickerBoard(path, slots=32)
+
+
+def test_full_board_drops_new_pairs(tmp_path):
+    """Test pairs beyond the slot count are not streamed"""
+    board = SharedTickerBoard(str(tmp_path / "board"), slots=2)
+    board.acquire_writer()
+    for i in range(3):
+        board.update("fake", f"C{i}/USDT", make_ticker(f"C{i}/USDT", float(i)))
+    assert board.stats()["full"] == 1
+    assert board.get("fake", "C1/USDT")["last"] == 1.0 and board.get("fake", "C2/USDT") is None
+    board.close()
+
+
+def test_reads_from_another_process_are_never_torn(tmp_path):
+    """Test a reader process never sees fields from two different updates"""
+    path = str(tmp_path / "board")
+    writer = SharedTickerBoard(path, slots=64)
+    writer.acquire_writer()
+    writer.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 0.0))
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    reader = context.Process(target=read_torn, args=(path, 20000, results))
+    reader.start()
+    i = 0
+    while reader.is_alive():
+        i += 1
+        writer.update("fake", "BTC/USDT", make_ticker("BTC/USDT", float(i)))
+        if i % 1000 == 0:
+            time.sleep(0)
+    seen, torn = results.get(timeout=10)
+    reader.join()
+    writer.close()
+    assert seen > 0 and torn == 0
@@ -0,0 +1,43 @@
+"""
+Tests for the streamed ticker board
+"""
+
+import time
+from models.schemas import TickerResponse
+from services.ticker_board import TickerBoard
+
+
+def make_ticker(symbol, last):
+    return {"exchange": "fake", "symbol": symbol, "last": last, "timestamp": 1704164645000, "datetime": ""}
+
+
+def test_board_serves_aliases_and_reuses_encoded_bodies():
+    """Test a ticker is readable by market id and each name's body is encoded once per update"""
+    board = TickerBoard(TickerResponse)
+    board.alias("fake", "BTCUSDT", "BTC/USDT")
+    board.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 1.0))
+    
+    assert board.get("fake", "BTCUSDT")["symbol"] == "BTCUSDT"
+    by_symbol = board.get_encoded("fake", "BTC/USDT")
+    by_id = board.get_encoded("fake", "BTCUSDT")
+    assert by_id is board.get_encoded("fake", "BTCUSDT")
+    assert b'"BTCUSDT"' in by_id.body and b'"BTC/USDT"' in by_symbol.body
+    
+    board.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 2.0))
+    assert board.get_encoded("fake", "BTCUSDT") is not by_id
+    assert board.get("fake", "ETH/USDT") is None
+    assert board.stats()["hits"] == 5 and board.stats()["misses"] == 1
+
+
+def test_board_drops_expired_and_invalidated_entries():
+    """Test quiet feeds stop being served and invalidation only affects one exchange"""
+    board = TickerBoard(max_age=0.05)
+    board.update("fake", "BTC/USDT", make_ticker("BTC/USDT", 1.0))
+    board.update("other", "BTC/USDT", make_ticker("BTC/USDT", 1.0))
+    assert board.invalidate("fake") == 1
+    assert board.get("fake", "BTC/USDT") is None
+    assert board.get("other", "BTC/USDT")["last"] == 1.0
+    
+    time.sleep(0.06)
+    assert board.get("other", "BTC/USDT") is None
+    assert board.stats()["expired"] == 1
@@ -0,0 +1,117 @@
+"""
+Tests for ticker fan-out
+"""
+
+import pytest
+import asyncio
+import json
+from services.ticker_fanout import TickerFanout
+
+
+class Recorder:
+    """Collects deliveries per subscriber"""
+    
+    def __init__(self):
+        self.received = {}
+    
+    async def deliver(self, subscribers, message, key):
+        for subscriber in subscribers:
+            self.received.setdefault(subscriber, []).append(message)
+
+
+@pytest.mark.asyncio
+async def test_one_poller_per_pair():
+    """Test many subscribers of a pair share one poller and one serialized message"""
+    calls = []
+    
+    async def fetch(exchange, symbol):
+        calls.append((exchange, symbol))
+        return {"last": float(len(calls))}
+    
+    recorder = Recorder()
+    fanout = TickerFanout(fetch, recorder.deliver, interval=0.01)
+    for client in ("a", "b", "c"):
+        await fanout.subscribe(client, "binance", "BTC/USDT")
+    
+    assert len(fanout.pollers) == 1
+    await asyncio.sleep(0.05)
+    await fanout.stop()
+    
+    assert set(calls) == {("binance", "BTC/USDT")}
+    assert recorder.received["a"] == recorder.received["b"] == recorder.received["c"]
+    message = json.loads(recorder.received["a"][0])
+    assert message["type"] == "ticker"
+    assert message["symbol"] == "BTC/USDT"
+
+
+@pytest.mark.asyncio
+async def test_updates_only_reach_pair_subscribers():
+    """Test updates are delivered only to subscribers of that pair"""
+    async def fetch(exchange, symbol):
+        return {"last": 1.0}
+    
+    recorder = Recorder()
+    fanout = TickerFanout(fetch, recorder.deliver, interval=0.01)
+    await fanout.subscribe("btc-client", "binance", "BTC/USDT")
+    await fanout.subscribe("eth-client", "binance", "ETH/USDT")
+    await asyncio.sleep(0.03)
+    await fanout.stop()
+    
+    assert all('"BTC/USDT"' in m for m in recorder.received["btc-client"])
+    assert all('"ETH/USDT"' in m for m in recorder.received["eth-client"])
+
+
+@pytest.mark.asyncio
+async def test_unchanged_ticker_not_resent():
+    """Test identical consecutive tickers are delivered once"""
+    async def fetch(exchange, symbol):
+        return {"last": 1.0}
+    
+    recorder = Recorder()
+    fanout = TickerFanout(fetch, recorder.deliver, interval=0.01)
+    await fanout.subscribe("client", "binance", "BTC/USDT")
+    await asyncio.sleep(0.05)
+    await fanout.stop()
+    
+    assert len(recorder.received["client"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_poller_stops_with_last_subscriber():
+    """Test the poller is cancelled when the last subscriber leaves"""
+    async def fetch(exchange, symbol):
+        return {"last": 1.0}
+    
+    recorder = Recorder()
+    fanout = TickerFanout(fetch, recorder.deliver, interval=0.01)
+    await fanout.subscribe("a", "binance", "BTC/USDT")
+    await fanout.subscribe("b", "binance", "BTC/USDT")
+    poller = fanout.pollers[("binance", "BTC/USDT")]
+    
+    fanout.unsubscribe("a", "binance", "BTC/USDT")
+    assert fanout.subscriber_count("binance", "BTC/USDT") == 1
+    assert not poller.done()
+    
+    fanout.unsubscribe("b", "binance", "BTC/USDT")
+    await asyncio.sleep(0)
+    assert fanout.pollers == {}
+    assert poller.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_current_ticker():
+    """Test joining a live pair delivers its last ticker at once rather than on the next price change"""
+    async def fetch(exchange, symbol):
+        return {"last": 1.0}
+    
+    recorder = Recorder()
+    fanout = TickerFanout(fetch, recorder.deliver, interval=0.01)
+    await fanout.subscribe("early", "binance", "BTC/USDT")
+    await asyncio.sleep(0.03)
+    
+    await fanout.subscribe("late", "binance", "BTC/USDT")
+    assert recorder.received["late"] == recorder.received["early"]
+    await asyncio.sleep(0.03)
+    await fanout.stop()
+    
+    assert len(recorder.received["early"]) == len(recorder.received["late"]) == 1
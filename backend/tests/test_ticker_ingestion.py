@@ -0,0 +1,95 @@
+"""
+Tests for push-feed ticker ingestion
+"""
+
+import asyncio
+import pytest
+from services.crypto_service import CryptocurrencyService
+from services.fake_exchange import FakeExchange
+from services.fake_ticker_feed import FakeTickerFeed
+from services.ticker_board import TickerBoard
+from services.ticker_ingestion import JsonFeedAdapter, TickerIngestor, parse_streams
+
+
+async def wait_for(condition, timeout=3.0):
+    """Poll until condition() holds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_parse_streams():
+    """Test stream specs are grouped per exchange and malformed items rejected"""
+    assert parse_streams("") == {}
+    assert parse_streams("binance:BTC/USDT, binance:ETH/USDT,kraken:BTC/USD") == {
+        "binance": ["BTC/USDT", "ETH/USDT"],
+        "kraken": ["BTC/USD"],
+    }
+    with pytest.raises(ValueError):
+        parse_streams("binance")
+
+
+@pytest.mark.asyncio
+async def test_ingestor_feeds_board_counts_gaps_and_reconnects():
+    """Test streamed tickers reach the board, gaps are counted and a dropped feed is reconnected"""
+    feed = FakeTickerFeed(interval=0.01, drop_every=5)
+    url = await feed.start()
+    service = CryptocurrencyService(
+        exchange_ids=["fake"], exchange_factory=lambda exchange_id, config: FakeExchange(markets=20, latency="0")
+    )
+    await service.initialize()
+    board = TickerBoard()
+    ingestor = TickerIngestor(
+        service, board, {"fake": ["BTC/USDT", "ETH/USDT"]},
+        lambda exchange_id: JsonFeedAdapter(url, exchange_id), reconnect_min=0.01
+    )
+    ingestor.start()
+    try:
+        await wait_for(lambda: ingestor.feeds["fake"]["gaps"] >= 2)
+        ticker = board.get("fake", "BTCUSDT")
+        assert ticker["exchange"] == "fake" and ticker["symbol"] == "BTCUSDT" and ticker["last"] > 0
+        assert ingestor.feeds["fake"]["state"] == "streaming"
+        assert ingestor.feeds["fake"]["out_of_order"] == 0
+        
+        await feed.disconnect()
+        await wait_for(lambda: ingestor.feeds["fake"]["connects"] >= 2)
+        await wait_for(lambda: board.get("fake", "ETH/USDT") is not None)
+        assert ingestor.stats()["fake"]["last_error"]
+    finally:
+        await ingestor.stop()
+        await feed.stop()
+        await service.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_only_shared_board_writer_streams(tmp_path):
+    """Test a second ingestor on a shared board waits and takes over once the writer is gone"""
+    from services.shared_ticker_board import SharedTickerBoard
+    
+    class IdleAdapter(JsonFeedAdapter):
+        async def stream(self, symbols):
+            await asyncio.Event().wait()
+            yield
+    
+    service = CryptocurrencyService(exchange_ids=[])
+    boards = [SharedTickerBoard(str(tmp_path / "board"), slots=16) for _ in range(2)]
+    ingestors = [
+        TickerIngestor(
+            service, board, {"fake": ["BTC/USDT"]},
+            lambda exchange_id: IdleAdapter("ws://unused", exchange_id), takeover_interval=0.01
+        )
+        for board in boards
+    ]
+    try:
+        for ingestor in ingestors:
+            ingestor.start()
+        assert list(ingestors[0].tasks) == ["fake"] and not ingestors[1].tasks
+        
+        await ingestors[0].stop()
+        boards[0].close()
+        await wait_for(lambda: "fake" in ingestors[1].tasks)
+        assert boards[1].writer
+    finally:
+        await ingestors[1].stop()
+        boards[1].close()
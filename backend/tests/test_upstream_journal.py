@@ -0,0 +1,113 @@
+"""
+Tests for upstream journal record and replay
+"""
+
+import pytest
+import sqlite3
+import ccxt
+from services.crypto_service import CryptocurrencyService
+from services.fake_exchange import FakeExchange
+from services.upstream_journal import ReplayExchange, UpstreamJournal
+
+
+def test_lookup_follows_recording_clock():
+    """Test lookups return the latest response recorded by a point in time, else the first one"""
+    journal = UpstreamJournal(":memory:")
+    journal.record("fake", "fetch_ticker", ("BTC/USDT",), 100.0, 0.05, {"last": 1.0})
+    journal.record("fake", "fetch_ticker", ("BTC/USDT",), 110.0, 0.07, {"last": 2.0})
+    journal.record("fake", "fetch_ticker", ("ETH/USDT",), 105.0, 0.01, error=ccxt.RequestTimeout("slow"))
+    assert journal.flush() == 3
+    
+    assert journal.lookup("fake", "fetch_ticker", ("BTC/USDT",), 99.0) == (0.05, None, {"last": 1.0})
+    assert journal.lookup("fake", "fetch_ticker", ("BTC/USDT",), 109.0)[2] == {"last": 1.0}
+    assert journal.lookup("fake", "fetch_ticker", ("BTC/USDT",), 115.0) == (0.07, None, {"last": 2.0})
+    assert journal.lookup("fake", "fetch_ticker", ("ETH/USDT",), 115.0) == (0.01, ccxt.RequestTimeout, "slow")
+    assert journal.lookup("fake", "fetch_ticker", ("XRP/USDT",), 115.0) is None
+    assert journal.stats()["calls"] == {"fake": {"fetch_ticker": 3}}
+
+
+def test_lookup_falls_back_to_identifying_arguments():
+    """Test an OHLCV window anchored elsewhere still finds the recorded series"""
+    journal = UpstreamJournal(":memory:")
+    journal.record("fake", "fetch_ohlcv", ("BTC/USDT", "1h", 1000, 10), 100.0, 0.05, [[1000, 1, 2, 0.5, 1.5, 3]])
+    journal.record("fake", "load_markets", (True,), 100.0, 0.2, {"BTC/USDT": {"symbol": "BTC/USDT"}})
+    journal.flush()
+    
+    assert journal.lookup("fake", "fetch_ohlcv", ("BTC/USDT", "1h", 5000, 10), 100.0)[2] == [[1000, 1, 2, 0.5, 1.5, 3]]
+    assert journal.lookup("fake", "fetch_ohlcv", ("BTC/USDT", "1d", 1000, 10), 100.0) is None
+    assert journal.lookup("fake", "load_markets", (), 100.0)[2] == {"BTC/USDT": {"symbol": "BTC/USDT"}}
+
+
+class FailingConnection:
+    """SQLite connection whose writes fail"""
+    
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("disk I/O error")
+    
+    def rollback(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_calls_buffered(tmp_path):
+    """Test calls taken for a flush that fails are buffered again, ahead of calls recorded since"""
+    service = CryptocurrencyService(upstream_mode="record", journal_path=str(tmp_path / "journal.db"))
+    journal = service.journal
+    journal.record("fake", "fetch_ticker", ("BTC/USDT",), 100.0, 0.05, {"last": 1.0})
+    conn, journal._conn = journal._conn, FailingConnection()
+    
+    with pytest.raises(sqlite3.OperationalError):
+        await service._flush_journal()
+    journal.record("fake", "fetch_ticker", ("BTC/USDT",), 110.0, 0.05, {"last": 2.0})
+    with pytest.raises(sqlite3.OperationalError):
+        journal.flush()
+    assert [row[4] for row in journal.pending] == [100.0, 110.0]
+    
+    journal._conn = conn
+    assert await service._flush_journal() == 2
+    assert journal.pending == [] and journal.recorded == 2
+    assert journal.lookup("fake", "fetch_ticker", ("BTC/USDT",), 105.0)[2] == {"last": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path):
+    """Test a recorded session is served back by replay mode without the recorded exchange"""
+    path = str(tmp_path / "journal.db")
+    fake = FakeExchange("fake", markets=20, latency="0.01", error_rate=0.0)
+    recorder = CryptocurrencyService(
+        exchange_ids=["fake"], upstream_mode="record", journal_path=path,
+        exchange_factory=lambda exchange_id, config: fake
+    )
+    await recorder.initialize()
+    recorded_ticker = await recorder.get_ticker("fake", "BTC/USDT")
+    recorded_candles = await recorder.get_ohlcv("fake", "ETH/USDT", "1h", limit=5)
+    fake.error_rate = 1.0
+    with pytest.raises(ccxt.ExchangeNotAvailable):
+        await recorder.get_ticker("fake", "SOL/USDT")
+    await recorder.cleanup()
+    
+    replayer = CryptocurrencyService(
+        exchange_ids=["fake"], upstream_mode="replay", journal_path=path, replay_speed=100.0
+    )
+    await replayer.initialize()
+    try:
+        exchange = replayer.exchanges["fake"]
+        assert isinstance(exchange, ReplayExchange)
+        assert exchange.timeframes == FakeExchange.timeframes
+        assert (await replayer.get_ticker("fake", "BTC/USDT"))["last"] == recorded_ticker["last"]
+        assert await replayer.get_ohlcv("fake", "ETH/USDT", "1h", limit=5) == recorded_candles
+        assert (await replayer.search_markets("fake", query="BTC/"))["markets"][0]["symbol"] == "BTC/USDT"
+        with pytest.raises(ccxt.ExchangeNotAvailable):
+            await replayer.get_ticker("fake", "SOL/USDT")
+        with pytest.raises(ccxt.ExchangeError):
+            await replayer.get_ticker("fake", "XRP/USDT")
+    finally:
+        await replayer.cleanup()
+
+
+def test_replay_mode_requires_journal():
+    """Test record and replay modes refuse to start without a journal path"""
+    with pytest.raises(ValueError):
+        CryptocurrencyService(upstream_mode="replay")
+    with pytest.raises(ValueError):
+        CryptocurrencyService(upstream_mode="mirror", journal_path="journal.db")
@@ -0,0 +1,94 @@
+"""
+Tests for upstream scheduler
+"""
+
+import pytest
+import asyncio
+from services.upstream_scheduler import (
+    BACKFILL,
+    INTERACTIVE,
+    STREAMING,
+    UpstreamBusyError,
+    UpstreamScheduler
+)
+
+
+@pytest.mark.asyncio
+async def test_calls_within_burst_are_granted_immediately():
+    """Test a full bucket grants calls without queueing"""
+    scheduler = UpstreamScheduler(burst_seconds=1.0)
+    
+    for _ in range(10):
+        await scheduler.acquire("fake", "fetch_ticker", 100)
+    
+    stats = scheduler.stats()["fake"]
+    assert stats["granted"] == 10
+    assert stats["tokens"] < 1
+    assert sum(scheduler.wait_time.counts[("fake", "interactive")]) == 10
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_served_by_priority():
+    """Test queued interactive calls overtake earlier backfill and streaming calls"""
+    scheduler = UpstreamScheduler(burst_seconds=0, deadlines={})
+    await scheduler.acquire("fake", "fetch_ohlcv", 20)
+    order = []
+    
+    async def call(name, priority):
+        await scheduler.acquire("fake", "fetch_ohlcv", 20, priority)
+        order.append(name)
+    
+    backfill = asyncio.create_task(call("backfill", BACKFILL))
+    await asyncio.sleep(0)
+    streaming = asyncio.create_task(call("streaming", STREAMING))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["fake"]["queued"] == {"interactive": 0, "streaming": 1, "backfill": 1}
+    
+    interactive = asyncio.create_task(call("interactive", INTERACTIVE))
+    await asyncio.gather(backfill, streaming, interactive)
+    
+    assert order == ["interactive", "streaming", "backfill"]
+
+
+@pytest.mark.asyncio
+async def test_call_rejected_when_wait_exceeds_deadline():
+    """Test a call that cannot start in time fails fast with a retry hint"""
+    scheduler = UpstreamScheduler(burst_seconds=0, deadlines={INTERACTIVE: 0.1})
+    await scheduler.acquire("slow", "fetch_ticker", 1000)
+    
+    with pytest.raises(UpstreamBusyError) as exc_info:
+        await scheduler.acquire("slow", "fetch_ticker", 1000)
+    
+    assert 0.5 < exc_info.value.retry_after <= 1.0
+    assert scheduler.stats()["slow"]["rejected"] == 1
+    assert scheduler.rejections.values[("slow", "interactive")] == 1
+    assert scheduler.stats()["slow"]["queued"]["interactive"] == 0
+
+
+@pytest.mark.asyncio
+async def test_expensive_methods_use_exchange_weights():
+    """Test methods are charged their exchange's request weight"""
+    scheduler = UpstreamScheduler(burst_seconds=10, deadlines={INTERACTIVE: 0.5})
+    assert scheduler.cost("binance", "fetch_tickers") == 80
+    assert scheduler.cost("binance", "fetch_ticker") == 2
+    assert scheduler.cost("coinbase", "fetch_ticker") == 1
+    
+    # 200 units of burst at binance's 50ms rate limit covers two bulk ticker calls
+    await scheduler.acquire("binance", "fetch_tickers", 50)
+    await scheduler.acquire("binance", "fetch_tickers", 50)
+    with pytest.raises(UpstreamBusyError):
+        await scheduler.acquire("binance", "fetch_tickers", 50)
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_queued_calls():
+    """Test stopping the scheduler releases callers still waiting"""
+    scheduler = UpstreamScheduler(burst_seconds=0, deadlines={})
+    await scheduler.acquire("fake", "fetch_ticker", 10000)
+    waiter = asyncio.create_task(scheduler.acquire("fake", "fetch_ticker", 10000, BACKFILL))
+    await asyncio.sleep(0)
+    
+    await scheduler.stop()
+    
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
@@ -0,0 +1,183 @@
+"""
+Tests for WebSocket manager
+"""
+
+import pytest
+import asyncio
+import json
+from services.websocket_manager import WebSocketManager
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in whose sends can be blocked"""
+    
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed_code = None
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, message):
+        await self.unblocked.wait()
+        self.sent.append(message)
+    
+    async def close(self, code=1000, reason=""):
+        self.closed_code = code
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_stall_others():
+    """Test broadcast returns immediately and fast clients receive while a slow one is stuck"""
+    manager = WebSocketManager()
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    await manager.connect(fast)
+    await manager.connect(slow)
+    
+    await asyncio.wait_for(manager.broadcast({"type": "ping"}), timeout=0.1)
+    await asyncio.wait_for(manager.broadcast({"type": "pong"}), timeout=0.1)
+    await asyncio.sleep(0.01)
+    
+    assert fast.sent == [json.dumps({"type": "ping"}), json.dumps({"type": "pong"})]
+    assert slow.sent == []
+    # One message is stuck in send_text, the other waits in the queue
+    assert manager.active_connections[slow].stats()["queue_depth"] == 1
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy():
+    """Test a full queue drops its oldest message"""
+    manager = WebSocketManager(max_queue=2, overflow_policy="drop_oldest")
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+    connection = manager.active_connections[slow]
+    
+    # The writer takes the first message and blocks sending it
+    connection.enqueue("m0")
+    await asyncio.sleep(0)
+    for message in ("m1", "m2", "m3"):
+        connection.enqueue(message)
+    
+    assert [m for m, _ in connection.queue.values()] == ["m2", "m3"]
+    assert connection.dropped == 1
+    
+    slow.unblocked.set()
+    await asyncio.sleep(0.01)
+    assert slow.sent == ["m0", "m2", "m3"]
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_latest_per_symbol_policy():
+    """Test queued updates for the same symbol are replaced by the newest"""
+    manager = WebSocketManager(max_queue=10, overflow_policy="latest_per_symbol")
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+    connection = manager.active_connections[slow]
+    
+    connection.enqueue("first")
+    await asyncio.sleep(0)
+    for price in range(5):
+        connection.enqueue(f"btc {price}", key=("binance", "BTC/USDT"))
+    connection.enqueue("eth 0", key=("binance", "ETH/USDT"))
+    
+    assert [m for m, _ in connection.queue.values()] == ["btc 4", "eth 0"]
+    assert connection.conflated == 4
+    assert connection.dropped == 0
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy():
+    """Test a client whose queue overflows is disconnected"""
+    manager = WebSocketManager(max_queue=1, overflow_policy="disconnect")
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+    connection = manager.active_connections[slow]
+    
+    connection.enqueue("m0")
+    await asyncio.sleep(0)
+    connection.enqueue("m1")
+    assert connection.enqueue("m2") is False
+    await asyncio.sleep(0)
+    
+    assert slow not in manager.active_connections
+    assert slow.closed_code == 1013
+    assert manager.stats()["dropped_clients"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_releases_subscriptions():
+    """Test disconnecting a client removes it from the ticker fan-out"""
+    async def fetch(exchange, symbol):
+        return {"last": 1.0}
+    
+    manager = WebSocketManager(fetch_ticker=fetch, poll_interval=0.01)
+    client = FakeWebSocket()
+    await manager.connect(client)
+    await manager.handle_message(client, json.dumps({
+        "action": "subscribe", "exchange": "binance", "symbols": ["BTC/USDT"]
+    }))
+    await asyncio.sleep(0.03)
+    
+    messages = [json.loads(m) for m in client.sent]
+    assert messages[0]["type"] == "subscribed"
+    assert any(m["type"] == "ticker" for m in messages)
+    
+    manager.disconnect(client)
+    assert manager.fanout.pollers == {}
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_book_subscriptions_stream_snapshot_then_deltas():
+    """Test subscribe_book routes a client to the order book service and disconnect releases it"""
+    from services.order_book_service import OrderBookService
+    
+    class StaticFeed:
+        async def stream(self, symbol):
+            yield {"type": "book_snapshot", "bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]], "seq": 1}
+            yield {"type": "book_delta", "bids": [[100.0, 2.0]], "asks": [], "seq": 2}
+            await asyncio.Event().wait()
+        
+        async def close(self):
+            pass
+    
+    class NoMarkets:
+        exchanges = {}
+        
+        async def get_markets(self, exchange_id):
+            return []
+    
+    books = OrderBookService(NoMarkets(), lambda exchange_id: StaticFeed())
+    manager = WebSocketManager(order_books=books)
+    client = FakeWebSocket()
+    await manager.connect(client)
+    await manager.handle_message(client, json.dumps({
+        "action": "subscribe_book", "exchange": "fake", "symbols": ["BTC/USDT"]
+    }))
+    await asyncio.sleep(0.02)
+    
+    messages = [json.loads(m) for m in client.sent]
+    assert [m["type"] for m in messages] == ["book_subscribed", "book_snapshot", "book_delta"]
+    assert messages[2]["prev_seq"] == messages[1]["seq"] == 1 and messages[2]["bids"] == [[100.0, 2.0]]
+    
+    manager.disconnect(client)
+    assert books.tasks == {} and books.subscribers == {}
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_book_subscriptions_need_order_book_service():
+    """Test subscribe_book is refused when order book streaming is not configured"""
+    manager = WebSocketManager()
+    client = FakeWebSocket()
+    await manager.connect(client)
+    await manager.handle_message(client, json.dumps({"action": "subscribe_book", "symbols": ["BTC/USDT"]}))
+    await asyncio.sleep(0.01)
+    assert json.loads(client.sent[0])["type"] == "error"
+    await manager.shutdown()